@@ -2,28 +2,44 @@
 Audio Agent - Handles text-to-speech with translation using ElevenLabs + OpenAI
 """
 import os
-import requests
-from typing import Optional, Dict
+import asyncio
+from typing import Optional, Dict, AsyncIterator
 import json
-from elevenlabs.client import ElevenLabs
 from io import BytesIO
 import time
-from openai import OpenAI
+import hashlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+from services.audio_cache import AudioCache
+from services.cache import CACHE_DIR, create_cache
+from services.http_pool import http_pool
+from services.resilience import upstreams, raise_for_retryable, RETRYABLE_STATUS
+from services.quota import quota, estimate_request_tokens, usage_tokens
+from services.single_flight import single_flight
+from services.metrics import timed, registry
+
+# source: synthesized (ElevenLabs -> cache), relayed (live stream), cache_stream, served (file responses)
+AUDIO_BYTES = registry.counter("audio_bytes_total", "MP3 bytes produced or sent", ("source",))
+AUDIO_STREAM_ERRORS = registry.counter("audio_stream_errors_total", "Live TTS streams cut short by an upstream error")
 
 class AudioAgent:
-    def __init__(self):
+    def __init__(self, http=None):
+        http = http or http_pool
         self.api_key = os.getenv('ELEVENLABS_API_KEY')
         self.openai_key = os.getenv('OPENAI_API_KEY')
         self.base_url = "https://api.elevenlabs.io/v1"
         
-        # Initialize clients
+        # Initialize clients (SDKs are imported only when their key is configured)
         if self.api_key:
-            self.client = ElevenLabs(api_key=self.api_key)
+            from elevenlabs.client import ElevenLabs
+            self.client = ElevenLabs(api_key=self.api_key, httpx_client=http.client)
         else:
             self.client = None
             
         if self.openai_key:
-            self.openai_client = OpenAI(api_key=self.openai_key)
+            from openai import OpenAI
+            self.openai_client = OpenAI(api_key=self.openai_key, http_client=http.client, max_retries=0)
         else:
             self.openai_client = None
         
@@ -54,44 +70,191 @@ class AudioAgent:
             'ja': 'EXAVITQu4vr4xnSDxMaL',  # Use multilingual voice
             'ar': 'EXAVITQu4vr4xnSDxMaL',  # Use multilingual voice
         }
+        
+        # Use eleven_multilingual_v2 model
+        self.tts_model = "eleven_multilingual_v2"
+        self.voice_settings = {
+            "stability": 0.5,
+            "similarity_boost": 0.75,
+            "style": 0.0,
+            "use_speaker_boost": True
+        }
+        
+        # Synthesized MP3s, keyed by a hash of (text, language, voice, model, settings)
+        self.audio_cache = AudioCache(
+            Path(os.getenv("AUDIO_CACHE_DIR", CACHE_DIR / "audio")),
+            max_bytes=int(os.getenv("AUDIO_CACHE_MAX_MB", "500")) * 1024 * 1024
+        )
+        
+        # ElevenLabs calls go through the shared keep-alive pool: sync client for
+        # synthesize_to_file, async client for streaming (chunks relayed as they arrive)
+        self.http_client = http.client
+        self.http = http.async_client
+        
+        # Deadlines, retries and circuit breakers shared with the other agents
+        self.openai_upstream = upstreams.get("openai")
+        self.tts_upstream = upstreams.get("elevenlabs")
+        self.stream_chunk_size = int(os.getenv("AUDIO_STREAM_CHUNK_BYTES", "16384"))
+        
+        # Translations keyed on (source text hash, target language, model); persisted by default
+        self.translation_model = "gpt-4o-mini"
+        self.translation_cache = create_cache(
+            "translations",
+            max_entries=int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "20000")),
+            backend=os.getenv("TRANSLATION_CACHE_BACKEND", "sqlite")
+        )
     
+    @timed("audio.translate")
     def translate_text(self, text: str, target_language: str) -> str:
         """
-        Translate text to target language using OpenAI
+        Translate text to target language using OpenAI (memoized across restarts)
         """
         if not self.openai_client or target_language == 'en':
             return text
         
+        key = self._translation_key(text, target_language)
+        cached = self.translation_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        return single_flight.do(f"translate:{key}", lambda: self._translate_uncached(key, text, target_language))
+    
+    def _translate_uncached(self, key: str, text: str, target_language: str) -> str:
         try:
-            lang_name = self.supported_languages.get(target_language, {}).get('name', target_language)
+            lang_name = self._language_name(target_language)
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
+            request = {
+                "model": self.translation_model,
+                "messages": [
                     {"role": "system", "content": f"You are a professional translator. Translate the following text to {lang_name}. Only return the translation, nothing else."},
                     {"role": "user", "content": text}
                 ],
-                temperature=0.3
-            )
+                "temperature": 0.3
+            }
+            with quota.metered("openai", self.translation_model, "translate", estimate_request_tokens(request)) as meter:
+                response = self.openai_upstream.call(
+                    lambda timeout: self.openai_client.chat.completions.create(**request, timeout=timeout)
+                )
+                meter.settle(usage_tokens(response))
             
             translated = response.choices[0].message.content.strip()
             print(f"✅ Translated to {lang_name}: {translated[:100]}...")
+            self.translation_cache.set(key, translated)
             return translated
             
         except Exception as e:
             print(f"Translation error: {e}")
             return text  # Return original if translation fails
     
+    @timed("audio.translate_batch")
+    def translate_batch(self, text: str, target_languages: list) -> Dict[str, str]:
+        """
+        Translate one text into many languages (codes) with a single request.
+        Cached languages are skipped; anything the batch reply misses falls back
+        to parallel single-language calls.
+        """
+        translations = {}
+        missing = []
+        for code in dict.fromkeys(target_languages):
+            if code == 'en' or not self.openai_client:
+                translations[code] = text
+                continue
+            cached = self.translation_cache.get(self._translation_key(text, code))
+            if cached is not None:
+                translations[code] = cached
+            else:
+                missing.append(code)
+        
+        if not missing:
+            return translations
+        
+        try:
+            targets = ", ".join(f"{code} ({self._language_name(code)})" for code in missing)
+            request = {
+                "model": self.translation_model,
+                "messages": [
+                    {"role": "system", "content": f"You are a professional translator. Translate the user's text into each of these languages: {targets}. Return a JSON object mapping each language code to its translation, nothing else."},
+                    {"role": "user", "content": text}
+                ],
+                "response_format": {"type": "json_object"},
+                "temperature": 0.3
+            }
+            estimate = estimate_request_tokens(request) + len(text) // 4 * len(missing)
+            with quota.metered("openai", self.translation_model, "translate_batch", estimate) as meter:
+                response = self.openai_upstream.call(
+                    lambda timeout: self.openai_client.chat.completions.create(**request, timeout=timeout)
+                )
+                meter.settle(usage_tokens(response))
+            batch = json.loads(response.choices[0].message.content)
+            for code in missing:
+                translated = batch.get(code)
+                if isinstance(translated, str) and translated.strip():
+                    translations[code] = translated.strip()
+                    self.translation_cache.set(self._translation_key(text, code), translations[code])
+            print(f"✅ Batch translated to {len(translations)} languages")
+        except Exception as e:
+            print(f"Batch translation error: {e}")
+        
+        leftover = [code for code in missing if code not in translations]
+        if leftover:
+            with ThreadPoolExecutor(max_workers=min(len(leftover), 4)) as pool:
+                for code, translated in zip(leftover, pool.map(lambda c: self.translate_text(text, c), leftover)):
+                    translations[code] = translated
+        
+        return translations
+    
+    def pretranslate(self, text: str, languages: list = None) -> Dict[str, str]:
+        """
+        Warm the translation cache for a text in the given language names
+        (all supported languages by default); returns {language_name: translation}
+        """
+        names = languages or list(self.supported_languages.keys())
+        codes = {name: self.supported_languages.get(name.lower(), {}).get('code', 'en') for name in names}
+        translated = self.translate_batch(text, list(codes.values()))
+        return {name: translated[code] for name, code in codes.items()}
+    
+    def _translation_key(self, text: str, target_language: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{text_hash}:{target_language}:{self.translation_model}"
+    
+    def _language_name(self, code: str) -> str:
+        for lang in self.supported_languages.values():
+            if lang['code'] == code:
+                return lang['name']
+        return code
+    
     def text_to_speech_multilingual(self, text: str, target_language: str = 'en') -> Optional[bytes]:
         """
         Convert text to speech with translation
         1. Translate text to target language (using OpenAI)
         2. Generate speech in that language (using ElevenLabs multilingual voice)
         """
+        path = self.synthesize_to_file(text, target_language)
+        return path.read_bytes() if path else None
+    
+    @timed("audio.synthesize")
+    def synthesize_to_file(self, text: str, target_language: str = 'en') -> Optional[Path]:
+        """
+        Same as text_to_speech_multilingual but returns the path of the cached MP3.
+        Repeat requests for the same text/language/voice/settings cost no API calls.
+        """
         if not self.client:
             print("Warning: ELEVENLABS_API_KEY not set")
             return None
         
+        voice_id = self.voice_ids.get(target_language, self.voice_ids['en'])
+        key = self.audio_cache.make_key(text, target_language, voice_id, self.tts_model, self.voice_settings)
+        
+        cached = self.audio_cache.get(key)
+        if cached:
+            print(f"⚡ Audio cache hit: {cached.name}")
+            return cached
+        
+        # Concurrent requests for the same audio wait on one synthesis
+        return single_flight.do(f"tts:{key}", lambda: self._synthesize(key, text, target_language, voice_id))
+    
+    def _synthesize(self, key: str, text: str, target_language: str, voice_id: str) -> Optional[Path]:
+        """Translate + ElevenLabs synthesis into the audio cache"""
         try:
             # Step 1: Translate text if not English
             if target_language != 'en':
@@ -99,33 +262,24 @@ class AudioAgent:
                 text = self.translate_text(text, target_language)
             
             # Step 2: Generate speech using multilingual voice
-            voice_id = self.voice_ids.get(target_language, self.voice_ids['en'])
-            
             url = f"{self.base_url}/text-to-speech/{voice_id}"
             
-            headers = {
-                "Accept": "audio/mpeg",
-                "Content-Type": "application/json",
-                "xi-api-key": self.api_key
-            }
+            print(f"Generating speech...")
             
-            # Use eleven_multilingual_v2 model
-            data = {
-                "text": text,
-                "model_id": "eleven_multilingual_v2",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75,
-                    "style": 0.0,
-                    "use_speaker_boost": True
-                }
-            }
+            def post(timeout):
+                response = self.http_client.post(url, json=self._tts_payload(text),
+                                                 headers=self._tts_headers(), timeout=timeout)
+                raise_for_retryable(response)
+                return response
             
-            print(f"Generating speech...")
-            response = requests.post(url, json=data, headers=headers)
+            with quota.metered("elevenlabs", self.tts_model, "tts", len(text)) as meter:
+                response = self.tts_upstream.call(post)
+                if response.status_code != 200:
+                    meter.settle(0)  # rejected requests (401, 4xx) synthesize nothing
             if response.status_code == 200:
                 print(f"✅ Audio generated: {len(response.content)} bytes")
-                return response.content
+                AUDIO_BYTES.inc(len(response.content), source="synthesized")
+                return self.audio_cache.put(key, response.content)
             else:
                 print(f"TTS Error: {response.status_code} - {response.text}")
                 return None
@@ -136,6 +290,102 @@ class AudioAgent:
             traceback.print_exc()
             return None
     
+    @timed("audio.stream_open")
+    async def stream_speech(self, text: str, target_language: str = 'en') -> Optional[AsyncIterator[bytes]]:
+        """
+        Open a streaming synthesis and return an async iterator of MP3 chunks.
+        Chunks are forwarded as ElevenLabs produces them (the upstream read only
+        advances when the client consumes a chunk) and teed into the audio cache.
+        Returns None if synthesis could not be started.
+        """
+        if not self.client:
+            print("Warning: ELEVENLABS_API_KEY not set")
+            return None
+        
+        voice_id = self.voice_ids.get(target_language, self.voice_ids['en'])
+        key = self.audio_cache.make_key(text, target_language, voice_id, self.tts_model, self.voice_settings)
+        
+        cached = self.audio_cache.get(key)
+        if cached:
+            return self._iter_file(cached)
+        
+        if target_language != 'en':
+            text = await asyncio.to_thread(self.translate_text, text, target_language)
+        
+        url = f"{self.base_url}/text-to-speech/{voice_id}/stream"
+        
+        async def open_stream(timeout):
+            request = self.http.build_request("POST", url, json=self._tts_payload(text),
+                                              headers=self._tts_headers(), timeout=timeout)
+            response = await self.http.send(request, stream=True)
+            if response.status_code in RETRYABLE_STATUS:
+                await response.aclose()
+                raise_for_retryable(response)
+            return response
+        
+        try:
+            # Never hedge a stream: a duplicate synthesis is billed in full
+            with quota.metered("elevenlabs", self.tts_model, "tts_stream", len(text)) as meter:
+                response = await self.tts_upstream.call_async(open_stream, hedge=False)
+                if response.status_code != 200:
+                    meter.settle(0)
+        except Exception as e:
+            print(f"Streaming TTS error: {e}")
+            return None
+        
+        if response.status_code != 200:
+            body = await response.aread()
+            await response.aclose()
+            print(f"TTS Error: {response.status_code} - {body[:200]!r}")
+            return None
+        
+        return self._relay_stream(response, self.audio_cache.writer(key))
+    
+    async def _relay_stream(self, response, writer) -> AsyncIterator[bytes]:
+        """Forward upstream chunks; commit to the cache only if the stream completes"""
+        completed = False
+        try:
+            async for chunk in response.aiter_bytes(self.stream_chunk_size):
+                writer.write(chunk)
+                AUDIO_BYTES.inc(len(chunk), source="relayed")
+                yield chunk
+            completed = True
+        except Exception:
+            # Headers are already sent: re-raise so the server aborts the response
+            # instead of terminating a truncated body as if it were complete
+            AUDIO_STREAM_ERRORS.inc()
+            raise
+        finally:
+            await response.aclose()
+            if completed:
+                path = writer.commit()
+                print(f"✅ Streamed audio cached: {path.name} ({writer.size} bytes)")
+            else:
+                writer.abort()
+    
+    async def _iter_file(self, path: Path) -> AsyncIterator[bytes]:
+        with open(path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, self.stream_chunk_size)
+                if not chunk:
+                    break
+                AUDIO_BYTES.inc(len(chunk), source="cache_stream")
+                yield chunk
+    
+    def _tts_headers(self) -> dict:
+        return {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.api_key
+        }
+    
+    def _tts_payload(self, text: str) -> dict:
+        return {
+            "text": text,
+            "model_id": self.tts_model,
+            "voice_settings": self.voice_settings
+        }
+    
     def generate_landmark_intro(self, landmark_name: str, country: str) -> str:
         """
         Generate introduction text for a landmark
@@ -154,7 +404,8 @@ class AudioAgent:
         narration += f"built in {facts.get('built', 'ancient times')}. "
         
         # Add just the first sentence of interpretation if available
-        if interpretation.get('narrative'):
+        # (dropped while the ElevenLabs character budget is running low)
+        if interpretation.get('narrative') and not quota.low("elevenlabs"):
             first_sentence = interpretation['narrative'].split('.')[0] + '.'
             narration += first_sentence
         
@@ -175,6 +426,21 @@ class AudioAgent:
         lang_code = self.supported_languages.get(language.lower(), {}).get('code', 'en')
         return self.text_to_speech_multilingual(text, lang_code)
     
+    async def create_audio_stream(self, text: str, language: str = 'english') -> Optional[AsyncIterator[bytes]]:
+        """
+        Streaming counterpart of create_audio_file
+        """
+        lang_code = self.supported_languages.get(language.lower(), {}).get('code', 'en')
+        return await self.stream_speech(text, lang_code)
+    
+    def create_audio_file(self, text: str, language: str = 'english') -> Optional[Path]:
+        """
+        Like create_audio_response, but returns the cached MP3 path so it can be
+        served straight from disk
+        """
+        lang_code = self.supported_languages.get(language.lower(), {}).get('code', 'en')
+        return self.synthesize_to_file(text, lang_code)
+    
     def get_available_languages(self) -> list:
         """
         Get list of supported languages
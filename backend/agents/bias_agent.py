@@ -2,29 +2,26 @@
 Bias & Ethics Agent - AI for Good Signal
 Provides transparency about source dominance and missing perspectives
 """
-import json
-from pathlib import Path
+from services.catalogue import catalogue as default_catalogue
+from services.metrics import timed
 
 
 class BiasAgent:
-    def __init__(self):
-        # Load bias data from JSON file
-        data_path = Path(__file__).parent.parent / "data" / "bias_data.json"
-        try:
-            with open(data_path, 'r', encoding='utf-8') as f:
-                self.bias_data = json.load(f)
-            print(f"✅ Loaded bias data for {len(self.bias_data)} landmarks")
-        except FileNotFoundError:
-            print("⚠️  bias_data.json not found")
-            self.bias_data = {}
-        except json.JSONDecodeError as e:
-            print(f"⚠️  Error parsing bias_data.json: {e}")
-            self.bias_data = {}
+    def __init__(self, catalogue=None):
+        # Bias records are read per landmark from the catalogue store
+        self.catalogue = catalogue or default_catalogue
     
+    @timed("bias.analyze")
     def analyze(self, object_id: str, lens: str) -> dict:
         """Analyze bias and provide transparency"""
-        bias_info = self.bias_data.get(object_id)
-        
+        return self._report(self.catalogue.get("bias", object_id), lens)
+    
+    @timed("bias.analyze")
+    async def analyze_async(self, object_id: str, lens: str) -> dict:
+        """Async interface for the /interpret pipeline (catalogue misses are read off the event loop)"""
+        return self._report(await self.catalogue.get_async("bias", object_id), lens)
+    
+    def _report(self, bias_info: dict, lens: str) -> dict:
         if not bias_info:
             return {
                 "transparency_note": "Bias analysis not yet available for this object",
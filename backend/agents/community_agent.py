@@ -2,27 +2,28 @@
 Community Sentiment Agent
 Aggregates user reflections and emotional responses
 """
-import json
-from pathlib import Path
 from datetime import datetime
 
+from services.catalogue import catalogue as default_catalogue
+from services.metrics import timed
+
 
 class CommunityAgent:
-    def __init__(self):
-        # Load community sentiment data
-        data_path = Path(__file__).parent.parent / "data" / "community_sentiment.json"
-        try:
-            with open(data_path, 'r', encoding='utf-8') as f:
-                self.sentiment_data = json.load(f)
-            print(f"✅ Loaded community sentiment for {len(self.sentiment_data)} landmarks")
-        except FileNotFoundError:
-            print("⚠️  community_sentiment.json not found, using defaults")
-            self.sentiment_data = {}
+    def __init__(self, catalogue=None):
+        # Community sentiment is read per landmark from the catalogue store
+        self.catalogue = catalogue or default_catalogue
     
+    @timed("community.get_sentiment")
     def get_sentiment(self, object_id: str) -> dict:
         """Get aggregated community sentiment for a landmark"""
-        sentiment = self.sentiment_data.get(object_id)
-        
+        return self._summary(self.catalogue.get("sentiment", object_id))
+    
+    @timed("community.get_sentiment")
+    async def get_sentiment_async(self, object_id: str) -> dict:
+        """Async interface for the /interpret pipeline (catalogue misses are read off the event loop)"""
+        return self._summary(await self.catalogue.get_async("sentiment", object_id))
+    
+    def _summary(self, sentiment: dict) -> dict:
         if not sentiment:
             return {
                 "message": "Be the first to share your perspective on this landmark!",
@@ -3,44 +3,116 @@ Knowledge Retrieval Agent
 Fetches verified historical facts from JSON database or generates using AI
 """
 import os
-import json
-from pathlib import Path
-from openai import OpenAI
+import re
+import copy
+from datetime import datetime, timezone
+
+from services.cache import create_cache
+from services.catalogue import catalogue as default_catalogue
+from services.http_pool import http_pool
+from services.resilience import upstreams
+from services.quota import quota, estimate_request_tokens, usage_tokens
+from services.single_flight import single_flight
+from services.metrics import timed
 
 
 class KnowledgeAgent:
-    def __init__(self):
-        # Initialize OpenAI for dynamic fact generation
+    def __init__(self, http=None, catalogue=None):
+        # Initialize OpenAI for dynamic fact generation (SDK imported only with a key)
         api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key) if api_key else None
+        http = http or http_pool
+        self.client = self.async_client = None
+        if api_key:
+            from openai import OpenAI, AsyncOpenAI
+            self.client = OpenAI(api_key=api_key, http_client=http.client, max_retries=0)
+            self.async_client = AsyncOpenAI(api_key=api_key, http_client=http.async_client, max_retries=0)
+        self.upstream = upstreams.get("openai")
         
-        # Load knowledge base from JSON file
-        data_path = Path(__file__).parent.parent / "data" / "landmarks.json"
-        try:
-            with open(data_path, 'r', encoding='utf-8') as f:
-                self.knowledge_db = json.load(f)
-            print(f"✅ Loaded {len(self.knowledge_db)} landmarks from database")
-        except FileNotFoundError:
-            print("⚠️  landmarks.json not found, will use AI for all landmarks")
-            self.knowledge_db = {}
-        except json.JSONDecodeError as e:
-            print(f"⚠️  Error parsing landmarks.json: {e}")
-            self.knowledge_db = {}
+        # Curated landmark facts, read per record from the catalogue store; the
+        # neutral summary is added once when a record is loaded, not per request
+        self.catalogue = catalogue or default_catalogue
+        self.catalogue.derive("landmark", self._with_summary)
+        
+        # Persistent store of AI-generated facts, keyed on the normalized landmark name
+        self.fact_store = create_cache(
+            "facts",
+            max_entries=int(os.getenv("FACT_STORE_MAX_ENTRIES", "50000")),
+            ttl=float(os.getenv("FACT_STORE_TTL", str(30 * 24 * 3600))),
+            backend=os.getenv("FACT_STORE_BACKEND", "sqlite")
+        )
     
+    @timed("knowledge.get_facts")
     def get_facts(self, object_id: str, detected_name: str = None, location: str = None) -> dict:
         """Retrieve facts from database or generate dynamically"""
         # Try database first
-        facts = self.knowledge_db.get(object_id)
+        facts = self.catalogue.get("landmark", object_id)
         
         if facts:
-            facts["summary"] = self._generate_neutral_summary(facts)
             return facts
         
+        # Then facts generated for an earlier request
+        if detected_name:
+            stored = self.fact_store.get(self._fact_key(detected_name))
+            if stored:
+                return copy.deepcopy(stored)
+        
         # If not in database, generate using AI
         if self.client and detected_name:
-            return self._generate_facts_from_ai(detected_name, location)
+            facts = single_flight.do(
+                f"facts:{self._fact_key(detected_name)}",
+                lambda: self._store_facts(detected_name, self._generate_facts_from_ai(detected_name, location))
+            )
+            return copy.deepcopy(facts)
+        
+        return self._fallback_facts(object_id, detected_name, location)
+    
+    @timed("knowledge.get_facts")
+    async def get_facts_async(self, object_id: str, detected_name: str = None, location: str = None) -> dict:
+        """Async variant of get_facts - catalogue reads and AI generation do not block the event loop"""
+        facts = await self.catalogue.get_async("landmark", object_id)
+        
+        if facts:
+            return facts
         
-        # Fallback
+        if detected_name:
+            stored = self.fact_store.get(self._fact_key(detected_name))
+            if stored:
+                return copy.deepcopy(stored)
+        
+        if self.async_client and detected_name:
+            async def generate():
+                facts = await self._generate_facts_from_ai_async(detected_name, location)
+                return self._store_facts(detected_name, facts)
+            
+            # A tour group scanning the same landmark shares one generation
+            facts = await single_flight.do_async(f"facts:{self._fact_key(detected_name)}", generate)
+            return copy.deepcopy(facts)
+        
+        return self._fallback_facts(object_id, detected_name, location)
+    
+    def _with_summary(self, record: dict) -> dict:
+        """Catalogue hook: curated facts are served as stored, summary included"""
+        record["summary"] = self._generate_neutral_summary(record)
+        return record
+    
+    def _fact_key(self, name: str) -> str:
+        """'The Eiffel Tower' / 'eiffel tower!' -> 'eiffel_tower'"""
+        name = re.sub(r"^the\s+", "", name.strip().lower())
+        return re.sub(r"[^a-z0-9]+", "_", name).strip("_")
+    
+    def _store_facts(self, detected_name: str, facts: dict) -> dict:
+        """Persist successfully generated facts with provenance"""
+        if facts.get("error"):
+            return facts
+        facts["provenance"] = {
+            "source": "gpt-4o-mini",
+            "query": detected_name,
+            "generated_at": datetime.now(timezone.utc).isoformat()
+        }
+        self.fact_store.set(self._fact_key(detected_name), facts)
+        return facts
+    
+    def _fallback_facts(self, object_id: str, detected_name: str = None, location: str = None) -> dict:
         return {
             "error": "No knowledge available for this landmark",
             "name": detected_name or object_id,
@@ -50,7 +122,34 @@ class KnowledgeAgent:
     def _generate_facts_from_ai(self, landmark_name: str, location: str = None) -> dict:
         """Generate facts using GPT-4o when landmark not in database"""
         try:
-            prompt = f"""Provide factual information about: {landmark_name}
+            request = self._facts_request(landmark_name, location)
+            with quota.metered("openai", request["model"], "facts", estimate_request_tokens(request)) as meter:
+                response = self.upstream.call(
+                    lambda timeout: self.client.chat.completions.create(**request, timeout=timeout)
+                )
+                meter.settle(usage_tokens(response))
+            return self._facts_from_response(response, landmark_name)
+        except Exception as e:
+            print(f"AI fact generation error: {e}")
+            return self._failed_facts(landmark_name, location)
+    
+    async def _generate_facts_from_ai_async(self, landmark_name: str, location: str = None) -> dict:
+        """Async variant of _generate_facts_from_ai"""
+        try:
+            request = self._facts_request(landmark_name, location)
+            with quota.metered("openai", request["model"], "facts", estimate_request_tokens(request)) as meter:
+                response = await self.upstream.call_async(
+                    lambda timeout: self.async_client.chat.completions.create(**request, timeout=timeout)
+                )
+                meter.settle(usage_tokens(response))
+            return self._facts_from_response(response, landmark_name)
+        except Exception as e:
+            print(f"AI fact generation error: {e}")
+            return self._failed_facts(landmark_name, location)
+    
+    def _facts_request(self, landmark_name: str, location: str = None) -> dict:
+        """Chat completion arguments for fact generation"""
+        prompt = f"""Provide factual information about: {landmark_name}
 {f'Location: {location}' if location else ''}
 
 Respond in this exact format:
@@ -65,30 +164,29 @@ UNESCO: [Yes/No]
 
 Keep responses factual and concise."""
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a factual encyclopedia providing verified historical information."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=300,
-                temperature=0.1
-            )
-            
-            content = response.choices[0].message.content.strip()
-            facts = self._parse_facts(content, landmark_name)
-            facts["summary"] = self._generate_neutral_summary(facts)
-            facts["sources"] = ["AI-generated from GPT-4o-mini", "Verification recommended"]
-            
-            return facts
-            
-        except Exception as e:
-            print(f"AI fact generation error: {e}")
-            return {
-                "name": landmark_name,
-                "location": location or "Unknown",
-                "error": "Could not generate facts"
-            }
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [
+                {"role": "system", "content": "You are a factual encyclopedia providing verified historical information."},
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 300,
+            "temperature": 0.1
+        }
+    
+    def _facts_from_response(self, response, landmark_name: str) -> dict:
+        content = response.choices[0].message.content.strip()
+        facts = self._parse_facts(content, landmark_name)
+        facts["summary"] = self._generate_neutral_summary(facts)
+        facts["sources"] = ["AI-generated from GPT-4o-mini", "Verification recommended"]
+        return facts
+    
+    def _failed_facts(self, landmark_name: str, location: str = None) -> dict:
+        return {
+            "name": landmark_name,
+            "location": location or "Unknown",
+            "error": "Could not generate facts"
+        }
     
     def _parse_facts(self, content: str, default_name: str) -> dict:
         """Parse AI-generated facts"""
@@ -3,102 +3,456 @@ LLM-Powered Cultural Interpretation Agent
 Uses OpenAI for dynamic interpretations with efficient prompting
 """
 import os
-from typing import Optional
+import json
+import asyncio
+import hashlib
+import threading
+from typing import Optional, AsyncIterator
+
+from services.cache import create_cache
+from services.http_pool import http_pool
+from services.resilience import upstreams
+from services.quota import quota, estimate_request_tokens, usage_tokens
+from agents.cultural_agent import CulturalAgent
+from services.single_flight import single_flight
+from services.metrics import timed
 
 
 class LLMCulturalAgent:
-    def __init__(self, provider="openai"):
+    def __init__(self, provider="openai", http=None):
         self.provider = provider
+        http = http or http_pool
         
         if provider == "openai":
-            from openai import OpenAI
+            from openai import OpenAI, AsyncOpenAI
             api_key = os.getenv("OPENAI_API_KEY")
             if not api_key:
                 raise ValueError("OPENAI_API_KEY not found in environment variables")
-            self.client = OpenAI(api_key=api_key)
+            self.client = OpenAI(api_key=api_key, http_client=http.client, max_retries=0)
+            self.async_client = AsyncOpenAI(api_key=api_key, http_client=http.async_client, max_retries=0)
             self.model = "gpt-4o-mini"  # Fast and cost-effective
         elif provider == "anthropic":
-            from anthropic import Anthropic
-            self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            from anthropic import Anthropic, AsyncAnthropic
+            self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"), http_client=http.client,
+                                    max_retries=0)
+            self.async_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"),
+                                               http_client=http.async_client, max_retries=0)
             self.model = "claude-3-5-sonnet-20241022"
         elif provider == "local":
             # Use Ollama or LM Studio
-            from openai import OpenAI
+            from openai import OpenAI, AsyncOpenAI
             self.client = OpenAI(
                 base_url="http://localhost:11434/v1",  # Ollama
-                api_key="ollama"
+                api_key="ollama",
+                http_client=http.client,
+                max_retries=0
+            )
+            self.async_client = AsyncOpenAI(
+                base_url="http://localhost:11434/v1",
+                api_key="ollama",
+                http_client=http.async_client,
+                max_retries=0
             )
             self.model = "llama3.2"
+        
+        # Deadlines/retries/circuit breaker per provider; curated text when it is down
+        self.upstream = upstreams.get(provider)
+        self.fallback = CulturalAgent()
+        
+        # Responses keyed on hash(provider, model, prompt). Past LLM_CACHE_TTL an entry is
+        # still served for LLM_CACHE_STALE_TTL while a fresh narrative is generated.
+        self.cache = create_cache(
+            "interpretations",
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "4096")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+            stale_ttl=float(os.getenv("LLM_CACHE_STALE_TTL", str(30 * 24 * 3600))),
+            backend=os.getenv("LLM_CACHE_BACKEND", "sqlite")
+        )
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._background_tasks = set()
     
+    @timed("llm_cultural.interpret")
     def interpret(self, object_id: str, lens: str, facts: dict) -> dict:
         """Generate culturally adaptive interpretation using LLM"""
         
         prompt = self._build_prompt(object_id, lens, facts)
+        key = self._cache_key(prompt)
+        
+        found = self.cache.lookup(key)
+        if found:
+            result, fresh = found
+            if not fresh:
+                self._refresh_in_background(key, lens, prompt)
+            return result
+        
+        try:
+            return single_flight.do(f"llm:{key}", lambda: self._generate(key, lens, prompt))
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            return self._fallback_result(object_id, lens, facts, e)
+    
+    @timed("llm_cultural.interpret")
+    async def interpret_async(self, object_id: str, lens: str, facts: dict) -> dict:
+        """Async variant of interpret using AsyncOpenAI / AsyncAnthropic"""
+        
+        prompt = self._build_prompt(object_id, lens, facts)
+        key = self._cache_key(prompt)
+        
+        found = self.cache.lookup(key)
+        if found:
+            result, fresh = found
+            if not fresh and self._claim_refresh(key):
+                task = asyncio.create_task(self._refresh_async(key, lens, prompt))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            return result
+        
+        try:
+            return await single_flight.do_async(f"llm:{key}", lambda: self._generate_async(key, lens, prompt))
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            return await asyncio.to_thread(self._fallback_result, object_id, lens, facts, e)
+    
+    async def interpret_stream(self, object_id: str, lens: str, facts: dict) -> AsyncIterator[tuple]:
+        """
+        Streaming variant of interpret_async: yields ("token", text) as the
+        provider produces the narrative, then ("interpretation", result) with the
+        finished (and now cached) result. Cache hits and fallbacks yield only the
+        final event; a failure mid-stream ends with the curated fallback, which
+        replaces any partial text the client has shown.
+        """
+        prompt = self._build_prompt(object_id, lens, facts)
+        key = self._cache_key(prompt)
+        
+        found = self.cache.lookup(key)
+        if found:
+            result, fresh = found
+            if not fresh and self._claim_refresh(key):
+                task = asyncio.create_task(self._refresh_async(key, lens, prompt))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            yield "interpretation", result
+            return
         
+        request, brief = self._request(prompt)
+        parts = []
+        billed = {}  # token counts the provider has reported so far: prompt, completion, total
         try:
+            with quota.metered(self.provider, self.model, "interpret_stream", estimate_request_tokens(request)) as meter:
+                stream = None
+                try:
+                    # Never hedge a stream: both copies would be billed in full
+                    if self.provider == "anthropic":
+                        stream = await self.upstream.call_async(
+                            lambda timeout: self.async_client.messages.create(**request, stream=True, timeout=timeout),
+                            hedge=False
+                        )
+                        async for event in stream:
+                            if event.type == "message_start":
+                                billed["prompt"] = event.message.usage.input_tokens
+                            elif event.type == "message_delta":
+                                billed["completion"] = event.usage.output_tokens
+                            elif event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                                parts.append(event.delta.text)
+                                yield "token", event.delta.text
+                    else:  # OpenAI or local
+                        if self.provider == "openai":
+                            request["stream_options"] = {"include_usage": True}
+                        stream = await self.upstream.call_async(
+                            lambda timeout: self.async_client.chat.completions.create(
+                                **request, stream=True, timeout=timeout
+                            ),
+                            hedge=False
+                        )
+                        async for chunk in stream:
+                            if getattr(chunk, "usage", None) is not None:
+                                billed["total"] = chunk.usage.total_tokens
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                parts.append(chunk.choices[0].delta.content)
+                                yield "token", chunk.choices[0].delta.content
+                finally:
+                    if stream is not None:
+                        # Completed, failed or abandoned by the client: charge what was
+                        # generated and hand the connection back to the pool
+                        meter.settle(self._stream_usage(request, parts, billed))
+                        await stream.close()
+            if not parts:
+                raise ValueError("provider stream ended without any text")
+        except Exception as e:
+            print(f"LLM stream error: {e}")
+            yield "interpretation", await asyncio.to_thread(self._fallback_result, object_id, lens, facts, e)
+            return
+        
+        yield "interpretation", self._finish(key, lens, "".join(parts), brief)
+    
+    @timed("llm_cultural.interpret_many")
+    async def interpret_many_async(self, object_id: str, lenses: list, facts: dict) -> dict:
+        """
+        Interpret several lenses in one provider round-trip. Each lens is cached
+        under the same key as interpret(), so single-lens requests hit it later
+        and only the lenses missing from the cache are generated.
+        """
+        lenses = list(dict.fromkeys(lenses))
+        results = {}
+        missing = {}  # lens -> cache key
+        
+        for lens in lenses:
+            prompt = self._build_prompt(object_id, lens, facts)
+            key = self._cache_key(prompt)
+            found = self.cache.lookup(key)
+            if found:
+                result, fresh = found
+                if not fresh and self._claim_refresh(key):
+                    task = asyncio.create_task(self._refresh_async(key, lens, prompt))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._background_tasks.discard)
+                results[lens] = result
+            else:
+                missing[lens] = key
+        
+        if len(missing) > 1:
+            batch_key = hashlib.sha256("\n".join(sorted(missing.values())).encode("utf-8")).hexdigest()
+            try:
+                results.update(await single_flight.do_async(
+                    f"llm:{batch_key}", lambda: self._generate_many_async(facts, missing)
+                ))
+            except Exception as e:
+                print(f"LLM batch error: {e}")
+        
+        # Single misses, and lenses the batch reply left out, go through the per-lens path
+        leftover = [lens for lens in missing if lens not in results]
+        narratives = await asyncio.gather(*(
+            self.interpret_async(object_id, lens, facts) for lens in leftover
+        ))
+        results.update(zip(leftover, narratives))
+        return {lens: results[lens] for lens in lenses}
+    
+    async def _generate_many_async(self, facts: dict, missing: dict) -> dict:
+        """One structured request for every missing lens; returns the lenses it could parse"""
+        lenses = list(missing)
+        request, brief = self._batch_request(facts, lenses)
+        with quota.metered(self.provider, self.model, "interpret_many", estimate_request_tokens(request)) as meter:
+            if self.provider == "anthropic":
+                response = await self.upstream.call_async(
+                    lambda timeout: self.async_client.messages.create(**request, timeout=timeout)
+                )
+                text = response.content[0].text
+            else:  # OpenAI or local
+                response = await self.upstream.call_async(
+                    lambda timeout: self.async_client.chat.completions.create(**request, timeout=timeout)
+                )
+                text = response.choices[0].message.content
+            meter.settle(usage_tokens(response))
+        
+        return {
+            lens: self._finish(missing[lens], lens, narrative, brief)
+            for lens, narrative in self._parse_batch(text, lenses).items()
+        }
+    
+    def _generate(self, key: str, lens: str, prompt: str) -> dict:
+        """Call the provider and cache the result"""
+        request, brief = self._request(prompt)
+        with quota.metered(self.provider, self.model, "interpret", estimate_request_tokens(request)) as meter:
+            if self.provider == "anthropic":
+                response = self.upstream.call(lambda timeout: self.client.messages.create(**request, timeout=timeout))
+                narrative = response.content[0].text
+            else:  # OpenAI or local
+                response = self.upstream.call(
+                    lambda timeout: self.client.chat.completions.create(**request, timeout=timeout)
+                )
+                narrative = response.choices[0].message.content
+            meter.settle(usage_tokens(response))
+        return self._finish(key, lens, narrative, brief)
+    
+    async def _generate_async(self, key: str, lens: str, prompt: str) -> dict:
+        request, brief = self._request(prompt)
+        with quota.metered(self.provider, self.model, "interpret", estimate_request_tokens(request)) as meter:
             if self.provider == "anthropic":
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=400,
-                    messages=[{"role": "user", "content": prompt}]
+                response = await self.upstream.call_async(
+                    lambda timeout: self.async_client.messages.create(**request, timeout=timeout)
                 )
                 narrative = response.content[0].text
             else:  # OpenAI or local
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are a culturally-aware heritage guide providing respectful, nuanced interpretations from diverse perspectives."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    temperature=0.7,
-                    max_tokens=400
+                response = await self.upstream.call_async(
+                    lambda timeout: self.async_client.chat.completions.create(**request, timeout=timeout)
                 )
                 narrative = response.choices[0].message.content
-            
-            return {
-                "perspective": self._get_perspective_name(lens),
-                "narrative": narrative.strip(),
-                "emotional_context": self._extract_emotion(narrative),
-                "generated_by": f"{self.provider}/{self.model}"
-            }
+            meter.settle(usage_tokens(response))
+        return self._finish(key, lens, narrative, brief)
+    
+    def _request(self, prompt: str):
+        """Provider request, shortened while the provider's token budget is running low"""
+        brief = quota.low(self.provider)
+        if brief:
+            prompt += "\n\nAnswer in at most two sentences."
+        max_tokens = 120 if brief else 400
+        if self.provider == "anthropic":
+            return self._anthropic_request(prompt, max_tokens), brief
+        return self._openai_request(prompt, max_tokens), brief
+    
+    def _batch_request(self, facts: dict, lenses: list):
+        """Like _request, with the output budget scaled by the number of lenses"""
+        brief = quota.low(self.provider)
+        prompt = self._build_batch_prompt(facts, lenses)
+        if brief:
+            prompt += "\n\nAnswer each lens in at most two sentences."
+        max_tokens = (120 if brief else 400) * len(lenses)
+        if self.provider == "anthropic":
+            return self._anthropic_request(prompt, max_tokens), brief
+        request = self._openai_request(prompt, max_tokens)
+        if self.provider == "openai":
+            request["response_format"] = {"type": "json_object"}
+        return request, brief
+    
+    def _parse_batch(self, text: str, lenses: list) -> dict:
+        """lens -> narrative from the model's JSON reply; unusable entries are dropped"""
+        start, end = text.find("{"), text.rfind("}")
+        try:
+            data = json.loads(text[start:end + 1]) if start != -1 else {}
+        except ValueError:
+            print(f"LLM batch reply is not JSON: {text[:80]!r}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return {
+            lens: data[lens] for lens in lenses
+            if isinstance(data.get(lens), str) and data[lens].strip()
+        }
+    
+    def _stream_usage(self, request: dict, parts: list, billed: dict) -> int:
+        """Tokens billed for a stream, finished or cut short: the provider's counts, else prompt + text so far"""
+        if "total" in billed:
+            return billed["total"]
+        prompt = billed.get("prompt", estimate_request_tokens(request) - int(request.get("max_tokens") or 500))
+        return prompt + billed.get("completion", sum(len(part) for part in parts) // 4)
+    
+    def _finish(self, key: str, lens: str, narrative: str, brief: bool) -> dict:
+        result = self._build_result(lens, narrative)
+        if brief:
+            # Not cached: the full narrative is generated once the budget recovers
+            result["brief"] = True
+        else:
+            self.cache.set(key, result)
+        return result
+    
+    def _cache_key(self, prompt: str) -> str:
+        """The prompt fully determines the narrative for a given provider/model"""
+        raw = f"{self.provider}\n{self.model}\n{prompt}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def _claim_refresh(self, key: str) -> bool:
+        """Only one background refresh per stale key at a time"""
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+    
+    def _refresh_in_background(self, key: str, lens: str, prompt: str) -> None:
+        """Stale-while-revalidate: serve the cached narrative, regenerate in a thread"""
+        if not self._claim_refresh(key):
+            return
+        
+        def refresh():
+            try:
+                self._generate(key, lens, prompt)
+            except Exception as e:
+                print(f"LLM background refresh error: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    async def _refresh_async(self, key: str, lens: str, prompt: str) -> None:
+        try:
+            await self._generate_async(key, lens, prompt)
         except Exception as e:
-            print(f"LLM Error: {e}")
-            return {
-                "perspective": self._get_perspective_name(lens),
-                "narrative": f"Error generating interpretation: {str(e)}",
-                "emotional_context": "Error",
-                "generated_by": f"{self.provider}/error"
-            }
+            print(f"LLM background refresh error: {e}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing.discard(key)
+    
+    def _anthropic_request(self, prompt: str, max_tokens: int = 400) -> dict:
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+    
+    def _openai_request(self, prompt: str, max_tokens: int = 400) -> dict:
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a culturally-aware heritage guide providing respectful, nuanced interpretations from diverse perspectives."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.7,
+            "max_tokens": max_tokens
+        }
+    
+    def _build_result(self, lens: str, narrative: str) -> dict:
+        return {
+            "perspective": self._get_perspective_name(lens),
+            "narrative": narrative.strip(),
+            "emotional_context": self._extract_emotion(narrative),
+            "generated_by": f"{self.provider}/{self.model}"
+        }
+    
+    def _fallback_result(self, object_id: str, lens: str, facts: dict, error: Exception) -> dict:
+        """Provider failed or its circuit is open: serve the curated interpretation instead"""
+        result = dict(self.fallback.interpret(object_id, lens, facts))
+        result["generated_by"] = "curated/fallback"
+        result["fallback_reason"] = str(error)
+        return result
+    
+    LENS_INSTRUCTIONS = {
+        "local": "Local community: national identity, lived experiences, contemporary relevance, how locals relate to this heritage today.",
+        "asian": "Asian perspective: regional context, historical connections across Asia, aesthetic traditions, shared heritage.",
+        "european": "European view: architectural analysis, historical parallels, how European scholars interpret this site.",
+        "indigenous": "Indigenous lens: pre-colonial perspectives, displaced communities, land history, overlooked narratives.",
+        "neutral": "Academic/neutral: verified historical facts without cultural bias."
+    }
+    
+    WRITING_BRIEF = "Be respectful, avoid stereotypes, acknowledge emotional significance."
     
     def _build_prompt(self, object_id: str, lens: str, facts: dict) -> str:
         """Build culturally-aware prompt with efficient token usage"""
-        
-        lens_instructions = {
-            "local": "Local community: national identity, lived experiences, contemporary relevance, how locals relate to this heritage today.",
-            "asian": "Asian perspective: regional context, historical connections across Asia, aesthetic traditions, shared heritage.",
-            "european": "European view: architectural analysis, historical parallels, how European scholars interpret this site.",
-            "indigenous": "Indigenous lens: pre-colonial perspectives, displaced communities, land history, overlooked narratives.",
-            "neutral": "Academic/neutral: verified historical facts without cultural bias."
-        }
-        
-        instruction = lens_instructions.get(lens, lens_instructions["neutral"])
+        instruction = self.LENS_INSTRUCTIONS.get(lens, self.LENS_INSTRUCTIONS["neutral"])
         
         # Efficient prompt - minimal tokens, clear instructions
-        return f"""Heritage site: {facts.get('name')}
-Location: {facts.get('location')}
-Built: {facts.get('built')}
-Context: {facts.get('purpose')}
+        return f"""{self._facts_block(facts)}
 
 Lens: {lens.upper()}
 Focus: {instruction}
 
-Write 3-4 sentences providing meaningful cultural context beyond basic facts. Be respectful, avoid stereotypes, acknowledge emotional significance."""
+Write 3-4 sentences providing meaningful cultural context beyond basic facts. {self.WRITING_BRIEF}"""
+    
+    def _build_batch_prompt(self, facts: dict, lenses: list) -> str:
+        """One prompt for several lenses: the shared facts are sent once"""
+        focus = "\n".join(
+            f"- {lens}: {self.LENS_INSTRUCTIONS.get(lens, self.LENS_INSTRUCTIONS['neutral'])}" for lens in lenses
+        )
+        example = ", ".join(f'"{lens}": "..."' for lens in lenses)
+        return f"""{self._facts_block(facts)}
+
+For each lens below, write 3-4 sentences providing meaningful cultural context beyond basic facts. {self.WRITING_BRIEF}
+{focus}
+
+Reply with only a JSON object mapping each lens to its text: {{{example}}}"""
+    
+    def _facts_block(self, facts: dict) -> str:
+        return f"""Heritage site: {facts.get('name')}
+Location: {facts.get('location')}
+Built: {facts.get('built')}
+Context: {facts.get('purpose')}"""
     
     def _get_perspective_name(self, lens: str) -> str:
         names = {
@@ -132,3 +486,6 @@ Write 3-4 sentences providing meaningful cultural context beyond basic facts. Be
     def get_available_lenses(self, object_id: str) -> list:
         """All lenses available with LLM"""
         return ["local", "asian", "european", "indigenous"]
+    
+    async def get_available_lenses_async(self, object_id: str) -> list:
+        return self.get_available_lenses(object_id)
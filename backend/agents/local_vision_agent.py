@@ -0,0 +1,165 @@
+"""
+Local Vision Agent - on-CPU first-tier landmark recognizer
+Nearest-neighbour search over classical image descriptors of catalogue
+reference photos; only confident matches are answered locally, everything
+else falls through to the cloud VisionAgent
+
+Disabled unless LOCAL_VISION_ENABLED=true: the threshold and margin have not
+been validated yet. Measure them first with benchmarks/bench_local_vision.py
+against held-out photos of the landmarks in data/reference_images/.
+"""
+import io
+import os
+import json
+import math
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it the local tier is disabled
+    Image = None
+
+from services.metrics import timed
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+class LocalVisionAgent:
+    def __init__(self, reference_dir: Path = None, enabled: bool = None):
+        data_dir = Path(__file__).parent.parent / "data"
+        self.reference_dir = Path(reference_dir or os.getenv(
+            "LOCAL_VISION_REFERENCE_DIR", data_dir / "reference_images"
+        ))
+        self.threshold = float(os.getenv("LOCAL_VISION_THRESHOLD", "0.92"))
+        self.margin = float(os.getenv("LOCAL_VISION_MARGIN", "0.03"))
+        self.k = int(os.getenv("LOCAL_VISION_K", "3"))
+
+        try:
+            with open(data_dir / "landmarks.json", 'r', encoding='utf-8') as f:
+                self.landmarks = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.landmarks = {}
+
+        # [(object_id, feature_vector)] for every reference image
+        self.index = []
+        self.enabled = enabled if enabled is not None else (
+            os.getenv("LOCAL_VISION_ENABLED", "false").lower() == "true"
+        )
+        if not self.enabled:
+            print("ℹ️  Local vision tier disabled (LOCAL_VISION_ENABLED=false)")
+            return
+        if Image is None:
+            print("⚠️  Pillow not installed, local vision tier disabled")
+            return
+
+        started = time.perf_counter()
+        if self.reference_dir.is_dir():
+            for landmark_dir in sorted(p for p in self.reference_dir.iterdir() if p.is_dir()):
+                for image_path in sorted(landmark_dir.iterdir()):
+                    if image_path.suffix.lower() not in IMAGE_EXTENSIONS:
+                        continue
+                    try:
+                        self.index.append((landmark_dir.name, self._features(image_path.read_bytes())))
+                    except Exception as e:
+                        print(f"⚠️  Skipping reference image {image_path}: {e}")
+
+        if self.index:
+            landmarks = len({object_id for object_id, _ in self.index})
+            print(f"✅ Local vision index: {len(self.index)} reference images, {landmarks} landmarks "
+                  f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+    @property
+    def available(self) -> bool:
+        return bool(self.index)
+
+    @timed("local_vision.recognize")
+    def recognize(self, image_bytes: bytes) -> Optional[dict]:
+        """
+        Return a VisionAgent-shaped result for a confident local match,
+        or None to fall back to the cloud
+        """
+        if not self.index:
+            return None
+
+        started = time.perf_counter()
+        try:
+            query = self._features(image_bytes)
+        except Exception as e:
+            print(f"⚠️  Local vision could not decode image: {e}")
+            return None
+
+        ranking = self.rank(query)
+        best_id, best_score = ranking[0]
+        runner_up = ranking[1][1] if len(ranking) > 1 else 0.0
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        if best_score < self.threshold or best_score - runner_up < self.margin:
+            print(f"↪️  Local vision unsure ({best_id}: {best_score:.3f}), falling back to cloud")
+            return None
+
+        facts = self.landmarks.get(best_id, {})
+        print(f"⚡ Local vision match: {best_id} ({best_score:.3f}, {elapsed_ms} ms)")
+        return {
+            "object_id": best_id,
+            "detected_name": facts.get("name", best_id.replace("_", " ").title()),
+            "location": facts.get("location", "Unknown"),
+            "description": "Matched against catalogue reference images on the server",
+            "confidence": None,  # cosine similarity is not a calibrated probability
+            "similarity": round(best_score, 3),
+            "processing": "edge_vision",
+            "model": "local-knn",
+            "latency_ms": elapsed_ms
+        }
+
+    def rank(self, query: list) -> list:
+        """Landmarks ordered by the mean similarity of their k nearest reference images"""
+        per_landmark = {}
+        for object_id, features in self.index:
+            per_landmark.setdefault(object_id, []).append(self._cosine(query, features))
+
+        scores = []
+        for object_id, sims in per_landmark.items():
+            top = sorted(sims, reverse=True)[:self.k]
+            scores.append((object_id, sum(top) / len(top)))
+        return sorted(scores, key=lambda item: item[1], reverse=True)
+
+    def score_for(self, image_bytes: bytes, object_id: str) -> Optional[float]:
+        """Similarity of an image to one landmark's references (None if it has none)"""
+        if not any(oid == object_id for oid, _ in self.index):
+            return None
+        try:
+            query = self._features(image_bytes)
+        except Exception:
+            return None
+        return dict(self.rank(query)).get(object_id)
+
+    def _features(self, image_bytes: bytes) -> list:
+        """
+        Unit-length descriptor: 16x16 mean-centred grayscale layout (structure)
+        concatenated with a 4x4x4 RGB colour histogram (palette)
+        """
+        img = Image.open(io.BytesIO(image_bytes))
+        img.draft("RGB", (128, 128))  # JPEG: decode at 1/8 scale
+        img = img.convert("RGB")
+
+        gray = list(img.convert("L").resize((16, 16), Image.BILINEAR).getdata())
+        mean = sum(gray) / len(gray)
+        layout = [g - mean for g in gray]
+
+        histogram = [0.0] * 64
+        small = img.resize((32, 32), Image.BILINEAR)
+        for r, g, b in small.getdata():
+            histogram[(r >> 6) * 16 + (g >> 6) * 4 + (b >> 6)] += 1
+
+        layout = self._normalize(layout)
+        histogram = self._normalize(histogram)
+        return self._normalize(layout + histogram)
+
+    def _normalize(self, vector: list) -> list:
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def _cosine(self, a: list, b: list) -> float:
+        return sum(x * y for x, y in zip(a, b))
@@ -2,42 +2,298 @@
 Vision Agent - Real Image Recognition using OpenAI Vision API
 """
 import os
+import json
+import time
 import base64
-from openai import OpenAI
+import asyncio
+from pathlib import Path
+
+from services.cache import create_cache
+from services.http_pool import http_pool
+from services.resilience import upstreams
+from services.quota import quota, estimate_request_tokens, usage_tokens
+from services.image_cache import VisionCache, fingerprint
+from services.single_flight import single_flight
+from services.image_preprocess import prepare_image, read_source, DEFAULT_MAX_EDGE
+from services.metrics import timed
 
 
 class VisionAgent:
-    def __init__(self):
+    def __init__(self, geo_index=None, local_vision=None, http=None):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
-        self.client = OpenAI(api_key=api_key)
+        from openai import OpenAI, AsyncOpenAI
+        http = http or http_pool
+        # Retries are owned by the shared resilience layer, not the SDK
+        self.client = OpenAI(api_key=api_key, http_client=http.client, max_retries=0)
+        self.async_client = AsyncOpenAI(api_key=api_key, http_client=http.async_client, max_retries=0)
+        self.upstream = upstreams.get("openai")
+        
+        # Bound concurrent upstream vision calls per worker; each call gets a deadline
+        self.semaphore = asyncio.Semaphore(int(os.getenv("VISION_MAX_CONCURRENCY", "16")))
+        self.timeout = float(os.getenv("VISION_TIMEOUT", "30"))
+        
+        # Downscale/re-encode uploads before they go to GPT-4o
+        self.max_edge = int(os.getenv("VISION_MAX_EDGE", str(DEFAULT_MAX_EDGE)))
+        self.image_quality = int(os.getenv("VISION_IMAGE_QUALITY", "85"))
+        self.image_format = os.getenv("VISION_IMAGE_FORMAT", "JPEG")
+        self.detail = os.getenv("VISION_DETAIL", "auto")  # auto, low or high
+        
+        # Content-addressed result cache (exact digest + perceptual hash)
+        backend = create_cache(
+            "vision",
+            max_entries=int(os.getenv("VISION_CACHE_MAX_ENTRIES", "2048")),
+            ttl=float(os.getenv("VISION_CACHE_TTL", "86400")),
+            backend=os.getenv("VISION_CACHE_BACKEND")
+        )
+        self.cache = VisionCache(backend, max_distance=int(os.getenv("VISION_CACHE_MAX_DISTANCE", "6")))
+        
+        # Device GPS narrows recognition to catalogued landmarks within this radius
+        self.geo_index = geo_index
+        self.local_vision = local_vision
+        self.gps_radius_km = float(os.getenv("VISION_GPS_RADIUS_KM", "1.0"))
+        self.gps_consistency = float(os.getenv("VISION_GPS_CONSISTENCY", "0.75"))
+        # Reported for a GPS match: the only landmark nearby and the image agrees with its references
+        self.gps_match_confidence = float(os.getenv("VISION_GPS_MATCH_CONFIDENCE", "0.9"))
+        self.constrained_model = os.getenv("VISION_CONSTRAINED_MODEL", "gpt-4o-mini")
+        
+        data_path = Path(__file__).parent.parent / "data" / "landmarks.json"
+        try:
+            with open(data_path, 'r', encoding='utf-8') as f:
+                self.landmarks = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.landmarks = {}
+    
+    @timed("vision.recognize")
+    def recognize(self, image) -> dict:
+        """
+        Recognize a landmark, serving near-identical photos from the cache
+        """
+        fp = fingerprint(image)
+        cached = self.cache.lookup(fp)
+        if cached:
+            print(f"⚡ Vision cache hit ({cached['cache']['match']}): {cached.get('detected_name')}")
+            return cached
+        
+        # Identical uploads in flight at the same time share one GPT-4o call
+        return single_flight.do(f"vision:{fp.digest}", lambda: self._recognize_and_store(fp, image))
+    
+    async def lookup_cached(self, image):
+        """Fingerprint an image off the event loop; returns (fingerprint, cached result or None)"""
+        fp = await asyncio.to_thread(fingerprint, image)
+        return fp, self.cache.lookup(fp)
+    
+    @timed("vision.recognize")
+    async def recognize_async(self, image, fp=None, location: tuple = None) -> dict:
+        """
+        Async recognition - bounded by a concurrency semaphore and a per-request
+        timeout so vision calls never block the event loop.
+        image: raw bytes or a seekable file (the upload's spooled file), read in
+        chunks and decoded at reduced scale so a large upload never sits in memory
+        location: optional (lat, lon) from the device to shortcut recognition
+        """
+        if fp is None:
+            fp = await asyncio.to_thread(fingerprint, image)
+        cached = self.cache.lookup(fp)
+        if cached:
+            print(f"⚡ Vision cache hit ({cached['cache']['match']}): {cached.get('detected_name')}")
+            return cached
+        
+        key = f"vision:{fp.digest}"
+        if location and self.geo_index is not None:
+            # The answer may be picked from nearby landmarks: only share it within one location cell
+            key += f":{round(location[0], 2)},{round(location[1], 2)}"
+        return await single_flight.do_async(key, lambda: self._recognize_and_store_async(fp, image, location))
+    
+    def _recognize_and_store(self, fp, image) -> dict:
+        result = self._recognize_uncached(image)
+        self._store(fp, result)
+        return result
+    
+    async def _recognize_and_store_async(self, fp, image, location: tuple = None) -> dict:
+        if location and self.geo_index is not None:
+            result = await self._recognize_near(image, location)
+            if result is not None:
+                # Depends on where the photo was taken, so never served to other callers from the cache
+                return result
+        result = await self._recognize_uncached_async(image)
+        self._store(fp, result)
+        return result
+    
+    async def _recognize_near(self, image, location: tuple):
+        """
+        Use catalogued landmarks near the device to avoid the open-ended prompt:
+        - one candidate whose reference photos agree with the image: answer directly
+        - otherwise ask a cheap model to pick from the candidate list
+        Returns None when location does not help (no candidates / no pick).
+        """
+        lat, lon = location
+        candidates = [point for _, point in self.geo_index.nearby(lat, lon, self.gps_radius_km, k=5)]
+        if not candidates:
+            return None
+        
+        if len(candidates) == 1 and self.local_vision is not None:
+            only = candidates[0]
+            score = await asyncio.to_thread(lambda: self.local_vision.score_for(read_source(image), only.id))
+            if score is not None and score >= self.gps_consistency:
+                print(f"📍 GPS match: {only.id} is the only landmark nearby (image score {score:.3f})")
+                result = self._candidate_result(only, self.gps_match_confidence, "gps_match", "geo+local-knn")
+                result["similarity"] = round(score, 3)
+                return result
+        
+        try:
+            async with self.semaphore:
+                request = await asyncio.to_thread(self._constrained_request, image, candidates)
+                with quota.metered("openai", request["model"], "vision_constrained",
+                                   estimate_request_tokens(request)) as meter:
+                    response = await self.upstream.call_async(
+                        lambda timeout: self.async_client.chat.completions.create(**request, timeout=timeout),
+                        deadline=self.timeout
+                    )
+                    meter.settle(usage_tokens(response))
+            answer = response.choices[0].message.content.strip()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️  Constrained vision call failed, using full prompt: {e}")
+            return None
+        
+        digits = "".join(ch for ch in answer if ch.isdigit())
+        choice = int(digits) if digits else 0
+        if not 1 <= choice <= len(candidates):
+            print(f"📍 None of {len(candidates)} nearby landmarks matched, using full prompt")
+            return None
+        
+        picked = candidates[choice - 1]
+        print(f"📍 GPS-constrained match: {picked.id} (from {len(candidates)} candidates)")
+        return self._candidate_result(picked, 0.85, "cloud_vision_constrained", self.constrained_model)
+    
+    def _constrained_request(self, image, candidates: list) -> dict:
+        """Short multiple-choice prompt with a low-detail image"""
+        data, mime, _, _ = self._prepare(image, max_edge=512, detail="low")
+        base64_image = base64.b64encode(data).decode('utf-8')
+        options = "\n".join(f"{i}. {point.data.get('name', point.id)}" for i, point in enumerate(candidates, 1))
+        return {
+            "model": self.constrained_model,
+            "messages": [{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": f"This photo was taken near:\n{options}\nReply with only the number of the landmark shown, or 0 if none."},
+                    {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{base64_image}", "detail": "low"}}
+                ]
+            }],
+            "max_tokens": 3,
+            "temperature": 0.0
+        }
+    
+    def _candidate_result(self, point, confidence: float, processing: str, model: str) -> dict:
+        facts = self.landmarks.get(point.id, {})
+        name = facts.get("name") or point.data.get("name", point.id)
+        return {
+            "object_id": point.id,
+            "detected_name": name,
+            "location": facts.get("location") or point.data.get("country", "Unknown"),
+            "description": f"Identified {name} using the device location",
+            "confidence": confidence,
+            "processing": processing,
+            "model": model
+        }
+    
+    def _store(self, fp, result: dict) -> None:
+        # Preprocessing savings describe this request only, not later cache hits
+        self.cache.store(fp, {k: v for k, v in result.items() if k != "preprocessing"})
     
-    def recognize(self, image_bytes: bytes) -> dict:
+    def _recognize_uncached(self, image) -> dict:
         """
         Real image recognition using OpenAI Vision API (GPT-4o)
         """
         try:
-            print(f"🔍 Analyzing image ({len(image_bytes)} bytes)...")
-            
-            # Encode image to base64
-            base64_image = base64.b64encode(image_bytes).decode('utf-8')
             
             # Call OpenAI Vision API with GPT-4o (best vision model)
             print("📡 Calling GPT-4o Vision API...")
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # Full vision model, not mini
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at identifying famous landmarks, monuments, and cultural heritage sites from photographs. Be precise and accurate."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": """Look carefully at this image and identify the specific landmark, monument, or cultural heritage site shown.
+            request, report = self._vision_request(image)
+            started = time.perf_counter()
+            with quota.metered("openai", request["model"], "vision", estimate_request_tokens(request)) as meter:
+                response = self.upstream.call(
+                    lambda timeout: self.client.chat.completions.create(**request, timeout=timeout),
+                    deadline=self.timeout
+                )
+                meter.settle(usage_tokens(response))
+            report["upstream_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return self._result_from_response(response, report)
+            
+        except Exception as e:
+            print(f"❌ Vision API Error: {e}")
+            return self._error_result(e)
+    
+    async def _recognize_uncached_async(self, image) -> dict:
+        """Async variant of _recognize_uncached"""
+        try:
+            async with self.semaphore:
+                request, report = await asyncio.to_thread(self._vision_request, image)
+                started = time.perf_counter()
+                with quota.metered("openai", request["model"], "vision", estimate_request_tokens(request)) as meter:
+                    response = await self.upstream.call_async(
+                        lambda timeout: self.async_client.chat.completions.create(**request, timeout=timeout),
+                        deadline=self.timeout
+                    )
+                    meter.settle(usage_tokens(response))
+                report["upstream_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            return self._result_from_response(response, report)
+        
+        except (asyncio.TimeoutError, TimeoutError):
+            print(f"❌ Vision API timed out after {self.timeout}s")
+            return self._error_result(f"timed out after {self.timeout}s")
+        except asyncio.CancelledError:
+            print("⚠️  Vision request cancelled (client disconnected)")
+            raise
+        except Exception as e:
+            print(f"❌ Vision API Error: {e}")
+            return self._error_result(e)
+    
+    def _prepare(self, image, max_edge: int = None, detail: str = None):
+        """Resize/re-encode the upload; fall back to the raw bytes if it cannot be decoded"""
+        started = time.perf_counter()
+        detail = detail or self.detail
+        try:
+            prepared = prepare_image(
+                image,
+                max_edge=max_edge or self.max_edge,
+                quality=self.image_quality,
+                fmt=self.image_format,
+                detail=detail
+            )
+            data, mime, detail, report = prepared
+        except Exception as e:
+            print(f"⚠️  Image preprocessing failed, sending original: {e}")
+            data = read_source(image)
+            mime, detail = "image/jpeg", "high" if detail == "auto" else detail
+            report = {"preprocessed": False, "original_bytes": len(data), "sent_bytes": len(data)}
+        report["preprocess_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        print(f"🗜️  Image {report['original_bytes']} -> {report['sent_bytes']} bytes (detail: {detail})")
+        return data, mime, detail, report
+    
+    def _vision_request(self, image):
+        """Chat completion arguments for landmark identification, plus the preprocessing report"""
+        data, mime, detail, report = self._prepare(image)
+        
+        # Encode image to base64
+        base64_image = base64.b64encode(data).decode('utf-8')
+        
+        return {
+            "model": "gpt-4o",  # Full vision model, not mini
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert at identifying famous landmarks, monuments, and cultural heritage sites from photographs. Be precise and accurate."
+                },
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": """Look carefully at this image and identify the specific landmark, monument, or cultural heritage site shown.
 
 Respond in this EXACT format:
 NAME: [Official name of the landmark]
@@ -51,51 +307,60 @@ Examples:
 - If you see the Taj Mahal: "NAME: Taj Mahal"
 
 Be specific and accurate. If you cannot identify it, respond with NAME: Unknown"""
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{base64_image}",
-                                    "detail": "high"  # High detail for better recognition
-                                }
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": f"data:{mime};base64,{base64_image}",
+                                "detail": detail  # "low" when the downscaled image fits one 512px tile
                             }
-                        ]
-                    }
-                ],
-                max_tokens=300,
-                temperature=0.0  # Zero temperature for most consistent identification
-            )
-            
-            # Parse response
-            content = response.choices[0].message.content.strip()
-            print(f"🤖 GPT-4o Response:\n{content}\n")
-            
-            parsed = self._parse_response(content)
-            print(f"✅ Identified: {parsed['name']} (Confidence: {parsed['confidence']})")
-            
-            if parsed["name"].lower() == "unknown" or parsed["confidence"] == "Low":
-                return {
-                    "error": "Could not identify a known landmark in this image",
-                    "detected": parsed["description"],
-                    "confidence": 0.0
+                        }
+                    ]
                 }
-            
-            return {
-                "object_id": self._normalize_name(parsed["name"]),
-                "detected_name": parsed["name"],
-                "location": parsed["location"],
-                "description": parsed["description"],
-                "confidence": self._confidence_to_score(parsed["confidence"]),
-                "processing": "cloud_vision",
-                "model": "gpt-4o"
-            }
-            
-        except Exception as e:
-            print(f"❌ Vision API Error: {e}")
+            ],
+            "max_tokens": 300,
+            "temperature": 0.0  # Zero temperature for most consistent identification
+        }, report
+    
+    def _result_from_response(self, response, report: dict = None) -> dict:
+        """Parse the completion into the /analyze/image response shape"""
+        content = response.choices[0].message.content.strip()
+        print(f"🤖 GPT-4o Response:\n{content}\n")
+        
+        parsed = self._parse_response(content)
+        print(f"✅ Identified: {parsed['name']} (Confidence: {parsed['confidence']})")
+        
+        if parsed["name"].lower() == "unknown" or parsed["confidence"] == "Low":
             return {
-                "error": f"Image recognition failed: {str(e)}",
+                "error": "Could not identify a known landmark in this image",
+                "detected": parsed["description"],
                 "confidence": 0.0
             }
+        
+        return {
+            "object_id": self._normalize_name(parsed["name"]),
+            "detected_name": parsed["name"],
+            "location": parsed["location"],
+            "description": parsed["description"],
+            "confidence": self._confidence_to_score(parsed["confidence"]),
+            "processing": "cloud_vision",
+            "model": "gpt-4o",
+            "preprocessing": self._with_usage(report, response)
+        }
+    
+    def _with_usage(self, report: dict, response) -> dict:
+        """Attach the provider-reported prompt tokens to the preprocessing report"""
+        report = dict(report or {})
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            report["prompt_tokens"] = usage.prompt_tokens
+        return report
+    
+    def _error_result(self, error) -> dict:
+        return {
+            "error": f"Image recognition failed: {str(error)}",
+            "confidence": 0.0
+        }
     
     def _parse_response(self, content: str) -> dict:
         """Parse structured response from GPT-4o"""
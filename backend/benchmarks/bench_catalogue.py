@@ -0,0 +1,153 @@
+"""
+Benchmark: startup time and RSS of the catalogue store vs. loading JSON dicts
+
+For catalogues of 13, 10^3, 10^5 and 10^6 synthetic landmarks (facts and bias
+records shaped like data/*.json) it starts a fresh interpreter per measurement
+and reports time to first record, peak RSS, and mean lookup latency over
+random ids. The JSON baseline is what the agents did before the catalogue:
+json.load every file at startup. It is skipped above --json-max records.
+
+Usage: python -m benchmarks.bench_catalogue [--sizes 13 1000 100000 1000000] [--lookups 20000]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+SIZES = (13, 1_000, 100_000, 1_000_000)
+STYLES = ("Mughal architecture", "Gothic", "Roman", "Khmer", "Neoclassical", "Art Deco")
+SOURCES = ("western_academic", "local_oral", "colonial_archives", "national_institutions")
+
+
+def landmark(i: int, rng: random.Random) -> dict:
+    return {
+        "name": f"Landmark {i}",
+        "location": f"City {i % 5000}, Country {i % 190}",
+        "built": f"{rng.randint(100, 1990)}",
+        "builder": f"Builder {i % 977}",
+        "purpose": "Place of worship and civic gathering for the surrounding region",
+        "style": rng.choice(STYLES),
+        "material": "Stone, timber and lime mortar",
+        "significance": f"UNESCO World Heritage Site, symbol of regional identity #{i}",
+        "visitors_per_year": f"{rng.randint(1, 80) * 100_000:,}"
+    }
+
+
+def bias(i: int, rng: random.Random) -> dict:
+    weights = [rng.random() for _ in SOURCES]
+    return {
+        "source_dominance": {s: round(w / sum(weights), 2) for s, w in zip(SOURCES, weights)},
+        "missing_perspectives": ["Local artisans", "Displaced communities"],
+        "power_imbalances": "Dominant narratives come from institutional sources",
+        "representation_gaps": "Oral histories are under-documented"
+    }
+
+
+def build(workdir: Path, size: int, json_max: int) -> float:
+    """Write catalogue.db (and the JSON baseline files when small enough); seconds taken"""
+    from services.catalogue import Catalogue
+
+    rng = random.Random(size)
+    started = time.perf_counter()
+    catalogue = Catalogue(workdir / "catalogue.db", auto_import=False)
+    catalogue.put_many("landmark", ((f"lm_{i}", landmark(i, rng)) for i in range(size)))
+    catalogue.put_many("bias", ((f"lm_{i}", bias(i, rng)) for i in range(size)))
+    catalogue.close()
+    elapsed = time.perf_counter() - started
+
+    if size <= json_max:
+        rng = random.Random(size)
+        landmarks = {f"lm_{i}": landmark(i, rng) for i in range(size)}
+        biases = {f"lm_{i}": bias(i, rng) for i in range(size)}
+        (workdir / "landmarks.json").write_text(json.dumps(landmarks))
+        (workdir / "bias_data.json").write_text(json.dumps(biases))
+    return elapsed
+
+
+def memory_mb(field: str) -> float:
+    """VmRSS / VmHWM of this process (ru_maxrss would include the parent's peak before exec)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def probe(workdir: Path, mode: str, size: int, lookups: int) -> dict:
+    """Runs in a fresh interpreter: startup, then random lookups"""
+    started = time.perf_counter()
+    if mode == "catalogue":
+        from services.catalogue import Catalogue
+        catalogue = Catalogue(workdir / "catalogue.db", data_dir=workdir / "none")
+        get = catalogue.get
+    else:
+        tables = {}
+        for kind, filename in (("landmark", "landmarks.json"), ("bias", "bias_data.json")):
+            with open(workdir / filename, "r", encoding="utf-8") as f:
+                tables[kind] = json.load(f)
+        get = lambda kind, id: tables[kind].get(id)
+    assert get("landmark", "lm_0")["name"] == "Landmark 0"
+    startup = time.perf_counter() - started
+    rss_startup = memory_mb("VmRSS")
+
+    # Zipf-ish traffic: most requests go to a few popular landmarks
+    rng = random.Random(7)
+    ids = [f"lm_{min(size - 1, int(rng.paretovariate(1.2)) - 1)}" for _ in range(lookups)]
+    started = time.perf_counter()
+    for id in ids:
+        get("landmark", id)
+        get("bias", id)
+    lookup_us = (time.perf_counter() - started) / (2 * lookups) * 1e6
+    rss_peak = memory_mb("VmHWM")
+    return {"startup_ms": startup * 1000, "rss_startup_mb": rss_startup, "rss_peak_mb": rss_peak,
+            "lookup_us": lookup_us}
+
+
+def run_probe(workdir: Path, mode: str, size: int, lookups: int) -> dict:
+    backend = Path(__file__).parent.parent
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_catalogue", "--probe", str(workdir), mode, str(size), str(lookups)],
+        cwd=backend, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalogue store startup/RSS benchmark")
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SIZES))
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--json-max", type=int, default=100_000, help="largest size for the JSON baseline")
+    parser.add_argument("--probe", nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        workdir, mode, size, lookups = args.probe
+        print(json.dumps(probe(Path(workdir), mode, int(size), int(lookups))))
+        return
+
+    print(f"📊 Catalogue store vs. JSON dicts, {args.lookups} Zipf lookups (facts + bias per request)")
+    print("=" * 86)
+    print(f"{'records':>10} {'mode':>10} {'build s':>8} {'db MB':>7} {'startup ms':>11} "
+          f"{'RSS boot MB':>12} {'RSS peak MB':>12} {'µs/lookup':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            build_s = build(workdir, size, args.json_max)
+            db_mb = os.path.getsize(workdir / "catalogue.db") / 2 ** 20
+            for mode in ("catalogue", "json"):
+                if mode == "json" and size > args.json_max:
+                    print(f"{size:>10,} {mode:>10} {'':>8} {'':>7} {'(skipped)':>11}")
+                    continue
+                r = run_probe(workdir, mode, size, args.lookups)
+                built = f"{build_s:>8.1f} {db_mb:>7.1f}" if mode == "catalogue" else f"{'':>8} {'':>7}"
+                print(f"{size:>10,} {mode:>10} {built} {r['startup_ms']:>11.1f} "
+                      f"{r['rss_startup_mb']:>12.1f} {r['rss_peak_mb']:>12.1f} {r['lookup_us']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: GeoIndex radius, k-nearest and bounding-box queries
+
+Builds indexes of 10^3, 10^5 and 10^6 synthetic landmarks uniformly spread
+over the globe and reports build time and mean per-query latency.
+
+Usage: python -m benchmarks.bench_geo_index [queries]
+"""
+import sys
+import math
+import time
+import random
+
+from services.geo_index import GeoIndex
+
+SIZES = (1_000, 100_000, 1_000_000)
+
+
+def random_point(rng: random.Random) -> tuple:
+    # Uniform on the sphere (not uniform in lat), like real-world point spread without clustering
+    return math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180)
+
+
+def timed(fn, queries: list) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(*q)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rng = random.Random(42)
+
+    print(f"📊 GeoIndex, {queries} queries per measurement (mean µs/query)")
+    print("=" * 78)
+    print(f"{'points':>10} {'build s':>8} {'r=10km':>9} {'r=100km':>9} {'k=10':>9} {'bbox 1°':>9} {'scan r=100':>11}")
+    for size in SIZES:
+        start = time.perf_counter()
+        index = GeoIndex(cell_deg=0.5 if size <= 100_000 else 0.25)
+        for i in range(size):
+            index.add(f"lm_{i}", *random_point(rng))
+        build = time.perf_counter() - start
+
+        centres = [random_point(rng) for _ in range(queries)]
+        r10 = timed(lambda lat, lon: index.nearby(lat, lon, 10, 20), centres)
+        r100 = timed(lambda lat, lon: index.nearby(lat, lon, 100, 20), centres)
+        knn = timed(lambda lat, lon: index.nearest(lat, lon, 10), centres)
+        boxes = [(lat - 0.5, lon - 0.5, lat + 0.5, lon + 0.5) for lat, lon in centres]
+        bbox = timed(lambda a, b, c, d: index.bbox(a, b, c, d, 500), boxes)
+
+        # Baseline: what the map page does today - scan every point
+        from services.geo_index import haversine_km
+        sample = centres[:max(1, queries // 100)]
+        scan = timed(lambda lat, lon: [p for p in index.points if haversine_km(lat, lon, p.lat, p.lon) <= 100], sample)
+
+        print(f"{size:>10,} {build:>8.2f} {r10:>9.1f} {r100:>9.1f} {knn:>9.1f} {bbox:>9.1f} {scan:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: fresh connection per request vs the shared keep-alive pool
+
+Serves the stub OpenAI API over TLS with a throwaway self-signed certificate
+(generated with the openssl CLI) and POSTs chat completions to it. "Before"
+opens a new client per call like the old module-level requests.post, paying
+TCP + TLS setup every time; "after" reuses services.http_pool.HTTPPool.
+
+Usage: python -m benchmarks.bench_http_pool [requests] [stub_latency_seconds]
+"""
+import sys
+import time
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+import httpx
+
+from benchmarks.stub_openai import start_stub_server
+from services.http_pool import HTTPPool
+
+PAYLOAD = {"model": "stub", "messages": [{"role": "user", "content": "ping"}]}
+
+
+def make_certificate(directory: Path) -> tuple:
+    cert, key = directory / "cert.pem", directory / "key.pem"
+    subprocess.run([
+        "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+        "-keyout", str(key), "-out", str(cert), "-days", "1",
+        "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1"
+    ], check=True, capture_output=True)
+    return str(cert), str(key)
+
+
+def count_connections(server) -> dict:
+    """Wrap the server's accept so every new TCP connection is counted"""
+    counter = {"accepted": 0}
+    accept = server.get_request
+
+    def get_request():
+        counter["accepted"] += 1
+        return accept()
+
+    server.get_request = get_request
+    return counter
+
+
+def run(post, n: int) -> list:
+    latencies = []
+    for _ in range(n):
+        started = time.perf_counter()
+        response = post()
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(label: str, latencies: list, connections: int) -> None:
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{label:<22} p50 {statistics.median(ordered) * 1000:7.2f} ms   "
+          f"p99 {p99 * 1000:7.2f} ms   connections {connections}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_certificate(Path(tmp))
+        server = start_stub_server(latency=latency, certfile=cert, keyfile=key)
+        counter = count_connections(server)
+        url = f"https://127.0.0.1:{server.server_port}/v1/chat/completions"
+
+        print(f"🔐 TLS stub on port {server.server_port}, {n} sequential requests, "
+              f"{latency * 1000:.0f} ms server latency\n")
+
+        def fresh_post():
+            with httpx.Client(verify=cert) as client:
+                return client.post(url, json=PAYLOAD)
+
+        counter["accepted"] = 0
+        before = run(fresh_post, n)
+        report("fresh connection", before, counter["accepted"])
+
+        pool = HTTPPool(verify=cert)
+        counter["accepted"] = 0
+        after = run(lambda: pool.client.post(url, json=PAYLOAD), n)
+        report(f"shared pool (h2={'on' if pool.http2 else 'off'})", after, counter["accepted"])
+        pool.close()
+        server.shutdown()
+
+    saved = statistics.median(before) - statistics.median(after)
+    print(f"\n⚡ Per-request overhead removed: {saved * 1000:.2f} ms at p50 "
+          f"({statistics.median(before) / statistics.median(after):.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
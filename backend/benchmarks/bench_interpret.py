@@ -0,0 +1,155 @@
+"""
+Benchmark: the real /interpret handler, sync agents vs async agents
+
+Both pipelines run the real agents (USE_LLM=true, OpenAI provider) against
+the local stub OpenAI server, so every request pays two provider round-trips
+(fact generation for an unknown landmark, then the interpretation) without
+spending credits. Each request names a different landmark so nothing is
+served from the fact store or the interpretation cache.
+
+- before: the baseline handler body (knowledge.get_facts -> cultural.interpret
+  -> bias.analyze -> community.get_sentiment on the sync clients), dispatched
+  to a 40-thread pool the way Starlette runs a sync endpoint
+- after: main.interpret_heritage awaited on the event loop (async clients,
+  bias/sentiment alongside the knowledge lookup)
+
+One request at a time the two are close (the facts -> interpretation chain
+is the same); the gap opens once concurrency exceeds the threadpool, where
+sync requests queue for a thread while async ones only wait on the network.
+
+Usage: python -m benchmarks.bench_interpret [requests] [concurrency] [stub_latency_seconds]
+"""
+import os
+import sys
+import time
+import asyncio
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stub_openai import start_stub_server
+
+THREADPOOL_WORKERS = 40   # Starlette's default threadpool size
+
+
+def baseline_handler(main, request):
+    """The /interpret body before the async rewrite, on the same agents"""
+    context = request.user_context or {}
+    facts = main.knowledge_agent.get_facts(
+        request.object_id,
+        detected_name=context.get("detected_name"),
+        location=context.get("location")
+    )
+    interpretation = main.cultural_agent.interpret(
+        object_id=request.object_id,
+        lens=request.cultural_lens,
+        facts=facts
+    )
+    bias_report = main.bias_agent.analyze(object_id=request.object_id, lens=request.cultural_lens)
+    community_sentiment = main.community_agent.get_sentiment(request.object_id)
+    return {
+        "object_id": request.object_id,
+        "facts": facts,
+        "interpretation": interpretation,
+        "bias_report": bias_report,
+        "community_sentiment": community_sentiment,
+        "available_lenses": main.cultural_agent.get_available_lenses(request.object_id)
+    }
+
+
+def make_requests(main, phase: str, total: int) -> list:
+    # A landmark the catalogue does not know, different for every request and phase
+    return [
+        main.AnalysisRequest(
+            object_id=f"bench_{phase}_{i}",
+            cultural_lens="local",
+            user_context={"detected_name": f"Bench Landmark {phase} {i}", "location": "Benchville"}
+        )
+        for i in range(total)
+    ]
+
+
+async def run_before(main, total: int, concurrency: int) -> list:
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=THREADPOOL_WORKERS)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(request):
+        async with semaphore:
+            start = time.perf_counter()
+            await loop.run_in_executor(pool, baseline_handler, main, request)
+            return time.perf_counter() - start
+
+    latencies = await asyncio.gather(*(one(r) for r in make_requests(main, "before", total)))
+    pool.shutdown()
+    return latencies
+
+
+async def run_after(main, total: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(request):
+        async with semaphore:
+            start = time.perf_counter()
+            await main.interpret_heritage(request)
+            return time.perf_counter() - start
+
+    return await asyncio.gather(*(one(r) for r in make_requests(main, "after", total)))
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label: str, latencies: list, wall: float) -> dict:
+    result = {
+        "p50": percentile(latencies, 50) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+        "throughput": len(latencies) / wall
+    }
+    print(f"{label:<28} p50={result['p50']:8.1f} ms  p99={result['p99']:8.1f} ms  "
+          f"mean={statistics.mean(latencies) * 1000:8.1f} ms  throughput={result['throughput']:6.1f} req/s")
+    return result
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5
+
+    server = start_stub_server(latency=latency)
+    os.environ.update({
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_port}/v1",
+        "OPENAI_API_KEY": "stub",
+        "USE_LLM": "true",
+        "LLM_PROVIDER": "openai",
+        "FACT_STORE_BACKEND": "memory",
+        "LLM_CACHE_BACKEND": "memory",
+        "HTTP_MAX_CONNECTIONS": str(max(100, 2 * concurrency)),
+        "HTTP_MAX_KEEPALIVE": str(max(20, 2 * concurrency))
+    })
+    import main as app_main
+    app_main.catalogue.open()
+    failed = app_main.agents.warm(["knowledge", "cultural", "bias", "community"])
+    if any(failed.values()):
+        raise SystemExit(f"agents unavailable: {failed}")
+
+    print(f"📊 /interpret handler: {total} requests, {concurrency} concurrent, "
+          f"stub latency {latency * 1000:.0f} ms per provider call")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    before = report("before (sync agents)", asyncio.run(run_before(app_main, total, concurrency)),
+                    time.perf_counter() - start)
+    start = time.perf_counter()
+    after = report("after (async agents)", asyncio.run(run_after(app_main, total, concurrency)),
+                   time.perf_counter() - start)
+
+    print(f"\np50 {before['p50'] / after['p50']:.2f}x, p99 {before['p99'] / after['p99']:.2f}x, "
+          f"throughput {after['throughput'] / before['throughput']:.2f}x (after vs before)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: local first-tier recognizer vs the GPT-4o cloud path
+
+Fixture layout mirrors the reference set: <fixtures>/<object_id>/*.jpg, using
+photos that are NOT in data/reference_images. Reports coverage (share answered
+locally), accuracy of local answers, and per-image latency. With --cloud the
+same fixtures also go through VisionAgent (needs OPENAI_API_KEY; the vision
+cache is bypassed).
+
+The tier ships disabled (LOCAL_VISION_ENABLED=false) until this has been run:
+the sweep shows coverage and accuracy for each threshold/margin pair, so the
+defaults can be set from measured numbers before enabling it.
+
+Usage: python -m benchmarks.bench_local_vision <fixtures_dir> [--cloud]
+           [--thresholds 0.85 0.9 0.92 0.95] [--margins 0.0 0.03 0.05]
+"""
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from dotenv import load_dotenv
+
+from agents.local_vision_agent import LocalVisionAgent, IMAGE_EXTENSIONS
+
+load_dotenv()
+
+
+def load_fixtures(fixtures_dir: Path) -> list:
+    fixtures = []
+    for landmark_dir in sorted(p for p in fixtures_dir.iterdir() if p.is_dir()):
+        for image_path in sorted(landmark_dir.iterdir()):
+            if image_path.suffix.lower() in IMAGE_EXTENSIONS:
+                fixtures.append((landmark_dir.name, image_path.read_bytes()))
+    return fixtures
+
+
+def summarize(label: str, latencies: list, answered: int, correct: int, total: int) -> None:
+    p50 = statistics.median(latencies) * 1000 if latencies else 0.0
+    p95 = sorted(latencies)[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0
+    accuracy = correct / answered if answered else 0.0
+    print(f"{label:<8} answered {answered}/{total} ({answered / total:.0%})  "
+          f"accuracy {accuracy:.1%}  p50 {p50:.1f} ms  p95 {p95:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--cloud", action="store_true", help="also run the GPT-4o path")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=[0.85, 0.9, 0.92, 0.95])
+    parser.add_argument("--margins", type=float, nargs="*", default=[0.0, 0.03, 0.05])
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"❌ No fixture images under {args.fixtures}")
+        return 1
+
+    local = LocalVisionAgent(enabled=True)
+    if not local.available:
+        print("❌ Local vision index is empty (add data/reference_images/<object_id>/*.jpg)")
+        return 1
+
+    print(f"📊 {len(fixtures)} fixture images")
+    print("=" * 60)
+
+    latencies, answered, correct = [], 0, 0
+    for expected, image_bytes in fixtures:
+        start = time.perf_counter()
+        result = local.recognize(image_bytes)
+        latencies.append(time.perf_counter() - start)
+        if result:
+            answered += 1
+            correct += result["object_id"] == expected
+    summarize("local", latencies, answered, correct, len(fixtures))
+
+    # Threshold/margin sweep over the same rankings (decoding and ranking done once)
+    rankings = [(expected, local.rank(local._features(image_bytes))) for expected, image_bytes in fixtures]
+    print(f"\n{'threshold':>9} {'margin':>7} {'answered':>9} {'accuracy':>9}")
+    for threshold in args.thresholds:
+        for margin in args.margins:
+            answered = correct = 0
+            for expected, ranking in rankings:
+                best_id, best = ranking[0]
+                runner_up = ranking[1][1] if len(ranking) > 1 else 0.0
+                if best >= threshold and best - runner_up >= margin:
+                    answered += 1
+                    correct += best_id == expected
+            accuracy = correct / answered if answered else 0.0
+            current = " ← current" if (threshold, margin) == (local.threshold, local.margin) else ""
+            print(f"{threshold:>9.2f} {margin:>7.2f} {answered / len(fixtures):>9.0%} {accuracy:>9.1%}{current}")
+
+    if args.cloud:
+        from agents.vision_agent import VisionAgent
+        cloud = VisionAgent()
+        latencies, answered, correct = [], 0, 0
+        for expected, image_bytes in fixtures:
+            start = time.perf_counter()
+            result = cloud._recognize_uncached(image_bytes)
+            latencies.append(time.perf_counter() - start)
+            if not result.get("error"):
+                answered += 1
+                correct += result["object_id"] == expected
+        summarize("cloud", latencies, answered, correct, len(fixtures))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
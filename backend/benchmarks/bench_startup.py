@@ -0,0 +1,182 @@
+"""
+Benchmark: cold-start cost of the API - import time and time-to-first-request
+
+1. `python -X importtime -c "import main"`: total import time of main.py, the
+   heaviest modules it pulls in, and whether any upstream SDK (openai,
+   anthropic, elevenlabs, httpx) is imported before the first request.
+2. uvicorn in a fresh process: time from spawn until /healthz answers (what a
+   liveness probe or serverless router waits for), until /readyz is green
+   (required agents built), and for the first POST /interpret.
+
+Each run is appended to cache/startup_history.jsonl with the git commit, and
+the previous run is printed alongside so regressions show up across changes.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--top 12] [--no-server]
+"""
+import re
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+import urllib.error
+from pathlib import Path
+
+BACKEND = Path(__file__).parent.parent
+HISTORY = BACKEND / "cache" / "startup_history.jsonl"
+SDKS = ("openai", "anthropic", "elevenlabs", "httpx", "h2")
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile() -> dict:
+    """Parse one -X importtime run: total µs, per-module cumulative µs, SDKs seen"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        depth = len(indent) // 2
+        if name == "main":
+            total = int(cumulative)
+        elif depth <= 1:
+            # Top-level packages main.py (or the interpreter) imports directly
+            modules[name] = max(modules.get(name, 0), int(cumulative))
+    loaded = {line.split("|")[-1].strip() for line in result.stderr.splitlines() if "|" in line}
+    return {
+        "total_ms": total / 1000,
+        "modules": modules,
+        "sdks": sorted(sdk for sdk in SDKS if sdk in loaded)
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(url: str, body: dict = None, timeout: float = 60):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def server_timings(timeout: float = 60) -> dict:
+    """Spawn uvicorn and time the first /healthz, a green /readyz and the first /interpret"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            if time.perf_counter() - started > timeout:
+                raise TimeoutError("server did not come up")
+            try:
+                if request(f"{base}/healthz", timeout=1) == 200:
+                    break
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                time.sleep(0.01)
+        live = time.perf_counter() - started
+
+        ready_status = request(f"{base}/readyz", timeout=timeout)
+        ready = time.perf_counter() - started
+
+        interpret_started = time.perf_counter()
+        interpret_status = request(f"{base}/interpret", {"object_id": "taj_mahal", "cultural_lens": "local"},
+                                   timeout=timeout)
+        first_interpret = time.perf_counter() - interpret_started
+    finally:
+        server.terminate()
+        server.wait()
+    return {
+        "healthz_ms": live * 1000,
+        "readyz_ms": ready * 1000,
+        "readyz_status": ready_status,
+        "first_interpret_ms": first_interpret * 1000,
+        "interpret_status": interpret_status
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+                              capture_output=True, text=True).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def previous_run() -> dict:
+    try:
+        lines = HISTORY.read_text().strip().splitlines()
+        return json.loads(lines[-1]) if lines else {}
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and time-to-first-request benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement (median reported)")
+    parser.add_argument("--top", type=int, default=12, help="heaviest imports to list")
+    parser.add_argument("--no-server", action="store_true", help="only measure imports (no uvicorn)")
+    args = parser.parse_args()
+
+    print(f"🚀 Cold start, median of {args.runs} fresh processes")
+    print("=" * 60)
+    profiles = [import_profile() for _ in range(args.runs)]
+    result = {
+        "commit": git_commit(),
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "import_main_ms": statistics.median(p["total_ms"] for p in profiles),
+        "sdks_at_import": profiles[0]["sdks"]
+    }
+    heaviest = sorted(profiles[0]["modules"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    if not args.no_server:
+        timings = [server_timings() for _ in range(args.runs)]
+        for key in ("healthz_ms", "readyz_ms", "first_interpret_ms"):
+            result[key] = statistics.median(t[key] for t in timings)
+        result["readyz_status"] = timings[-1]["readyz_status"]
+        result["interpret_status"] = timings[-1]["interpret_status"]
+
+    before = previous_run()
+    for key in ("import_main_ms", "healthz_ms", "readyz_ms", "first_interpret_ms"):
+        if key in result:
+            was = f"   (was {before[key]:.1f} @ {before['commit']})" if key in before else ""
+            print(f"{key:>20}: {result[key]:8.1f} ms{was}")
+    print(f"{'SDKs at import':>20}: {', '.join(result['sdks_at_import']) or 'none'}")
+    if "readyz_status" in result:
+        print(f"{'status':>20}: /readyz {result['readyz_status']}, /interpret {result['interpret_status']}")
+
+    print(f"\nHeaviest imports (cumulative ms, first run):")
+    for name, micros in heaviest:
+        print(f"   {micros / 1000:8.1f}  {name}")
+
+    HISTORY.parent.mkdir(parents=True, exist_ok=True)
+    with open(HISTORY, "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+    print(f"\nAppended to {HISTORY.relative_to(BACKEND)}")
+
+
+if __name__ == "__main__":
+    main()
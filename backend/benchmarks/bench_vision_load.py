@@ -0,0 +1,74 @@
+"""
+Load test: sync vs async vision path inside one event loop
+
+Runs VisionAgent against a local stub OpenAI server. While N uploads are in
+flight, a probe coroutine plays the role of an unrelated route (/lenses) and
+measures how long the event loop takes to serve it. With the sync client the
+probe is starved for the whole vision call; with recognize_async it is not.
+
+Usage: python -m benchmarks.bench_vision_load [uploads] [stub_latency_seconds]
+"""
+import os
+import sys
+import time
+import asyncio
+
+from benchmarks.stub_openai import start_stub_server
+
+
+async def probe_loop(stop: asyncio.Event, samples: list, interval: float = 0.05):
+    """Schedule a trivial task repeatedly and record how late it runs"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def sync_handler(agent, image_bytes: bytes):
+    # What the old async handler did: a blocking client call on the event loop
+    return agent.recognize(image_bytes)
+
+
+async def async_handler(agent, image_bytes: bytes):
+    return await agent.recognize_async(image_bytes)
+
+
+async def run(agent, handler, uploads: int) -> dict:
+    stop = asyncio.Event()
+    samples = []
+    probe = asyncio.create_task(probe_loop(stop, samples))
+    await asyncio.sleep(0.1)
+
+    start = time.perf_counter()
+    # Unique bytes per upload so the vision cache never short-circuits the call
+    await asyncio.gather(*(handler(agent, os.urandom(256) + bytes([i % 256])) for i in range(uploads)))
+    wall = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    return {"wall": wall, "worst_probe_delay": max(samples) if samples else 0.0}
+
+
+def main():
+    uploads = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    server = start_stub_server(latency=latency)
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    os.environ.setdefault("VISION_MAX_CONCURRENCY", str(uploads))
+
+    from agents.vision_agent import VisionAgent
+    agent = VisionAgent()
+
+    print(f"📊 Vision load test: {uploads} concurrent uploads, stub latency {latency}s")
+    print("=" * 60)
+    for label, handler in (("sync client", sync_handler), ("async client", async_handler)):
+        result = asyncio.run(run(agent, handler, uploads))
+        print(f"{label:<14} wall={result['wall']:6.2f}s  "
+              f"worst delay for other routes={result['worst_probe_delay'] * 1000:8.1f} ms")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Local stub of the OpenAI chat completions API for load tests
+
+Answers every POST .../chat/completions after a fixed latency with a canned
+landmark identification, so benchmarks can point OPENAI_BASE_URL at it
+without spending credits.
+
+Usage: python -m benchmarks.stub_openai [port] [latency_seconds] [error_rate]
+"""
+import ssl
+import sys
+import json
+import time
+import random
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_REPLY = """NAME: Eiffel Tower
+LOCATION: Paris, France
+CONFIDENCE: High
+DESCRIPTION: A wrought-iron lattice tower against a clear sky."""
+
+
+class FaultPlan:
+    """
+    Fault injection for resilience tests. Each request takes the next scripted
+    action ("ok", "slow", or an HTTP status such as "429"/"503"), then falls
+    back to random faults: error_rate of requests fail with `status`,
+    slow_rate of them take slow_latency seconds.
+    """
+
+    def __init__(self, script=(), error_rate: float = 0.0, status: int = 503,
+                 slow_rate: float = 0.0, slow_latency: float = 5.0):
+        self.script = deque(script)
+        self.error_rate = error_rate
+        self.status = status
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def next_action(self) -> str:
+        with self._lock:
+            self.requests += 1
+            if self.script:
+                return self.script.popleft()
+        roll = random.random()
+        if roll < self.error_rate:
+            return str(self.status)
+        if roll < self.error_rate + self.slow_rate:
+            return "slow"
+        return "ok"
+
+
+def make_handler(latency: float, reply: str = CANNED_REPLY, faults: FaultPlan = None):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # no 40 ms delayed-ACK stalls on keep-alive connections
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+
+            action = faults.next_action() if faults else "ok"
+            if action.isdigit():
+                self._send_error(int(action))
+                return
+            time.sleep(faults.slow_latency if action == "slow" else latency)
+
+            body = json.dumps({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 30, "total_tokens": 130}
+            }).encode()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up (deadline or hedge) before we answered
+
+        def _send_error(self, status: int):
+            body = json.dumps({"error": {"message": f"injected {status}", "type": "stub_fault"}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stub_server(port: int = 0, latency: float = 1.0, reply: str = CANNED_REPLY,
+                      certfile: str = None, keyfile: str = None,
+                      faults: FaultPlan = None) -> ThreadingHTTPServer:
+    """
+    Start the stub in a daemon thread; returns the server (see server.server_port).
+    With certfile/keyfile it serves HTTPS, so connection setup includes a TLS handshake.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, reply, faults))
+    server.daemon_threads = True
+    if certfile:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 9100
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    error_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    server = start_stub_server(port, latency, faults=FaultPlan(error_rate=error_rate) if error_rate else None)
+    print(f"🧪 Stub OpenAI server on http://127.0.0.1:{server.server_port}/v1 "
+          f"(latency {latency}s, error rate {error_rate:.0%})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,82 +1,242 @@
 """
 Get accurate coordinates for landmarks using PositionStack API
+
+Bulk pipeline: reads data/landmarks.json, geocodes with bounded concurrency
+under a token-bucket rate limit, retries 429/5xx and network errors with
+backoff, caches every answer on disk and appends results to a JSONL checkpoint
+as they arrive; landmark_coordinates.json is rewritten once at the end.
+Landmarks already in either file are skipped, so an interrupted run simply
+resumes.
+
+Usage:
+    python get_coordinates.py                   # geocode missing landmarks
+    python get_coordinates.py --workers 8 --rps 5
+    python get_coordinates.py --refresh         # re-geocode everything
 """
-import requests
+import os
+import sys
 import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-API_KEY = "1404c282815f566233229360f79e9f50"
-BASE_URL = "http://api.positionstack.com/v1/forward"
-
-landmarks = [
-    {"id": "taj_mahal", "name": "Taj Mahal", "query": "Taj Mahal, Agra, India"},
-    {"id": "eiffel_tower", "name": "Eiffel Tower", "query": "Eiffel Tower, Paris, France"},
-    {"id": "statue_liberty", "name": "Statue of Liberty", "query": "Statue of Liberty, New York, USA"},
-    {"id": "colosseum", "name": "Colosseum", "query": "Colosseum, Rome, Italy"},
-    {"id": "great_wall", "name": "Great Wall", "query": "Great Wall of China, Beijing, China"},
-    {"id": "pyramids_giza", "name": "Pyramids of Giza", "query": "Pyramids of Giza, Cairo, Egypt"},
-    {"id": "machu_picchu", "name": "Machu Picchu", "query": "Machu Picchu, Peru"},
-    {"id": "christ_redeemer", "name": "Christ the Redeemer", "query": "Christ the Redeemer, Rio de Janeiro, Brazil"},
-    {"id": "big_ben", "name": "Big Ben", "query": "Big Ben, London, UK"},
-    {"id": "stonehenge", "name": "Stonehenge", "query": "Stonehenge, Wiltshire, UK"},
-    {"id": "acropolis", "name": "Acropolis", "query": "Acropolis, Athens, Greece"},
-    {"id": "petra", "name": "Petra", "query": "Petra, Jordan"},
-    {"id": "angkor_wat", "name": "Angkor Wat", "query": "Angkor Wat, Cambodia"}
-]
+import requests
 
-def get_coordinates(query):
-    """Get coordinates for a location"""
-    try:
-        params = {
-            'access_key': API_KEY,
-            'query': query,
-            'limit': 1
-        }
-        
-        response = requests.get(BASE_URL, params=params)
-        data = response.json()
-        
+from services.cache import create_cache
+from services.rate_limit import TokenBucket
+
+API_KEY = os.getenv("POSITIONSTACK_API_KEY", "1404c282815f566233229360f79e9f50")
+BASE_URL = os.getenv("GEOCODER_URL", "http://api.positionstack.com/v1/forward")
+
+BACKEND_DIR = Path(__file__).parent
+LANDMARKS_FILE = BACKEND_DIR / "data" / "landmarks.json"
+OUTPUT_FILE = BACKEND_DIR / "landmark_coordinates.json"
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def load_landmarks(path: Path = LANDMARKS_FILE) -> list:
+    """[{id, name, country, query}] from the knowledge base"""
+    with open(path, 'r', encoding='utf-8') as f:
+        db = json.load(f)
+    landmarks = []
+    for object_id, facts in db.items():
+        location = facts.get("location", "")
+        landmarks.append({
+            "id": object_id,
+            "name": facts.get("name", object_id),
+            "country": location.split(',')[-1].strip() if location else "",
+            "query": f"{facts.get('name', object_id)}, {location}".strip(", ")
+        })
+    return landmarks
+
+
+class Geocoder:
+    """Rate-limited, retrying, disk-cached forward geocoder"""
+
+    def __init__(self, base_url: str = BASE_URL, api_key: str = API_KEY, rps: float = 1.0,
+                 retries: int = 4, timeout: float = 10.0, cache=None):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.bucket = TokenBucket(rate=rps, capacity=max(1.0, rps))
+        self.retries = retries
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.cache = cache if cache is not None else create_cache("geocode", max_entries=1_000_000, backend="sqlite")
+
+    def geocode(self, query: str):
+        """{'latitude', 'longitude', 'label'} or None if the geocoder has no answer"""
+        cached = self.cache.get(query)
+        if cached is not None:
+            return cached or None  # {} records a confirmed "no result"
+
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                response = self.session.get(self.base_url, params={
+                    'access_key': self.api_key,
+                    'query': query,
+                    'limit': 1
+                }, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    break
+                error = f"HTTP {response.status_code}"
+            if attempt == self.retries:
+                print(f"   ❌ {query}: {error} (giving up)")
+                return None
+            # Exponential backoff with full jitter
+            time.sleep(random.uniform(0, min(30.0, 0.5 * 2 ** attempt)))
+
+        # Anything else (bad key, malformed query, ...) will not improve on retry
+        if not response.ok:
+            print(f"   ❌ {query}: HTTP {response.status_code} (not retried)")
+            return None
+        try:
+            data = response.json()
+        except ValueError as e:
+            print(f"   ❌ {query}: unreadable response ({e})")
+            return None
+
+        result = {}
         if data.get('data') and len(data['data']) > 0:
-            result = data['data'][0]
-            return {
-                'latitude': result['latitude'],
-                'longitude': result['longitude'],
-                'label': result.get('label', query)
+            first = data['data'][0]
+            result = {
+                'latitude': first['latitude'],
+                'longitude': first['longitude'],
+                'label': first.get('label', query)
             }
-        return None
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
+        self.cache.set(query, result)
+        return result or None
 
-def main():
-    print("🗺️  Fetching coordinates for landmarks...")
-    print("=" * 60)
-    
-    results = []
-    
-    for landmark in landmarks:
-        print(f"\n📍 {landmark['name']}...")
-        coords = get_coordinates(landmark['query'])
-        
+
+class CoordinateStore:
+    """
+    landmark_coordinates.json plus a JSONL checkpoint next to it: every new
+    result is appended to the checkpoint, and compact() folds it into the JSON
+    file once at the end of a run (a crash leaves the checkpoint to resume from)
+    """
+
+    def __init__(self, path: Path = OUTPUT_FILE):
+        self.path = Path(path)
+        self.checkpoint = self.path.with_suffix(".partial.jsonl")
+        self._lock = threading.Lock()
+        self.records = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.records = {r['id']: r for r in json.load(f)}
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Ignoring unreadable {self.path.name}: {e}")
+        if self.checkpoint.exists():
+            text = self.checkpoint.read_text(encoding='utf-8')
+            for line in text.splitlines():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from an interrupted run
+                self.records[record['id']] = record
+            if text and not text.endswith("\n"):
+                # Terminate the torn line so the next append starts on its own
+                with open(self.checkpoint, 'a', encoding='utf-8') as f:
+                    f.write("\n")
+
+    def __contains__(self, object_id: str) -> bool:
+        return object_id in self.records
+
+    def add(self, record: dict) -> None:
+        with self._lock:
+            self.records[record['id']] = record
+            with open(self.checkpoint, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+
+    def compact(self) -> None:
+        """Rewrite the JSON file atomically with every record, then drop the checkpoint"""
+        with self._lock:
+            if not self.checkpoint.exists():
+                return
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(list(self.records.values()), f, indent=2)
+            os.replace(tmp_path, self.path)
+            self.checkpoint.unlink()
+
+
+def geocode_all(landmarks: list, geocoder: Geocoder, store: CoordinateStore,
+                workers: int = 4, refresh: bool = False) -> dict:
+    """Geocode every landmark not yet in the store; returns a summary"""
+    summary = {"geocoded": 0, "skipped": 0, "failed": []}
+    pending = [lm for lm in landmarks if refresh or lm['id'] not in store]
+    summary["skipped"] = len(landmarks) - len(pending)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(geocoder.geocode, lm['query']): lm for lm in pending}
+        try:
+            _collect(futures, store, summary)
+        finally:
+            store.compact()
+    return summary
+
+
+def _collect(futures: dict, store: CoordinateStore, summary: dict) -> None:
+    for future in as_completed(futures):
+        landmark = futures[future]
+        coords = future.result()
         if coords:
-            landmark_data = {
+            store.add({
                 'id': landmark['id'],
                 'name': landmark['name'],
-                'country': landmark['query'].split(',')[-1].strip(),
+                'country': landmark['country'],
                 'latitude': coords['latitude'],
                 'longitude': coords['longitude']
-            }
-            results.append(landmark_data)
-            print(f"   ✅ Lat: {coords['latitude']}, Lon: {coords['longitude']}")
+            })
+            summary["geocoded"] += 1
+            print(f"   ✅ {landmark['name']}: {coords['latitude']}, {coords['longitude']}")
         else:
-            print(f"   ❌ Failed to get coordinates")
-    
-    # Save to file
-    with open('landmark_coordinates.json', 'w') as f:
-        json.dump(results, f, indent=2)
-    
+            summary["failed"].append(landmark['id'])
+            print(f"   ❌ {landmark['name']}: no coordinates")
+
+
+def get_coordinates(query):
+    """Get coordinates for a location"""
+    return Geocoder().geocode(query)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geocode landmarks into landmark_coordinates.json")
+    parser.add_argument("--landmarks", type=Path, default=LANDMARKS_FILE)
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=1.0, help="max geocoder requests per second")
+    parser.add_argument("--refresh", action="store_true", help="re-geocode landmarks already in the output")
+    args = parser.parse_args()
+
+    print("🗺️  Fetching coordinates for landmarks...")
+    print("=" * 60)
+
+    start = time.time()
+    summary = geocode_all(
+        load_landmarks(args.landmarks),
+        Geocoder(rps=args.rps),
+        CoordinateStore(args.output),
+        workers=args.workers,
+        refresh=args.refresh
+    )
+
     print("\n" + "=" * 60)
-    print(f"✅ Saved {len(results)} landmarks to landmark_coordinates.json")
-    print("\nYou can now use these coordinates in your map!")
+    print(f"✅ Geocoded {summary['geocoded']}, skipped {summary['skipped']} already done, "
+          f"{len(summary['failed'])} failed in {time.time() - start:.1f}s")
+    if summary["failed"]:
+        print(f"   Failed (re-run to retry): {', '.join(summary['failed'])}")
+    print(f"\nCoordinates saved to {args.output.name}")
+    return 1 if summary["failed"] else 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
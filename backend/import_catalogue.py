@@ -0,0 +1,50 @@
+"""
+Import the JSON sources in data/ into the SQLite catalogue store
+
+The app does this by itself on startup when a source file changed; run it by
+hand to rebuild the store, import a file from elsewhere or check record counts.
+Only records whose content changed are rewritten.
+
+Usage:
+    python import_catalogue.py                              # every source in data/
+    python import_catalogue.py --kind landmark --file /path/to/landmarks.json
+    python import_catalogue.py --rebuild                    # start from an empty store
+"""
+import time
+import argparse
+from pathlib import Path
+
+from services.catalogue import Catalogue, CATALOGUE_PATH, DATA_DIR, SOURCES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import JSON sources into the catalogue store")
+    parser.add_argument("--db", type=Path, default=CATALOGUE_PATH)
+    parser.add_argument("--kind", choices=sorted(SOURCES), help="import one kind (default: all)")
+    parser.add_argument("--file", type=Path, help="source file for --kind (default: its file in data/)")
+    parser.add_argument("--rebuild", action="store_true", help="delete the existing store first")
+    args = parser.parse_args()
+
+    if args.file and not args.kind:
+        parser.error("--file needs --kind")
+    if args.rebuild:
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{args.db}{suffix}").unlink(missing_ok=True)
+
+    print("📚 Importing catalogue")
+    print("=" * 60)
+    catalogue = Catalogue(args.db, auto_import=False)
+    start = time.time()
+    for kind in [args.kind] if args.kind else SOURCES:
+        path = args.file or DATA_DIR / SOURCES[kind]
+        if not path.exists():
+            print(f"⏭️  {kind}: {path} not found")
+            continue
+        changed = catalogue.import_file(kind, path)
+        print(f"✅ {kind}: {catalogue.count(kind)} records, {len(changed)} changed ({path.name})")
+    catalogue.close()
+    print(f"\nDone in {time.time() - start:.2f}s → {args.db}")
+
+
+if __name__ == "__main__":
+    main()
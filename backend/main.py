@@ -1,29 +1,37 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Form, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, Response, FileResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 import uvicorn
 import os
-from dotenv import load_dotenv
+import asyncio
+import json
+import zipfile
+import hashlib
 from io import BytesIO
+from dotenv import load_dotenv
+from pathlib import Path
 
 # Load environment variables
 load_dotenv()
 
-from agents.vision_agent import VisionAgent
-from agents.knowledge_agent import KnowledgeAgent
-from agents.cultural_agent import CulturalAgent
-from agents.bias_agent import BiasAgent
-from agents.community_agent import CommunityAgent
-from agents.audio_agent import AudioAgent
+from agents.audio_agent import AUDIO_BYTES
+from services.agent_registry import agents, AgentUnavailable
+from services.cache import cache_stats, register_stats
+from services.catalogue import catalogue
+from services.single_flight import single_flight
+from services.geo_index import GeoIndex
+from services.http_pool import http_pool
+from services.resilience import upstreams
+from services.quota import quota
+from services.metrics import registry as metrics, MetricsMiddleware, export_stats
 
 # Optional: LLM-powered cultural agent
 USE_LLM = os.getenv("USE_LLM", "false").lower() == "true"
-if USE_LLM:
-    from agents.llm_cultural_agent import LLMCulturalAgent
 
 app = FastAPI(title="CultureLens API")
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,27 +41,160 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize agents
-vision_agent = VisionAgent()
-knowledge_agent = KnowledgeAgent()
-audio_agent = AudioAgent()
 
-# Choose cultural agent: LLM or hardcoded
-if USE_LLM:
-    provider = os.getenv("LLM_PROVIDER", "openai")
+# Agents are built on first use (SDK imports included); all outbound API
+# traffic shares one keep-alive connection pool
+def build_knowledge_agent():
+    from agents.knowledge_agent import KnowledgeAgent
+    return KnowledgeAgent(http=http_pool)
+
+
+def build_audio_agent():
+    from agents.audio_agent import AudioAgent
+    agent = AudioAgent(http=http_pool)
+    register_stats("audio", agent.audio_cache)
+    return agent
+
+
+def build_cultural_agent():
+    """LLM or hardcoded"""
+    from agents.cultural_agent import CulturalAgent
+    if USE_LLM:
+        provider = os.getenv("LLM_PROVIDER", "openai")
+        try:
+            from agents.llm_cultural_agent import LLMCulturalAgent
+            agent = LLMCulturalAgent(provider=provider, http=http_pool)
+            print(f"✅ Using LLM Cultural Agent ({provider})")
+            return agent
+        except Exception as e:
+            print(f"⚠️  LLM initialization failed: {e}")
+            print("⚠️  Falling back to hardcoded cultural agent")
+    else:
+        print("✅ Using Hardcoded Cultural Agent (fast demo mode)")
+    return CulturalAgent()
+
+
+def build_bias_agent():
+    from agents.bias_agent import BiasAgent
+    return BiasAgent()
+
+
+def build_community_agent():
+    from agents.community_agent import CommunityAgent
+    return CommunityAgent()
+
+
+def build_geo_index():
+    """Spatial index over landmark coordinates for map and location queries"""
+    return GeoIndex.from_file(
+        Path(__file__).parent / "landmark_coordinates.json",
+        cell_deg=float(os.getenv("GEO_INDEX_CELL_DEG", "0.5"))
+    )
+
+
+def build_local_vision_agent():
+    from agents.local_vision_agent import LocalVisionAgent
+    return LocalVisionAgent()
+
+
+def build_vision_agent():
+    """Vision tiers: local reference matcher, then GPT-4o (narrowed by device GPS when given)"""
+    from agents.vision_agent import VisionAgent
     try:
-        cultural_agent = LLMCulturalAgent(provider=provider)
-        print(f"✅ Using LLM Cultural Agent ({provider})")
-    except Exception as e:
-        print(f"⚠️  LLM initialization failed: {e}")
-        print("⚠️  Falling back to hardcoded cultural agent")
-        cultural_agent = CulturalAgent()
-else:
-    cultural_agent = CulturalAgent()
-    print("✅ Using Hardcoded Cultural Agent (fast demo mode)")
+        local_vision = agents.get("local_vision")
+    except AgentUnavailable:
+        local_vision = None  # cloud recognition still works without the local tier
+    agent = VisionAgent(geo_index=agents.get("geo_index"), local_vision=local_vision, http=http_pool)
+    register_stats("vision", agent.cache)
+    return agent
+
+
+# Required agents gate /readyz; the others degrade one feature when unavailable
+agents.register("knowledge", build_knowledge_agent)
+agents.register("cultural", build_cultural_agent)
+agents.register("bias", build_bias_agent)
+agents.register("community", build_community_agent)
+agents.register("geo_index", build_geo_index)
+agents.register("local_vision", build_local_vision_agent, required=False)
+agents.register("vision", build_vision_agent, required=False)
+agents.register("audio", build_audio_agent, required=False)
+
+knowledge_agent = agents.lazy("knowledge")
+cultural_agent = agents.lazy("cultural")
+bias_agent = agents.lazy("bias")
+community_agent = agents.lazy("community")
+geo_index = agents.lazy("geo_index")
+vision_agent = agents.lazy("vision")
+audio_agent = agents.lazy("audio")
+
+register_stats("single_flight", single_flight)
+register_stats("http_pool", http_pool)
+register_stats("upstreams", upstreams)
+register_stats("catalogue", catalogue)
+register_stats("agents", agents)
 
-bias_agent = BiasAgent()
-community_agent = CommunityAgent()
+
+QUOTA_USED = metrics.counter(
+    "quota_used_total", "Tokens/characters billed per provider, model and endpoint", ("provider", "model", "endpoint")
+)
+QUOTA_REJECTED = metrics.counter(
+    "quota_rejected_total", "Upstream calls refused by the quota manager", ("provider", "model", "endpoint")
+)
+QUOTA_HEADROOM = metrics.gauge("quota_headroom", "Fraction left of the tightest budget window", ("provider",))
+
+
+def collect_service_metrics():
+    """Scrape-time snapshot of cache, single-flight, upstream and quota counters"""
+    for name, stats in cache_stats().items():
+        if name != "upstreams":
+            export_stats("cache", name, stats)
+    for provider, stats in upstreams.stats().items():
+        export_stats("upstream", provider, stats)
+    
+    QUOTA_USED.clear()
+    QUOTA_REJECTED.clear()
+    for (provider, model, endpoint), counts in list(quota.usage.items()):
+        QUOTA_USED.inc(counts["used"], provider=provider, model=model, endpoint=endpoint)
+        QUOTA_REJECTED.inc(counts["rejected"], provider=provider, model=model, endpoint=endpoint)
+    for provider in quota.stats():
+        QUOTA_HEADROOM.set(quota.headroom(provider), provider=provider)
+
+
+metrics.add_collector(collect_service_metrics)
+
+
+@app.on_event("startup")
+async def open_catalogue():
+    # Open and import in the background so /healthz answers at once; requests
+    # that need a record before it finishes wait in a worker thread, not the loop
+    asyncio.get_running_loop().run_in_executor(None, catalogue.open)
+    # Edits to data/*.json are picked up without a restart (0 disables)
+    interval = float(os.getenv("CATALOGUE_WATCH_INTERVAL", "2"))
+    if interval > 0:
+        catalogue.watch(interval)
+
+
+@app.on_event("startup")
+async def preload_agents():
+    # Off by default so cold starts answer /healthz at once; /readyz builds them on demand
+    if os.getenv("PRELOAD_AGENTS", "false").lower() == "true":
+        asyncio.get_running_loop().run_in_executor(None, agents.warm, agents.names())
+
+
+@app.exception_handler(AgentUnavailable)
+async def agent_unavailable(request: Request, exc: AgentUnavailable):
+    return Response(
+        json.dumps({"error": str(exc), "agent": exc.name}),
+        status_code=503,
+        media_type="application/json",
+        headers={"Retry-After": str(max(1, round(exc.retry_in)))}
+    )
+
+
+@app.on_event("shutdown")
+async def close_http_pool():
+    await http_pool.aclose()
+    catalogue.stop_watching()
 
 
 class AnalysisRequest(BaseModel):
@@ -62,10 +203,23 @@ class AnalysisRequest(BaseModel):
     user_context: Optional[dict] = None
 
 
+class LensesRequest(BaseModel):
+    object_id: str
+    lenses: Optional[List[str]] = None  # defaults to every lens available for the object
+    user_context: Optional[dict] = None
+
+
 class AudioRequest(BaseModel):
     object_id: str
     language: str = "english"
     cultural_lens: str = "local"
+    stream: bool = False  # relay ElevenLabs chunks as they are synthesized
+
+
+class TranslationRequest(BaseModel):
+    object_id: str
+    cultural_lens: str = "local"
+    languages: Optional[List[str]] = None  # defaults to every supported language
 
 
 @app.get("/")
@@ -73,48 +227,380 @@ def root():
     return {"message": "CultureLens API", "status": "running"}
 
 
+@app.get("/healthz")
+def liveness():
+    """Liveness: the process is serving requests (never builds agents or calls out)"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness: every required agent is built; the first call builds them"""
+    if not agents.ready():
+        await asyncio.to_thread(agents.warm)
+    ready = agents.ready()
+    return Response(
+        json.dumps({"ready": ready, "agents": agents.stats()}),
+        status_code=200 if ready else 503,
+        media_type="application/json"
+    )
+
+
+def require_agents(*names: str) -> None:
+    """
+    Build the agents a streaming endpoint needs before its response starts:
+    once the headers are sent, AgentUnavailable can no longer become a 503
+    """
+    for name in names:
+        agents.get(name)
+
+
+def optional_agent(name: str):
+    """The agent, or None when it cannot be built (its tier is skipped)"""
+    try:
+        return agents.get(name)
+    except AgentUnavailable:
+        return None
+
+
+async def run_until_disconnect(request: Request, coro, poll_interval: float = 0.5):
+    """Await coro, cancelling it if the client goes away before it finishes"""
+    task = asyncio.create_task(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=poll_interval)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            # 499: client closed request (nobody is listening for the body)
+            return Response(status_code=499)
+
+
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_MB", "20")) * 1024 * 1024
+
+
 @app.post("/analyze/image")
-async def analyze_image(file: UploadFile = File(...)):
+async def analyze_image(
+    request: Request,
+    file: UploadFile = File(...),
+    lat: Optional[float] = Form(None),
+    lon: Optional[float] = Form(None)
+):
     """Edge vision simulation - in production this runs on-device"""
-    image_bytes = await file.read()
-    vision_result = vision_agent.recognize(image_bytes)
-    return vision_result
+    # The upload stays in its spooled file: hashed in chunks and decoded at reduced scale
+    upload = file.file
+    size = await asyncio.to_thread(upload.seek, 0, os.SEEK_END)
+    if size > IMAGE_MAX_BYTES:
+        return Response(
+            json.dumps({"error": f"Image limited to {IMAGE_MAX_BYTES} bytes"}),
+            status_code=413,
+            media_type="application/json"
+        )
+    location = (lat, lon) if lat is not None and lon is not None else None
+    
+    # Tier 1: local nearest-neighbour match against catalogue reference images
+    local_vision = optional_agent("local_vision")
+    if local_vision is not None and local_vision.available:
+        from services.image_preprocess import read_source
+        local_result = await asyncio.to_thread(lambda: local_vision.recognize(read_source(upload)))
+        if local_result:
+            return local_result
+    
+    # Tier 2: GPT-4o
+    return await run_until_disconnect(request, vision_agent.recognize_async(upload, location=location))
+
+
+BATCH_MAX_IMAGES = int(os.getenv("BATCH_MAX_IMAGES", "100"))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_MB", "200")) * 1024 * 1024
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+BATCH_ITEM_TIMEOUT = float(os.getenv("BATCH_ITEM_TIMEOUT", "45"))
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".heic")
+
+
+def unpack_zip(name: str, data: bytes, budget: int) -> list:
+    """Image entries of an uploaded zip, refusing to inflate past the byte budget"""
+    items = []
+    with zipfile.ZipFile(BytesIO(data)) as archive:
+        for entry in archive.infolist():
+            if entry.is_dir() or not entry.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            budget -= entry.file_size
+            if budget < 0:
+                raise ValueError("batch exceeds the uncompressed size limit")
+            items.append((f"{name}/{entry.filename}", archive.read(entry)))
+    return items
+
+
+async def recognize_batch(items: list, concurrency: int, item_timeout: float, local_vision=None):
+    """
+    Yield one NDJSON line per uploaded image as soon as its result is ready.
+    Identical images are recognized once; cache hits are emitted first.
+    The caller builds the vision agent before the response starts.
+    """
+    groups = {}  # digest -> [names], first-seen order
+    payloads = {}
+    for name, data in items:
+        digest = hashlib.sha256(data).hexdigest()
+        groups.setdefault(digest, []).append(name)
+        payloads[digest] = data
+    
+    def lines(digest: str, result: dict):
+        for name in groups[digest]:
+            yield json.dumps({"file": name, "sha256": digest, **result}) + "\n"
+    
+    misses = []
+    for digest, data in payloads.items():
+        fp, cached = await vision_agent.lookup_cached(data)
+        if cached:
+            for line in lines(digest, cached):
+                yield line
+        else:
+            misses.append((digest, fp, data))
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def tiers(fp, data: bytes):
+        if local_vision is not None and local_vision.available:
+            local_result = await asyncio.to_thread(local_vision.recognize, data)
+            if local_result:
+                return local_result
+        return await vision_agent.recognize_async(data, fp=fp)
+    
+    async def recognize(digest: str, fp, data: bytes):
+        async with semaphore:
+            try:
+                # One deadline per image, covering the local model and the cloud call
+                result = await asyncio.wait_for(tiers(fp, data), timeout=item_timeout)
+            except asyncio.TimeoutError:
+                result = {"error": f"Image recognition timed out after {item_timeout}s", "confidence": 0.0}
+            except Exception as e:
+                # The stream is already open: report the failure on this image's line
+                result = {"error": str(e), "confidence": 0.0}
+            return digest, result
+    
+    tasks = [asyncio.create_task(recognize(*miss)) for miss in misses]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            digest, result = await next_done
+            for line in lines(digest, result):
+                yield line
+    finally:
+        # Client went away mid-stream: stop paying for the remaining images
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/analyze/images")
+async def analyze_images(files: List[UploadFile] = File(...), concurrency: Optional[int] = None):
+    """Batch recognition for many images (or zips of images), streamed back as NDJSON"""
+    require_agents("vision")
+    local_vision = optional_agent("local_vision")
+    
+    items = []
+    budget = BATCH_MAX_BYTES
+    for upload in files:
+        data = await upload.read()
+        name = upload.filename or f"image_{len(items)}"
+        if name.lower().endswith(".zip") or upload.content_type in ("application/zip", "application/x-zip-compressed"):
+            try:
+                entries = await asyncio.to_thread(unpack_zip, name, data, budget)
+            except (zipfile.BadZipFile, ValueError) as e:
+                return Response(
+                    json.dumps({"error": f"{name}: {e}"}), status_code=400, media_type="application/json"
+                )
+            items.extend(entries)
+            budget -= sum(len(d) for _, d in entries)
+        else:
+            items.append((name, data))
+            budget -= len(data)
+        if budget < 0 or len(items) > BATCH_MAX_IMAGES:
+            return Response(
+                json.dumps({"error": f"Batch limited to {BATCH_MAX_IMAGES} images / {BATCH_MAX_BYTES} bytes"}),
+                status_code=413,
+                media_type="application/json"
+            )
+    
+    concurrency = max(1, min(concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    return StreamingResponse(
+        recognize_batch(items, concurrency, BATCH_ITEM_TIMEOUT, local_vision),
+        media_type="application/x-ndjson"
+    )
+
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters for the response caches"""
+    return cache_stats()
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of every registered metric"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/catalogue/reload")
+async def reload_catalogue():
+    """Reload changed data files now instead of waiting for the watcher"""
+    changed = await asyncio.to_thread(catalogue.sync_sources)
+    return {"changed": changed, "catalogue": catalogue.stats()}
+
+
+@app.get("/quota")
+def get_quota_usage():
+    """Live token/character usage and remaining budget per provider, model and endpoint"""
+    return quota.stats()
 
 
 @app.post("/interpret")
-def interpret_heritage(request: AnalysisRequest):
+async def interpret_heritage(request: AnalysisRequest):
     """Multi-agent cultural interpretation pipeline"""
+    context = request.user_context or {}
     
     # 1. Knowledge Retrieval (pass detected name if available)
-    facts = knowledge_agent.get_facts(
+    facts_task = asyncio.create_task(knowledge_agent.get_facts_async(
         request.object_id,
-        detected_name=request.user_context.get("detected_name") if request.user_context else None,
-        location=request.user_context.get("location") if request.user_context else None
-    )
+        detected_name=context.get("detected_name"),
+        location=context.get("location")
+    ))
     
-    # 2. Cultural Interpretation
-    interpretation = cultural_agent.interpret(
-        object_id=request.object_id,
-        lens=request.cultural_lens,
-        facts=facts
+    # 2. Bias Analysis and Community Sentiment run alongside the knowledge lookup
+    side_tasks = asyncio.gather(
+        bias_agent.analyze_async(object_id=request.object_id, lens=request.cultural_lens),
+        community_agent.get_sentiment_async(request.object_id)
     )
     
-    # 3. Bias Analysis
-    bias_report = bias_agent.analyze(
-        object_id=request.object_id,
-        lens=request.cultural_lens
+    # 3. Cultural Interpretation starts as soon as the facts exist
+    facts = await facts_task
+    interpretation, (bias_report, community_sentiment) = await asyncio.gather(
+        cultural_agent.interpret_async(
+            object_id=request.object_id,
+            lens=request.cultural_lens,
+            facts=facts
+        ),
+        side_tasks
     )
     
-    # 4. Community Sentiment
-    community_sentiment = community_agent.get_sentiment(request.object_id)
-    
     return {
         "object_id": request.object_id,
         "facts": facts,
         "interpretation": interpretation,
         "bias_report": bias_report,
         "community_sentiment": community_sentiment,
-        "available_lenses": cultural_agent.get_available_lenses(request.object_id)
+        "available_lenses": await cultural_agent.get_available_lenses_async(request.object_id)
+    }
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def interpret_events(request: AnalysisRequest):
+    """
+    SSE events for /interpret/stream: facts, bias_report and
+    community_sentiment as each lookup finishes, then interpretation tokens as
+    the provider produces them, the final interpretation, and done
+    """
+    context = request.user_context or {}
+    facts_task = asyncio.create_task(knowledge_agent.get_facts_async(
+        request.object_id,
+        detected_name=context.get("detected_name"),
+        location=context.get("location")
+    ))
+    stages = {
+        facts_task: "facts",
+        asyncio.create_task(bias_agent.analyze_async(object_id=request.object_id, lens=request.cultural_lens)):
+            "bias_report",
+        asyncio.create_task(community_agent.get_sentiment_async(request.object_id)): "community_sentiment"
+    }
+    pending = set(stages)
+    
+    def finished(done) -> list:
+        events = []
+        for task in done:
+            if task.exception() is not None:
+                events.append(sse_event("error", {"stage": stages[task], "error": str(task.exception())}))
+            else:
+                events.append(sse_event(stages[task], task.result()))
+        return events
+    
+    try:
+        # Everything that is ready before the facts goes out immediately
+        while not facts_task.done():
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for event in finished(done):
+                yield event
+        if facts_task.exception() is not None:
+            return
+        
+        async for event, data in cultural_agent.interpret_stream(
+            object_id=request.object_id,
+            lens=request.cultural_lens,
+            facts=facts_task.result()
+        ):
+            # Side lookups that finish while the narrative streams are interleaved
+            done = {task for task in pending if task.done()}
+            pending -= done
+            for side_event in finished(done):
+                yield side_event
+            yield sse_event(event, {"text": data} if event == "token" else data)
+        
+        if pending:
+            done, pending = await asyncio.wait(pending)
+            for event in finished(done):
+                yield event
+        lenses = await cultural_agent.get_available_lenses_async(request.object_id)
+        yield sse_event("done", {"available_lenses": lenses})
+    finally:
+        # Client went away: drop lookups nobody will read
+        for task in pending:
+            task.cancel()
+
+
+@app.post("/interpret/stream")
+async def interpret_heritage_stream(request: AnalysisRequest):
+    """Streaming /interpret: first content arrives as soon as the facts are known"""
+    require_agents("knowledge", "bias", "community", "cultural")
+    return StreamingResponse(
+        interpret_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/interpret/lenses")
+async def interpret_heritage_lenses(request: LensesRequest):
+    """Every requested lens in one pass: shared facts are sent to the LLM once"""
+    context = request.user_context or {}
+    lenses = request.lenses or await cultural_agent.get_available_lenses_async(request.object_id)
+    
+    facts_task = asyncio.create_task(knowledge_agent.get_facts_async(
+        request.object_id,
+        detected_name=context.get("detected_name"),
+        location=context.get("location")
+    ))
+    side_tasks = asyncio.gather(
+        asyncio.gather(*(bias_agent.analyze_async(object_id=request.object_id, lens=lens) for lens in lenses)),
+        community_agent.get_sentiment_async(request.object_id)
+    )
+    
+    facts = await facts_task
+    interpretations, (bias_reports, community_sentiment) = await asyncio.gather(
+        cultural_agent.interpret_many_async(
+            object_id=request.object_id,
+            lenses=lenses,
+            facts=facts
+        ),
+        side_tasks
+    )
+    
+    return {
+        "object_id": request.object_id,
+        "facts": facts,
+        "interpretations": interpretations,
+        "bias_reports": dict(zip(lenses, bias_reports)),
+        "community_sentiment": community_sentiment,
+        "available_lenses": await cultural_agent.get_available_lenses_async(request.object_id)
     }
 
 
@@ -132,6 +618,47 @@ def get_lenses():
     }
 
 
+def landmark_summary(point, distance_km: float = None) -> dict:
+    result = {
+        "id": point.id,
+        "name": point.data.get("name"),
+        "country": point.data.get("country"),
+        "latitude": point.lat,
+        "longitude": point.lon
+    }
+    if distance_km is not None:
+        result["distance_km"] = round(distance_km, 3)
+    return result
+
+
+@app.get("/landmarks/nearby")
+def get_nearby_landmarks(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: Optional[float] = Query(None, gt=0, description="km; omit for the k nearest at any distance"),
+    k: int = Query(20, ge=1, le=1000)
+):
+    """Landmarks near a point, nearest first"""
+    if radius is None:
+        matches = geo_index.nearest(lat, lon, k)
+    else:
+        matches = geo_index.nearby(lat, lon, radius, k)
+    return {"landmarks": [landmark_summary(point, distance) for distance, point in matches]}
+
+
+@app.get("/landmarks/bbox")
+def get_landmarks_in_bbox(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    limit: int = Query(500, ge=1, le=10000)
+):
+    """Landmarks inside a map viewport (min_lon > max_lon crosses the antimeridian)"""
+    points = geo_index.bbox(min_lat, min_lon, max_lat, max_lon, limit)
+    return {"landmarks": [landmark_summary(point) for point in points]}
+
+
 @app.get("/audio/languages")
 def get_audio_languages():
     """Get available languages for audio narration"""
@@ -140,11 +667,76 @@ def get_audio_languages():
     }
 
 
+def parse_byte_range(header: Optional[str], size: int):
+    """Parse a single 'bytes=start-end' Range header; None means serve the whole file"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start_str, _, end_str = header[len("bytes="):].strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:  # suffix range: last N bytes
+            start = max(size - int(end_str), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+def iter_file_range(path: Path, start: int, end: int, chunk_size: int = 64 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def audio_file_response(http_request: Request, path: Path, filename: str) -> Response:
+    """Serve a cached MP3 from disk with ETag revalidation and Range support"""
+    etag = f'"{path.stem}"'  # the file name is the content hash of the synthesis request
+    if http_request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=86400",
+        "Content-Disposition": f"attachment; filename={filename}"
+    }
+    size = path.stat().st_size
+    byte_range = parse_byte_range(http_request.headers.get("range"), size)
+    
+    if byte_range is None:
+        AUDIO_BYTES.inc(size, source="served")
+        return FileResponse(path, media_type="audio/mpeg", headers=headers)
+    if byte_range == "unsatisfiable":
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    AUDIO_BYTES.inc(end - start + 1, source="served")
+    return StreamingResponse(
+        iter_file_range(path, start, end),
+        status_code=206,
+        media_type="audio/mpeg",
+        headers=headers
+    )
+
+
 @app.post("/audio/intro")
-def generate_intro_audio(request: AudioRequest):
+async def generate_intro_audio(request: AudioRequest, http_request: Request):
     """Generate introduction audio for a landmark"""
     # Get landmark facts
-    facts = knowledge_agent.get_facts(request.object_id)
+    facts = await knowledge_agent.get_facts_async(request.object_id)
     
     # Generate intro text
     intro_text = audio_agent.generate_landmark_intro(
@@ -152,25 +744,15 @@ def generate_intro_audio(request: AudioRequest):
         facts.get('location', 'an amazing place')
     )
     
-    # Generate audio
-    audio_data = audio_agent.create_audio_response(intro_text, request.language)
-    
-    if audio_data:
-        return StreamingResponse(
-            BytesIO(audio_data),
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": f"attachment; filename=intro_{request.object_id}.mp3"}
-        )
-    else:
-        return {"error": "Failed to generate audio", "text": intro_text}
+    return await audio_response(http_request, request, intro_text, f"intro_{request.object_id}.mp3")
 
 
 @app.post("/audio/narrate")
-def generate_narration_audio(request: AudioRequest):
+async def generate_narration_audio(request: AudioRequest, http_request: Request):
     """Generate full narration audio for a landmark in specified language"""
     # Get landmark data
-    facts = knowledge_agent.get_facts(request.object_id)
-    interpretation = cultural_agent.interpret(
+    facts = await knowledge_agent.get_facts_async(request.object_id)
+    interpretation = await cultural_agent.interpret_async(
         object_id=request.object_id,
         lens=request.cultural_lens,
         facts=facts
@@ -182,17 +764,57 @@ def generate_narration_audio(request: AudioRequest):
         'interpretation': interpretation
     }, request.language)
     
-    # Generate audio
-    audio_data = audio_agent.create_audio_response(narration_text, request.language)
+    return await audio_response(
+        http_request, request, narration_text, f"narration_{request.object_id}_{request.language}.mp3"
+    )
+
+
+async def audio_response(http_request: Request, request: AudioRequest, text: str, filename: str):
+    """Stream fresh synthesis chunk by chunk, or serve the cached MP3 from disk"""
+    require_agents("audio")
+    if request.stream:
+        chunks = await audio_agent.create_audio_stream(text, request.language)
+        if chunks:
+            return StreamingResponse(
+                chunks,
+                media_type="audio/mpeg",
+                headers={"Content-Disposition": f"attachment; filename={filename}"}
+            )
+        return {"error": "Failed to generate audio", "text": text}
     
-    if audio_data:
-        return StreamingResponse(
-            BytesIO(audio_data),
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": f"attachment; filename=narration_{request.object_id}_{request.language}.mp3"}
-        )
+    # Generate audio (served from the on-disk cache after the first synthesis)
+    audio_path = await asyncio.to_thread(audio_agent.create_audio_file, text, request.language)
+    
+    if audio_path:
+        return audio_file_response(http_request, audio_path, filename)
     else:
-        return {"error": "Failed to generate audio", "text": narration_text}
+        return {"error": "Failed to generate audio", "text": text}
+
+
+@app.post("/audio/pretranslate")
+def pretranslate_audio_text(request: TranslationRequest):
+    """Translate a landmark's intro and narration into many languages up front"""
+    facts = knowledge_agent.get_facts(request.object_id)
+    interpretation = cultural_agent.interpret(
+        object_id=request.object_id,
+        lens=request.cultural_lens,
+        facts=facts
+    )
+    
+    intro_text = audio_agent.generate_landmark_intro(
+        facts.get('name', 'this landmark'),
+        facts.get('location', 'an amazing place')
+    )
+    narration_text = audio_agent.generate_narration({
+        'facts': facts,
+        'interpretation': interpretation
+    })
+    
+    return {
+        "object_id": request.object_id,
+        "intro": audio_agent.pretranslate(intro_text, request.languages),
+        "narration": audio_agent.pretranslate(narration_text, request.languages)
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+# Shared service modules (caching, networking, metrics)
@@ -0,0 +1,133 @@
+"""
+Agent registry - agents are registered as factories and built on first use,
+so importing main.py loads no SDKs and a missing API key only disables the
+agents that need it instead of failing the whole app at boot
+
+Readiness (/readyz) builds the required agents; liveness (/healthz) never
+touches them.
+"""
+import time
+import threading
+
+from services.metrics import registry
+
+AGENT_BUILD_SECONDS = registry.histogram(
+    "agent_build_duration_seconds", "Time to construct an agent (SDK imports included)", ("agent", "outcome")
+)
+
+
+class AgentUnavailable(Exception):
+    """An agent could not be built (missing key, SDK not installed, ...)"""
+
+    def __init__(self, name: str, error: Exception, retry_in: float):
+        super().__init__(f"{name} agent unavailable: {error}")
+        self.name = name
+        self.error = error
+        self.retry_in = retry_in
+
+
+class _Entry:
+    __slots__ = ("factory", "required", "instance", "error", "failed_at", "build_seconds", "lock")
+
+    def __init__(self, factory, required: bool):
+        self.factory = factory
+        self.required = required
+        self.instance = None
+        self.error = None
+        self.failed_at = 0.0
+        self.build_seconds = None
+        self.lock = threading.Lock()
+
+
+class AgentRegistry:
+    def __init__(self, retry_after: float = 30.0):
+        # A failed build is retried after this many seconds (a key may be added, an outage may end)
+        self.retry_after = retry_after
+        self._entries = {}
+
+    def register(self, name: str, factory, required: bool = True) -> None:
+        """factory() -> agent; required agents gate readiness"""
+        self._entries[name] = _Entry(factory, required)
+
+    def get(self, name: str):
+        """The agent, built once on first call; raises AgentUnavailable if it cannot be built"""
+        entry = self._entries[name]
+        if entry.instance is not None:
+            return entry.instance
+        with entry.lock:
+            if entry.instance is not None:
+                return entry.instance
+            since_failure = time.monotonic() - entry.failed_at
+            if entry.error is not None and since_failure < self.retry_after:
+                raise AgentUnavailable(name, entry.error, self.retry_after - since_failure)
+
+            started = time.perf_counter()
+            try:
+                instance = entry.factory()
+            except Exception as e:
+                AGENT_BUILD_SECONDS.observe(time.perf_counter() - started, agent=name, outcome="error")
+                print(f"⚠️  {name} agent unavailable: {e}")
+                entry.error = e
+                entry.failed_at = time.monotonic()
+                raise AgentUnavailable(name, e, self.retry_after) from e
+            entry.build_seconds = time.perf_counter() - started
+            AGENT_BUILD_SECONDS.observe(entry.build_seconds, agent=name, outcome="ok")
+            entry.instance = instance
+            entry.error = None
+            return instance
+
+    def names(self) -> list:
+        return list(self._entries)
+
+    def lazy(self, name: str) -> "LazyAgent":
+        return LazyAgent(self, name)
+
+    def warm(self, names: list = None) -> dict:
+        """Build the given agents (default: the required ones); name -> error or None"""
+        results = {}
+        for name in names or [n for n, e in self._entries.items() if e.required]:
+            try:
+                self.get(name)
+                results[name] = None
+            except AgentUnavailable as e:
+                results[name] = str(e.error)
+        return results
+
+    def ready(self) -> bool:
+        return all(e.instance is not None for e in self._entries.values() if e.required)
+
+    def stats(self) -> dict:
+        agents = {}
+        for name, entry in self._entries.items():
+            if entry.instance is not None:
+                state = "ready"
+            elif entry.error is not None:
+                state = "failed"
+            else:
+                state = "not_built"
+            agents[name] = {
+                "state": state,
+                "required": entry.required,
+                "build_seconds": round(entry.build_seconds, 4) if entry.build_seconds is not None else None,
+                "error": str(entry.error) if entry.error is not None else None
+            }
+        return agents
+
+
+class LazyAgent:
+    """
+    Stand-in for a module-level agent: the first attribute access builds the
+    real agent through the registry, so endpoint code reads as before
+    """
+    __slots__ = ("_registry", "_name")
+
+    def __init__(self, registry: AgentRegistry, name: str):
+        self._registry = registry
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+
+# Process-wide registry; main.py registers the agents
+agents = AgentRegistry()
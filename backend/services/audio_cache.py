@@ -0,0 +1,146 @@
+"""
+Audio cache - synthesized MP3s on disk, addressed by a hash of every synthesis parameter
+"""
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class AudioCache:
+    """
+    Size-bounded LRU directory of MP3 files. Writes are atomic (temp file +
+    rename) so a concurrent reader never sees a partially written file.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 500 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = sum(p.stat().st_size for p in self.directory.glob("*.mp3"))
+
+    @staticmethod
+    def make_key(text: str, language: str, voice_id: str, model_id: str, voice_settings: dict) -> str:
+        """Content hash of the full synthesis request"""
+        payload = json.dumps({
+            "text": text,
+            "language": language,
+            "voice_id": voice_id,
+            "model_id": model_id,
+            "voice_settings": voice_settings
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}.mp3"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Path of the cached MP3, or None on miss. Hits refresh the LRU clock."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Atomically store an MP3 and evict least-recently-used files if over budget"""
+        path = self.path_for(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self._install(tmp_path, path, len(data))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return path
+
+    def writer(self, key: str) -> "AudioCacheWriter":
+        """Incremental writer for streamed audio; the entry appears only on commit()"""
+        return AudioCacheWriter(self, key)
+
+    def _install(self, tmp_path: str, path: Path, size: int) -> None:
+        """Rename a finished temp file into place; an overwritten entry's bytes are released"""
+        with self._lock:
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self._size += size - replaced
+            if self._size > self.max_bytes:
+                self._evict(keep=path)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "disk",
+            "directory": str(self.directory),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+    def _evict(self, keep: Path) -> None:
+        """Delete oldest-accessed files until the directory fits the budget"""
+        files = []
+        for p in self.directory.glob("*.mp3"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+
+        self._size = sum(size for _, size, _ in files)
+        for _, size, p in files:
+            if self._size <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.evictions += 1
+
+
+class AudioCacheWriter:
+    """Tees streamed chunks into a temp file that is renamed into place on commit"""
+
+    def __init__(self, cache: AudioCache, key: str):
+        self.cache = cache
+        self.path = cache.path_for(key)
+        fd, self._tmp_path = tempfile.mkstemp(dir=cache.directory, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> Path:
+        self._file.close()
+        self.cache._install(self._tmp_path, self.path, self.size)
+        return self.path
+
+    def abort(self) -> None:
+        """Discard a partial stream (upstream error or client disconnect)"""
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.unlink(self._tmp_path)
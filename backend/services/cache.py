@@ -0,0 +1,225 @@
+"""
+Cache backends - in-process LRU and on-disk SQLite key/value stores with TTL
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+CACHE_DIR = Path(os.getenv("CACHE_DIR", Path(__file__).parent.parent / "cache"))
+
+# Every cache created through create_cache() is registered here for /cache/stats
+_registry = {}
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache with optional TTL"""
+
+    backend_name = "memory"
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, stale_ttl: float = 0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl  # how long past ttl an entry may still be served by lookup()
+        self._data = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str):
+        """Return the cached value or None if missing/expired"""
+        found = self.lookup(key, allow_stale=False)
+        return found[0] if found else None
+
+    def lookup(self, key: str, allow_stale: bool = True):
+        """
+        Return (value, is_fresh) or None. With allow_stale, entries past ttl but
+        within stale_ttl are returned with is_fresh=False so the caller can serve
+        them while it refreshes in the background.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self._expired(stored_at):
+                del self._data[key]
+                self.misses += 1
+                return None
+            fresh = not self._stale(stored_at)
+            if not fresh and not allow_stale:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return value, fresh
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def items(self) -> list:
+        """Snapshot of all live (key, value) pairs, oldest first"""
+        with self._lock:
+            return [(k, v) for k, (v, stored_at) in self._data.items() if not self._expired(stored_at)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": self.backend_name,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0
+        }
+
+    def _stale(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl + self.stale_ttl
+
+
+class SQLiteCache(MemoryCache):
+    """On-disk LRU cache with optional TTL; values must be JSON-serializable"""
+
+    backend_name = "sqlite"
+
+    def __init__(self, path: Path, max_entries: int = 10000, ttl: Optional[float] = None, stale_ttl: float = 0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON entries(accessed_at)")
+        self._conn.commit()
+
+    def lookup(self, key: str, allow_stale: bool = True):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, stored_at = row
+            if self._expired(stored_at):
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            fresh = not self._stale(stored_at)
+            if not fresh and not allow_stale:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return json.loads(value), fresh
+
+    def set(self, key: str, value) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            excess = len(self) - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY accessed_at LIMIT ?)", (excess,)
+                )
+                self.evictions += excess
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def items(self) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, stored_at FROM entries ORDER BY accessed_at"
+            ).fetchall()
+        return [(k, json.loads(v)) for k, v, stored_at in rows if not self._expired(stored_at)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+def create_cache(name: str, max_entries: int = 1024, ttl: Optional[float] = None,
+                 backend: Optional[str] = None, stale_ttl: float = 0) -> MemoryCache:
+    """
+    Build a named cache. Backend is "memory" or "sqlite" (defaults to CACHE_BACKEND env);
+    SQLite caches live in CACHE_DIR/<name>.db and survive restarts.
+    """
+    backend = (backend or os.getenv("CACHE_BACKEND", "memory")).lower()
+    if backend == "sqlite":
+        cache = SQLiteCache(CACHE_DIR / f"{name}.db", max_entries=max_entries, ttl=ttl, stale_ttl=stale_ttl)
+    else:
+        cache = MemoryCache(max_entries=max_entries, ttl=ttl, stale_ttl=stale_ttl)
+    _registry[name] = cache
+    return cache
+
+
+def register_stats(name: str, source) -> None:
+    """Expose any object with a stats() method on /cache/stats"""
+    _registry[name] = source
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for every registered cache"""
+    return {name: cache.stats() for name, cache in _registry.items()}
@@ -0,0 +1,389 @@
+"""
+Catalogue store - every per-landmark record (facts, bias data, community
+sentiment, curated interpretations) in one SQLite file, read lazily by
+(kind, id) through a bounded in-memory hot set
+
+Startup only opens the database, so boot time and RSS stay flat however large
+the catalogue grows. The JSON files in data/ remain the editable source: a file
+that changed since the last import is re-imported when the catalogue is opened
+(CATALOGUE_AUTO_IMPORT=false turns this off), while the app runs (watch(),
+every CATALOGUE_WATCH_INTERVAL seconds) and by hand with import_catalogue.py.
+Async callers use get_async(), which never waits on disk or on the import.
+A reload swaps in the new records atomically and evicts only the ones that
+changed; the other caches are keyed on content (prompt, text, image hash), so
+edited facts simply produce new keys there.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, Iterable, Optional
+
+from services.metrics import registry
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+CATALOGUE_PATH = Path(os.getenv("CATALOGUE_PATH", DATA_DIR / "catalogue.db"))
+
+# kind -> source file in data/, each a JSON object {id: record}
+SOURCES = {
+    "landmark": "landmarks.json",
+    "bias": "bias_data.json",
+    "sentiment": "community_sentiment.json",
+    "interpretation": "interpretations.json"
+}
+
+# Strings up to this length (names, places, emotion labels) are interned
+INTERN_MAX_LEN = 64
+
+_MISSING = object()  # cached negative lookup
+
+RELOADS = registry.counter("catalogue_reloads_total", "Catalogue source file reloads", ("kind", "outcome"))
+RELOAD_SECONDS = registry.histogram(
+    "catalogue_reload_duration_seconds", "Time to parse, diff and swap in changed source files"
+)
+RECORDS_CHANGED = registry.counter(
+    "catalogue_records_changed_total", "Records added, changed or removed by reloads", ("kind",)
+)
+
+
+def compact(value):
+    """
+    Intern dict keys and short strings, so records in the hot set share one
+    copy of every field name and repeated value instead of one per record
+    """
+    if isinstance(value, dict):
+        return {sys.intern(key): compact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [compact(item) for item in value]
+    if isinstance(value, str) and len(value) <= INTERN_MAX_LEN:
+        return sys.intern(value)
+    return value
+
+
+def encode(record) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+class Catalogue:
+    """
+    Records returned by get() are shared with the hot set and read-only:
+    callers copy before mutating. Fields computed from a record (the facts
+    summary) are added once per load through derive(), not per request.
+    """
+
+    def __init__(self, path: Path = CATALOGUE_PATH, hot_entries: int = None, data_dir: Path = DATA_DIR,
+                 auto_import: bool = None):
+        self.path = Path(path)
+        self.data_dir = Path(data_dir)
+        self.hot_entries = hot_entries or int(os.getenv("CATALOGUE_HOT_ENTRIES", "4096"))
+        self.auto_import = auto_import if auto_import is not None else (
+            os.getenv("CATALOGUE_AUTO_IMPORT", "true").lower() == "true"
+        )
+        self._hot = OrderedDict()  # (kind, id) -> compact record or _MISSING
+        self._derive = {}  # kind -> fn(record) -> record, run when a record is loaded
+        self._lock = threading.RLock()
+        self._conn = None
+        self._reload_lock = threading.RLock()
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._failed = {}  # kind -> (mtime, size) of a source that did not parse
+        self.reloads = 0
+        self.last_reload_s = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open on first use (caller holds the lock)"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                "kind TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (kind, id)) WITHOUT ROWID"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                "kind TEXT PRIMARY KEY, file TEXT NOT NULL, mtime REAL NOT NULL, "
+                "size INTEGER NOT NULL, records INTEGER NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+            if self.auto_import:
+                self.sync_sources()
+        return self._conn
+
+    def derive(self, kind: str, fn) -> None:
+        """
+        Run fn(record) -> record on every `kind` record as it is loaded into the
+        hot set, so derived fields are computed once per load (and again after
+        a reload changes the record) instead of on every request
+        """
+        with self._lock:
+            self._derive[kind] = fn
+            for key in [key for key in self._hot if key[0] == kind]:
+                del self._hot[key]
+
+    def open(self) -> None:
+        """Open the database and run the auto-import now instead of on the first lookup"""
+        with self._lock:
+            self._connection()
+
+    def get(self, kind: str, id: str) -> Optional[dict]:
+        key = (kind, id)
+        with self._lock:
+            record = self._hot_get(key)
+            if record is not None:
+                return None if record is _MISSING else record
+
+            self.misses += 1
+            row = self._connection().execute(
+                "SELECT data FROM records WHERE kind = ? AND id = ?", key
+            ).fetchone()
+            if row:
+                record = compact(json.loads(row[0]))
+                if kind in self._derive:
+                    record = self._derive[kind](record)
+            else:
+                record = _MISSING
+            self._hot[key] = record
+            while len(self._hot) > self.hot_entries:
+                self._hot.popitem(last=False)
+                self.evictions += 1
+            return None if record is _MISSING else record
+
+    async def get_async(self, kind: str, id: str) -> Optional[dict]:
+        """
+        get() for the event loop: a hot-set hit returns inline; a miss (SQLite
+        read, or the import on first use) or a busy lock goes to a worker
+        thread, so the loop never waits on disk or on another thread
+        """
+        if self._conn is not None and self._lock.acquire(blocking=False):
+            try:
+                record = self._hot_get((kind, id))
+                if record is not None:
+                    return None if record is _MISSING else record
+            finally:
+                self._lock.release()
+        return await asyncio.to_thread(self.get, kind, id)
+
+    def _hot_get(self, key: tuple):
+        """Hot-set entry (record or _MISSING) marked recently used, or None (caller holds the lock)"""
+        record = self._hot.get(key)
+        if record is not None:
+            self._hot.move_to_end(key)
+            self.hits += 1
+        return record
+
+    def ids(self, kind: str, page_size: int = 1000) -> Iterator[str]:
+        """Every id of a kind in order, fetched a page at a time"""
+        last = ""
+        while True:
+            with self._lock:
+                page = [row[0] for row in self._connection().execute(
+                    "SELECT id FROM records WHERE kind = ? AND id > ? ORDER BY id LIMIT ?",
+                    (kind, last, page_size)
+                )]
+            yield from page
+            if len(page) < page_size:
+                return
+            last = page[-1]
+
+    def count(self, kind: str) -> int:
+        """Full index scan: for tools and tests, not the request path"""
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COUNT(*) FROM records WHERE kind = ?", (kind,)
+            ).fetchone()[0]
+
+    def put_many(self, kind: str, records: Iterable[tuple]) -> int:
+        """Bulk upsert of (id, record) pairs in one transaction"""
+        with self._lock:
+            conn = self._connection()
+            written = 0
+            with conn:
+                for id, record in records:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO records (kind, id, data) VALUES (?, ?, ?)",
+                        (kind, id, encode(record))
+                    )
+                    self._hot.pop((kind, id), None)
+                    written += 1
+            return written
+
+    def import_file(self, kind: str, path: Path) -> list:
+        """
+        Make `kind` match a JSON source file ({id: record}); only records whose
+        content changed are rewritten and dropped from the hot set.
+        Returns the ids that were added, changed or removed.
+        """
+        path = Path(path)
+        with self._reload_lock:
+            with self._lock:
+                self._connection()
+            return self._apply({kind: self._load_source(path)})[kind]
+
+    def sync_sources(self) -> dict:
+        """
+        Reload every source file whose mtime or size changed, all of them as
+        one snapshot; kind -> changed ids. A file that cannot be parsed (e.g.
+        caught mid-write) is skipped and retried on the next call, and readers
+        keep the previous snapshot.
+        """
+        # Lock order is _lock -> _reload_lock while the first lookup opens the
+        # database; once it is open only _reload_lock -> _lock is taken
+        with self._lock:
+            conn = self._connection()
+            known = {row[0]: row[1:] for row in conn.execute("SELECT kind, mtime, size FROM sources")}
+
+        with self._reload_lock:
+            started = time.perf_counter()
+            snapshot = {}
+            for kind, filename in SOURCES.items():
+                path = self.data_dir / filename
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue  # records imported earlier (or bulk-loaded) stay as they are
+                if known.get(kind) == (stat.st_mtime, stat.st_size):
+                    continue
+                try:
+                    snapshot[kind] = self._load_source(path)
+                except (OSError, ValueError) as e:
+                    if self._failed.get(kind) != (stat.st_mtime, stat.st_size):
+                        # Once per version of the file, not on every poll
+                        self._failed[kind] = (stat.st_mtime, stat.st_size)
+                        print(f"⚠️  Could not import {filename}: {e}")
+                        RELOADS.inc(kind=kind, outcome="error")
+                    continue
+                self._failed.pop(kind, None)
+            if not snapshot:
+                return {}
+
+            updated = self._apply(snapshot)
+            elapsed = time.perf_counter() - started
+            RELOAD_SECONDS.observe(elapsed)
+            self.reloads += 1
+            self.last_reload_s = elapsed
+            for kind, changed in updated.items():
+                RELOADS.inc(kind=kind, outcome="ok")
+                RECORDS_CHANGED.inc(len(changed), kind=kind)
+                print(f"✅ Catalogue: imported {SOURCES[kind]} ({len(changed)} records changed)")
+            return updated
+
+    def _load_source(self, path: Path) -> tuple:
+        """Parse and encode a source file, outside every lock: (path, stat, {id: encoded})"""
+        stat = path.stat()
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        if not isinstance(records, dict):
+            raise ValueError(f"{path.name} must be a JSON object of id -> record")
+        return path, stat, {id: encode(record) for id, record in records.items()}
+
+    def _apply(self, snapshot: dict) -> dict:
+        """
+        Diff and write the new records on a separate connection. WAL keeps the
+        uncommitted transaction invisible to readers, so lookups continue on
+        the old snapshot; commit and hot-set eviction then happen together
+        under the reader lock, so no lookup sees a half-applied reload.
+        """
+        writer = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        try:
+            writer.execute("BEGIN IMMEDIATE")
+            changed = {}
+            for kind, (path, stat, records) in snapshot.items():
+                ids = []
+                for id, data in records.items():
+                    row = writer.execute(
+                        "SELECT data FROM records WHERE kind = ? AND id = ?", (kind, id)
+                    ).fetchone()
+                    if row is None or row[0] != data:
+                        writer.execute(
+                            "INSERT OR REPLACE INTO records (kind, id, data) VALUES (?, ?, ?)",
+                            (kind, id, data)
+                        )
+                        ids.append(id)
+                removed = [row[0] for row in writer.execute("SELECT id FROM records WHERE kind = ?", (kind,))
+                           if row[0] not in records]
+                writer.executemany("DELETE FROM records WHERE kind = ? AND id = ?", [(kind, id) for id in removed])
+                ids.extend(removed)
+                writer.execute(
+                    "INSERT OR REPLACE INTO sources (kind, file, mtime, size, records) VALUES (?, ?, ?, ?, ?)",
+                    (kind, path.name, stat.st_mtime, stat.st_size, len(records))
+                )
+                changed[kind] = ids
+
+            with self._lock:
+                writer.execute("COMMIT")
+                for kind, ids in changed.items():
+                    for id in ids:
+                        self._hot.pop((kind, id), None)
+            return changed
+        except BaseException:
+            if writer.in_transaction:
+                writer.execute("ROLLBACK")
+            raise
+        finally:
+            writer.close()
+
+    def watch(self, interval: float = 2.0) -> None:
+        """Poll the source files every `interval` seconds and reload the ones that changed"""
+        if self._watcher is not None:
+            return
+        self._stop_watching.clear()
+
+        def loop():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.sync_sources()
+                except Exception as e:
+                    print(f"⚠️  Catalogue reload failed: {e}")
+
+        self._watcher = threading.Thread(target=loop, name="catalogue-watch", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def close(self) -> None:
+        self.stop_watching()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._hot.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            sources = {
+                kind: {"file": file, "records": records}
+                for kind, file, records in self._connection().execute("SELECT kind, file, records FROM sources")
+            }
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "hot_entries": len(self._hot),
+                "max_hot_entries": self.hot_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "reloads": self.reloads,
+                "last_reload_s": self.last_reload_s,
+                "sources": sources
+            }
+
+
+# Process-wide catalogue shared by every agent (opened on first lookup)
+catalogue = Catalogue()
@@ -0,0 +1,142 @@
+"""
+Geospatial index - fixed lat/lon grid with haversine filtering for radius,
+k-nearest and bounding-box queries over landmark coordinates
+"""
+import json
+import math
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+class GeoPoint(NamedTuple):
+    id: str
+    lat: float
+    lon: float
+    data: dict
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeoIndex:
+    """
+    Points are bucketed into cell_deg x cell_deg cells. A query only visits the
+    cells that overlap its search window, so cost depends on local density,
+    not catalogue size.
+    """
+
+    def __init__(self, cell_deg: float = 0.5):
+        self.cell_deg = cell_deg
+        self.lon_cells = int(round(360 / cell_deg))
+        self.cells = {}   # (lat_cell, lon_cell) -> [GeoPoint]
+        self.points = []
+
+    @classmethod
+    def from_file(cls, path: Path, cell_deg: float = 0.5) -> "GeoIndex":
+        """Load landmark_coordinates.json ([{id, name, country, latitude, longitude}, ...])"""
+        index = cls(cell_deg)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"⚠️  Could not load landmark coordinates: {e}")
+            return index
+
+        for record in records:
+            index.add(record["id"], record["latitude"], record["longitude"], {
+                "name": record.get("name", record["id"]),
+                "country": record.get("country")
+            })
+        print(f"✅ Geo index: {len(index)} landmarks")
+        return index
+
+    def add(self, id: str, lat: float, lon: float, data: dict = None) -> None:
+        point = GeoPoint(id, float(lat), float(lon), data or {})
+        self.points.append(point)
+        self.cells.setdefault(self._cell(point.lat, point.lon), []).append(point)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def nearby(self, lat: float, lon: float, radius_km: float, k: Optional[int] = None) -> list:
+        """(distance_km, GeoPoint) within radius_km, nearest first, at most k"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        # Longitude half-width of the circle's bounding box; near the poles it spans every meridian
+        sin_r = math.sin(min(radius_km / EARTH_RADIUS_KM, math.pi / 2))
+        cos_lat = math.cos(math.radians(lat))
+        if abs(lat) + dlat >= 90 or sin_r >= cos_lat:
+            dlon = 180.0
+        else:
+            dlon = math.degrees(math.asin(sin_r / cos_lat))
+
+        results = []
+        for point in self._scan(lat - dlat, lat + dlat, lon - dlon, lon + dlon):
+            if abs(point.lat - lat) > dlat:  # cheap reject before the trig
+                continue
+            distance = haversine_km(lat, lon, point.lat, point.lon)
+            if distance <= radius_km:
+                results.append((distance, point))
+        results.sort(key=lambda item: item[0])
+        return results[:k] if k else results
+
+    def nearest(self, lat: float, lon: float, k: int = 1, start_radius_km: float = None,
+                max_radius_km: float = math.pi * EARTH_RADIUS_KM) -> list:
+        """k nearest points regardless of distance, widening the search radius as needed"""
+        if not self.points:
+            return []
+        if start_radius_km is None:
+            # Radius expected to hold ~4k points if they were spread evenly over the globe
+            share = min(1.0, k / len(self.points))
+            start_radius_km = max(1.0, 4 * EARTH_RADIUS_KM * math.sqrt(share))
+        radius = min(start_radius_km, max_radius_km)
+        while True:
+            results = self.nearby(lat, lon, radius, k)
+            if len(results) >= min(k, len(self.points)) or radius >= max_radius_km:
+                return results
+            radius = min(radius * 4, max_radius_km)
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float,
+             limit: Optional[int] = None) -> list:
+        """Points inside the box; min_lon > max_lon means the box crosses the antimeridian"""
+        if min_lon > max_lon:
+            max_lon += 360
+        results = []
+        for point in self._scan(min_lat, max_lat, min_lon, max_lon):
+            lon = point.lon if point.lon >= min_lon else point.lon + 360
+            if min_lat <= point.lat <= max_lat and min_lon <= lon <= max_lon:
+                results.append(point)
+                if limit and len(results) >= limit:
+                    break
+        return results
+
+    def _cell(self, lat: float, lon: float) -> tuple:
+        return (int(math.floor(lat / self.cell_deg)),
+                int(math.floor(((lon + 180) % 360) / self.cell_deg)) % self.lon_cells)
+
+    def _scan(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float):
+        """Every point in cells overlapping the window (longitudes may exceed +/-180)"""
+        lat_start = int(math.floor(max(min_lat, -90) / self.cell_deg))
+        lat_end = int(math.floor(min(max_lat, 90) / self.cell_deg))
+        lon_start = int(math.floor((min_lon + 180) / self.cell_deg))
+        lon_end = int(math.floor((max_lon + 180) / self.cell_deg))
+        if lon_end - lon_start + 1 >= self.lon_cells:
+            lon_start, lon_end = 0, self.lon_cells - 1
+
+        # A window covering more cells than there are points: a plain scan is cheaper
+        if (lat_end - lat_start + 1) * (lon_end - lon_start + 1) > len(self.points):
+            yield from self.points
+            return
+
+        for lat_cell in range(lat_start, lat_end + 1):
+            for lon_cell in range(lon_start, lon_end + 1):
+                bucket = self.cells.get((lat_cell, lon_cell % self.lon_cells))
+                if bucket:
+                    yield from bucket
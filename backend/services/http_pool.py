@@ -0,0 +1,94 @@
+"""
+Shared outbound HTTP pool - one keep-alive connection pool (HTTP/2 when the
+h2 package is installed) used by every SDK client and direct API call, so
+TCP/TLS handshakes are paid once per upstream host instead of once per request
+
+httpx is imported and the clients are built on first use, so a process that
+never calls out (health checks, cached responses) does not pay for them.
+"""
+import os
+import threading
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401  (httpx negotiates HTTP/2 via ALPN only when h2 is importable)
+        return True
+    except ImportError:
+        return False
+
+
+class HTTPPool:
+    """
+    A sync httpx.Client and an async httpx.AsyncClient sharing the same limits.
+    Hand `client` to OpenAI()/Anthropic() and `async_client` to their async
+    counterparts through the SDKs' http_client argument.
+    """
+
+    def __init__(self, max_connections: int = None, max_keepalive: int = None,
+                 keepalive_expiry: float = None, connect_timeout: float = None,
+                 timeout: float = None, http2: bool = None, verify=True):
+        self.http2_requested = http2
+        self.max_connections = max_connections or int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+        self.max_keepalive = max_keepalive or int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+        # Long read timeout for LLM/TTS responses, short connect timeout to fail fast
+        self.read_timeout = timeout or float(os.getenv("HTTP_TIMEOUT", "60"))
+        self.connect_timeout = connect_timeout or float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        self.verify = verify
+        self.http2 = None  # resolved when the clients are built
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._build()
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._build()
+        return self._async_client
+
+    def _build(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                return
+            import httpx
+
+            available = http2_available()
+            self.http2 = available if self.http2_requested is None else (self.http2_requested and available)
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry
+            )
+            timeout = httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+            self._async_client = httpx.AsyncClient(limits=limits, timeout=timeout,
+                                                   http2=self.http2, verify=self.verify)
+            self._client = httpx.Client(limits=limits, timeout=timeout, http2=self.http2, verify=self.verify)
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._async_client is not None:
+            await self._async_client.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive,
+            "keepalive_expiry": self.keepalive_expiry
+        }
+
+
+# Process-wide pool; main.py passes it to every agent explicitly
+http_pool = HTTPPool()
@@ -0,0 +1,150 @@
+"""
+Vision result cache - content-addressed on an exact digest plus a perceptual hash
+so near-identical photos of the same landmark skip the GPT-4o call
+"""
+import io
+import hashlib
+import threading
+from typing import NamedTuple, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it only exact matches are served
+    Image = None
+
+
+class ImageFingerprint(NamedTuple):
+    digest: str
+    phash: Optional[int]
+
+
+def fingerprint(source) -> ImageFingerprint:
+    """
+    SHA-256 of the raw bytes plus a 64-bit difference hash (dHash) of the pixels.
+    source is raw bytes or a seekable file (hashed in chunks, never read whole).
+    """
+    if isinstance(source, (bytes, bytearray)):
+        digest = hashlib.sha256(source).hexdigest()
+    else:
+        sha = hashlib.sha256()
+        source.seek(0)
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            sha.update(chunk)
+        digest = sha.hexdigest()
+    return ImageFingerprint(digest, perceptual_hash(source))
+
+
+def perceptual_hash(source) -> Optional[int]:
+    """64-bit dHash: compare neighbouring pixels of a 9x8 grayscale thumbnail"""
+    if Image is None:
+        return None
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        else:
+            source.seek(0)
+        img = Image.open(source)
+        img.draft("L", (64, 64))  # JPEG: decode at reduced scale, much cheaper than a full decode
+        pixels = list(img.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    except Exception:
+        return None
+
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class VisionCache:
+    """
+    Two-level lookup in front of VisionAgent.recognize:
+    1. exact digest match in the backend
+    2. nearest perceptual hash within max_distance bits
+    """
+
+    def __init__(self, backend, max_distance: int = 6):
+        self.backend = backend
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+        # digest -> phash index for near-duplicate search (rebuilt from persisted entries)
+        self._phashes = {}
+        for digest, entry in backend.items():
+            if entry.get("phash") is not None:
+                self._phashes[digest] = entry["phash"]
+
+    def lookup(self, fp: ImageFingerprint) -> Optional[dict]:
+        """Return a cached recognition result, or None on miss"""
+        entry = self.backend.get(fp.digest)
+        if entry:
+            self.exact_hits += 1
+            return self._tag(entry["result"], "exact", 0)
+
+        if fp.phash is not None and self.max_distance > 0:
+            match = self._nearest(fp.phash)
+            if match:
+                digest, distance = match
+                entry = self.backend.get(digest)
+                if entry:
+                    self.near_hits += 1
+                    return self._tag(entry["result"], "perceptual", distance)
+                # Evicted or expired in the backend - drop from the index
+                with self._lock:
+                    self._phashes.pop(digest, None)
+
+        self.misses += 1
+        return None
+
+    def store(self, fp: ImageFingerprint, result: dict) -> None:
+        """Cache a successful recognition result"""
+        if result.get("error"):
+            return
+        self.backend.set(fp.digest, {"phash": fp.phash, "result": result})
+        if fp.phash is not None:
+            with self._lock:
+                self._phashes[fp.digest] = fp.phash
+                # The backend evicts independently; keep the index from growing without bound
+                if len(self._phashes) > 2 * self.backend.max_entries:
+                    self._phashes = {
+                        d: e["phash"] for d, e in self.backend.items() if e.get("phash") is not None
+                    }
+
+    def stats(self) -> dict:
+        lookups = self.exact_hits + self.near_hits + self.misses
+        hits = self.exact_hits + self.near_hits
+        return {
+            "exact_hits": self.exact_hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "max_distance": self.max_distance,
+            "perceptual_hashing": Image is not None,
+            "backend": self.backend.stats()
+        }
+
+    def _nearest(self, phash: int):
+        best = None
+        with self._lock:
+            candidates = list(self._phashes.items())
+        for digest, other in candidates:
+            distance = hamming_distance(phash, other)
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (digest, distance)
+                if distance == 0:
+                    break
+        return best
+
+    def _tag(self, result: dict, match: str, distance: int) -> dict:
+        tagged = dict(result)
+        tagged["cache"] = {"match": match, "distance": distance}
+        return tagged
@@ -0,0 +1,101 @@
+"""
+Image preprocessing before the vision call - decode at reduced scale, strip
+EXIF, resize and re-encode so we upload (and pay for) far fewer bytes/tokens
+"""
+import io
+import math
+from typing import NamedTuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it images are sent as uploaded
+    Image = None
+    ImageOps = None
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+# Above the 512px low-detail grid, so detail="auto" can still choose "high" for large photos
+DEFAULT_MAX_EDGE = 1024
+
+
+class PreparedImage(NamedTuple):
+    data: bytes
+    mime: str
+    detail: str
+    report: dict
+
+
+def read_source(source) -> bytes:
+    """Full content of raw bytes or a seekable file-like source"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    source.seek(0)
+    return source.read()
+
+
+def estimate_image_tokens(width: int, height: int, detail: str) -> int:
+    """OpenAI vision token cost: 85 base + 170 per 512px tile at high detail"""
+    if detail == "low":
+        return 85
+    # Fit within 2048x2048, then scale so the shortest side is at most 768
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def prepare_image(source, max_edge: int = DEFAULT_MAX_EDGE, quality: int = 85, fmt: str = "JPEG",
+                  detail: str = "auto", low_detail_edge: int = 512) -> PreparedImage:
+    """
+    source: raw bytes or a file-like object (e.g. the upload's spooled file).
+    detail="auto" picks "low" when the resized image fits OpenAI's 512px
+    low-detail grid anyway (small uploads), otherwise "high". A max_edge of
+    low_detail_edge or less therefore always means "low".
+    """
+    raw = source if isinstance(source, (bytes, bytearray)) else None
+    original_bytes = len(raw) if raw is not None else None
+
+    if Image is None:
+        data = read_source(source)
+        return PreparedImage(data, "image/jpeg", "high" if detail == "auto" else detail, {
+            "preprocessed": False,
+            "original_bytes": len(data),
+            "sent_bytes": len(data)
+        })
+
+    stream = io.BytesIO(raw) if raw is not None else source
+    if original_bytes is None:
+        stream.seek(0, io.SEEK_END)
+        original_bytes = stream.tell()
+        stream.seek(0)
+
+    img = Image.open(stream)
+    original_size = img.size
+    # JPEG: let libjpeg decode at 1/2, 1/4 or 1/8 scale - never materializes the full-size bitmap
+    img.draft("RGB", (max_edge, max_edge))
+    img = ImageOps.exif_transpose(img)  # bake in orientation before EXIF is dropped
+    img = img.convert("RGB")
+    img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    fmt = fmt.upper()
+    out = io.BytesIO()
+    img.save(out, fmt, quality=quality, optimize=True)  # no exif= argument, so metadata is stripped
+    data = out.getvalue()
+
+    if detail == "auto":
+        detail = "low" if max(img.size) <= low_detail_edge else "high"
+
+    original_tokens = estimate_image_tokens(*original_size, "high")
+    sent_tokens = estimate_image_tokens(*img.size, detail)
+    return PreparedImage(data, MIME_TYPES.get(fmt, "image/jpeg"), detail, {
+        "preprocessed": True,
+        "original_bytes": original_bytes,
+        "sent_bytes": len(data),
+        "bytes_saved": original_bytes - len(data),
+        "original_size": list(original_size),
+        "sent_size": list(img.size),
+        "detail": detail,
+        "estimated_image_tokens": sent_tokens,
+        "image_tokens_saved": original_tokens - sent_tokens
+    })
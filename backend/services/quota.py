@@ -0,0 +1,200 @@
+"""
+Quota manager - counts LLM tokens and TTS characters per provider, model and
+endpoint, and enforces per-minute / per-day budgets with token buckets so the
+app degrades (cached, curated or shorter content) before providers start
+answering 429
+
+Budgets come from QUOTA_<PROVIDER>_PER_MINUTE and QUOTA_<PROVIDER>_PER_DAY
+(tokens for LLM providers, characters for elevenlabs); unset means unlimited,
+but usage is still counted.
+"""
+import os
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+from services.rate_limit import TokenBucket
+
+UNITS = {"elevenlabs": "characters"}  # everything else is metered in tokens
+WINDOWS = {"minute": 60, "day": 86400}
+
+# Rough per-image cost when the request does not say (GPT-4o: 85 low, ~765 for a 1024px high)
+IMAGE_TOKENS = {"low": 85, "high": 765, "auto": 765}
+
+
+class QuotaExceeded(Exception):
+    def __init__(self, provider: str, window: str, retry_in: float):
+        super().__init__(f"{provider} {window} budget exhausted, retry in {retry_in:.0f}s")
+        self.provider = provider
+        self.window = window
+        self.retry_in = retry_in
+
+
+def estimate_request_tokens(request: dict) -> int:
+    """Upper-bound token estimate for a chat request: ~4 chars/token, images, max_tokens"""
+    tokens = 0
+    for message in request.get("messages", []):
+        content = message.get("content", "")
+        parts = content if isinstance(content, list) else [{"type": "text", "text": content}]
+        for part in parts:
+            if part.get("type") == "image_url":
+                tokens += IMAGE_TOKENS.get(part["image_url"].get("detail", "auto"), 765)
+            else:
+                tokens += len(part.get("text", "")) // 4 + 4
+    return tokens + int(request.get("max_tokens") or 500)
+
+
+def usage_tokens(response) -> Optional[int]:
+    """Billed tokens from an OpenAI or Anthropic response, if reported"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    total = getattr(usage, "total_tokens", None)
+    if total is None and hasattr(usage, "input_tokens"):
+        total = usage.input_tokens + usage.output_tokens
+    return total
+
+
+class Budget:
+    """Per-minute and per-day buckets for one provider"""
+
+    def __init__(self, provider: str, per_minute: Optional[float] = None, per_day: Optional[float] = None):
+        self.provider = provider
+        self.limits = {"minute": per_minute, "day": per_day}
+        self.buckets = {
+            window: TokenBucket(rate=limit / WINDOWS[window], capacity=limit)
+            for window, limit in self.limits.items() if limit
+        }
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> None:
+        """Take `amount` from every window or from none of them"""
+        with self._lock:
+            taken = []
+            for window, bucket in self.buckets.items():
+                # A single request bigger than the whole window is allowed once the bucket is full
+                if not bucket.try_acquire(min(amount, bucket.capacity)):
+                    for done, refund in taken:
+                        self.buckets[done].refund(refund)
+                    missing = min(amount, bucket.capacity) - bucket.available()
+                    raise QuotaExceeded(self.provider, window, missing / bucket.rate)
+                taken.append((window, min(amount, bucket.capacity)))
+
+    def adjust(self, delta: float) -> None:
+        """Reconcile an estimate with the billed amount (delta = actual - estimate)"""
+        for bucket in self.buckets.values():
+            if delta > 0:
+                bucket.consume(delta)
+            elif delta < 0:
+                bucket.refund(-delta)
+
+    def headroom(self) -> float:
+        """Fraction left in the tightest window (1.0 when unlimited)"""
+        if not self.buckets:
+            return 1.0
+        return max(0.0, min(b.available() / b.capacity for b in self.buckets.values()))
+
+    def stats(self) -> dict:
+        return {
+            "unit": UNITS.get(self.provider, "tokens"),
+            "limits": self.limits,
+            "remaining": {w: round(b.available()) for w, b in self.buckets.items()},
+            "headroom": round(self.headroom(), 3)
+        }
+
+
+class Meter:
+    """One metered upstream call; settle() with the billed amount once known"""
+
+    def __init__(self, estimate: int):
+        self.estimate = estimate
+        self.used = None
+
+    def settle(self, used: Optional[int]) -> None:
+        self.used = used if used is not None else self.estimate
+
+
+class QuotaManager:
+    def __init__(self, low_watermark: float = None):
+        # Below this fraction of any budget, agents switch to cheaper output
+        self.low_watermark = low_watermark if low_watermark is not None else float(
+            os.getenv("QUOTA_LOW_WATERMARK", "0.2")
+        )
+        self._budgets = {}
+        self._lock = threading.Lock()
+        self.usage = defaultdict(lambda: {"requests": 0, "used": 0, "rejected": 0})
+
+    def budget(self, provider: str) -> Budget:
+        with self._lock:
+            if provider not in self._budgets:
+                prefix = f"QUOTA_{provider.upper()}"
+                per_minute = os.getenv(f"{prefix}_PER_MINUTE")
+                per_day = os.getenv(f"{prefix}_PER_DAY")
+                self._budgets[provider] = Budget(
+                    provider,
+                    per_minute=float(per_minute) if per_minute else None,
+                    per_day=float(per_day) if per_day else None
+                )
+            return self._budgets[provider]
+
+    def headroom(self, provider: str) -> float:
+        return self.budget(provider).headroom()
+
+    def low(self, provider: str) -> bool:
+        return self.headroom(provider) < self.low_watermark
+
+    @contextmanager
+    def metered(self, provider: str, model: str, endpoint: str, estimate: int):
+        """
+        Reserve `estimate` before the call (raises QuotaExceeded), refund it if
+        the call fails, and reconcile with meter.settle(billed) on success:
+
+            with quota.metered("openai", model, "facts", estimate) as meter:
+                response = ...
+                meter.settle(usage_tokens(response))
+
+        A call that fails after settling (a stream cut short) is charged what
+        it settled instead of being refunded.
+        """
+        key = (provider, model, endpoint)
+        try:
+            self.budget(provider).reserve(estimate)
+        except QuotaExceeded:
+            with self._lock:
+                self.usage[key]["rejected"] += 1
+            raise
+
+        meter = Meter(estimate)
+        try:
+            yield meter
+        except BaseException:
+            if meter.used is None:
+                self.budget(provider).adjust(-estimate)
+            else:
+                self._charge(key, meter.used - estimate, meter.used)
+            raise
+
+        used = meter.used if meter.used is not None else estimate
+        self._charge(key, used - estimate, used)
+
+    def _charge(self, key: tuple, delta: int, used: int) -> None:
+        self.budget(key[0]).adjust(delta)
+        with self._lock:
+            self.usage[key]["requests"] += 1
+            self.usage[key]["used"] += used
+
+    def stats(self) -> dict:
+        providers = {}
+        with self._lock:
+            usage = sorted((key, dict(counts)) for key, counts in self.usage.items())
+        for (provider, model, endpoint), counts in usage:
+            entry = providers.setdefault(provider, {**self.budget(provider).stats(), "by_endpoint": {}})
+            entry["by_endpoint"][f"{model}:{endpoint}"] = counts
+        for provider, budget in self._budgets.items():
+            providers.setdefault(provider, {**budget.stats(), "by_endpoint": {}})
+        return providers
+
+
+# Process-wide quota state shared by every agent
+quota = QuotaManager()
@@ -0,0 +1,59 @@
+"""
+Token bucket rate limiter
+"""
+import time
+import threading
+
+
+class TokenBucket:
+    """
+    Holds up to `capacity` tokens, refilled continuously at `rate` tokens/second.
+    acquire() blocks until enough tokens are available; try_acquire() never blocks.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return True
+            return False
+
+    def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)  # a request larger than the bucket would wait forever
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate if self.rate > 0 else 1.0
+            time.sleep(wait)
+
+    def consume(self, amount: float) -> None:
+        """Take tokens unconditionally; the bucket may go negative (debt repaid by refill)"""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self.tokens
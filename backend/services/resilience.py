@@ -0,0 +1,335 @@
+"""
+Upstream resilience - per-call deadlines, jittered exponential retry on
+429/5xx/timeouts, a per-provider circuit breaker and optional hedged requests
+
+Every call goes through an Upstream (one per provider: openai, anthropic,
+elevenlabs, ...). The wrapped function receives the time left in the deadline
+and must pass it on as the SDK/httpx `timeout`, so slow responses are cut off
+instead of tying up a worker.
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Optional
+from contextlib import contextmanager
+
+from services.metrics import registry
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while a provider's breaker is open"""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open, retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class UpstreamStatusError(Exception):
+    """A retryable HTTP status from a raw httpx call (see raise_for_retryable)"""
+
+    def __init__(self, status_code: int, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def raise_for_retryable(response) -> None:
+    """Turn 429/5xx httpx responses into UpstreamStatusError so they are retried"""
+    if response.status_code in RETRYABLE_STATUS:
+        raise UpstreamStatusError(response.status_code, response.headers)
+
+
+def status_of(error: Exception) -> Optional[int]:
+    """HTTP status of an OpenAI/Anthropic APIStatusError, httpx error or UpstreamStatusError"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # SDK transport errors (APITimeoutError, APIConnectionError, httpx.ConnectError, ...)
+    name = type(error).__name__
+    return "Timeout" in name or "Connect" in name
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds from a Retry-After header, if the provider sent one"""
+    response = getattr(error, "response", None)
+    headers = getattr(error, "headers", None) or getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+UPSTREAM_SECONDS = registry.histogram(
+    "upstream_request_duration_seconds", "Upstream call latency including retries", ("provider", "outcome")
+)
+UPSTREAM_IN_FLIGHT = registry.gauge("upstream_in_flight", "Upstream calls in progress", ("provider",))
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive upstream failures;
+    open -> half-open after `reset_timeout` seconds, letting one probe through;
+    the probe's outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def retry_in(self) -> float:
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def release(self) -> None:
+        """A call ended without an outcome (cancelled): free the half-open probe slot"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.times_opened += 1
+                    print(f"🔌 {self.name} circuit open for {self.reset_timeout:.0f}s "
+                          f"after {self.failures} failures")
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "open": int(self.state == "open"),
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected
+        }
+
+
+class Upstream:
+    """Deadline + retry + circuit breaker (+ hedging for async calls) for one provider"""
+
+    def __init__(self, name: str, deadline: float = 30.0, attempts: int = 3,
+                 base_delay: float = 0.25, max_delay: float = 4.0,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 hedge_after: Optional[float] = None):
+        self.name = name
+        self.deadline = deadline
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.counters = {"calls": 0, "retries": 0, "failures": 0, "timeouts": 0,
+                         "hedges": 0, "hedge_wins": 0}
+
+    @classmethod
+    def from_env(cls, name: str) -> "Upstream":
+        """<NAME>_DEADLINE, _RETRIES, _BREAKER_THRESHOLD, _BREAKER_RESET, _HEDGE_AFTER"""
+        prefix = name.upper()
+        hedge = os.getenv(f"{prefix}_HEDGE_AFTER")
+        return cls(
+            name,
+            deadline=float(os.getenv(f"{prefix}_DEADLINE", "30")),
+            attempts=int(os.getenv(f"{prefix}_RETRIES", "2")) + 1,
+            failure_threshold=int(os.getenv(f"{prefix}_BREAKER_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv(f"{prefix}_BREAKER_RESET", "30")),
+            hedge_after=float(hedge) if hedge else None
+        )
+
+    def call(self, fn, deadline: float = None):
+        """fn(timeout) -> result, retried until it succeeds or the deadline runs out"""
+        give_up_at = time.monotonic() + (deadline or self.deadline)
+        self.counters["calls"] += 1
+        attempt = 0
+        with self._measure():
+            while True:
+                remaining = self._admit(give_up_at)
+                try:
+                    result = fn(remaining)
+                except Exception as e:
+                    delay = self._on_failure(e, attempt, give_up_at)
+                    time.sleep(delay)
+                    attempt += 1
+                    continue
+                except BaseException:
+                    self.breaker.release()
+                    raise
+                self.breaker.record_success()
+                return result
+
+    async def call_async(self, fn, deadline: float = None, hedge: bool = True):
+        """fn(timeout) -> awaitable; like call(), plus a hedge when hedge_after is set"""
+        give_up_at = time.monotonic() + (deadline or self.deadline)
+        self.counters["calls"] += 1
+        attempt = 0
+        with self._measure():
+            while True:
+                remaining = self._admit(give_up_at)
+                try:
+                    if hedge and self.hedge_after and self.hedge_after < remaining:
+                        result = await self._hedged(fn, remaining)
+                    else:
+                        result = await asyncio.wait_for(fn(remaining), timeout=remaining)
+                except asyncio.CancelledError:
+                    # Client disconnect, lost hedge, aborted stream: says nothing about
+                    # the provider, but a cancelled probe must not hold the circuit shut
+                    self.breaker.release()
+                    raise
+                except Exception as e:
+                    delay = self._on_failure(e, attempt, give_up_at)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                    continue
+                self.breaker.record_success()
+                return result
+
+    @contextmanager
+    def _measure(self):
+        """Latency histogram and in-flight gauge for one logical call (all attempts)"""
+        started = time.perf_counter()
+        outcome = "ok"
+        UPSTREAM_IN_FLIGHT.inc(provider=self.name)
+        try:
+            yield
+        except CircuitOpenError:
+            outcome = "circuit_open"
+            raise
+        except (TimeoutError, asyncio.TimeoutError):
+            outcome = "timeout"
+            raise
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            UPSTREAM_IN_FLIGHT.dec(provider=self.name)
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, provider=self.name, outcome=outcome)
+
+    async def _hedged(self, fn, remaining: float):
+        """
+        Start a second identical request if the first has not answered within
+        hedge_after seconds; the first success wins and the other is cancelled
+        """
+        started = time.monotonic()
+        primary = asyncio.ensure_future(asyncio.wait_for(fn(remaining), timeout=remaining))
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        left = remaining - (time.monotonic() - started)
+        self.counters["hedges"] += 1
+        backup = asyncio.ensure_future(asyncio.wait_for(fn(left), timeout=left))
+        pending = {primary, backup}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _admit(self, give_up_at: float) -> float:
+        """Seconds left for the next attempt; raises if the breaker or deadline says stop"""
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.name, self.breaker.retry_in())
+        remaining = give_up_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"{self.name} deadline exceeded")
+        return remaining
+
+    def _on_failure(self, error: Exception, attempt: int, give_up_at: float) -> float:
+        """Record the failure; return the backoff delay or re-raise if retrying is pointless"""
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+            self.counters["timeouts"] += 1
+        if not is_retryable(error):
+            # The provider answered (e.g. 400): not a health problem, not worth retrying
+            self.breaker.record_success()
+            raise error
+        self.breaker.record_failure()
+        self.counters["failures"] += 1
+
+        # Full jitter, unless the provider told us when to come back
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if attempt + 1 >= self.attempts or time.monotonic() + delay >= give_up_at:
+            raise error
+        self.counters["retries"] += 1
+        print(f"↻ {self.name} attempt {attempt + 1} failed ({error}), retrying in {delay:.2f}s")
+        return delay
+
+    def stats(self) -> dict:
+        return {**self.counters, "circuit": self.breaker.stats(), "deadline_s": self.deadline,
+                "hedge_after_s": self.hedge_after}
+
+
+class UpstreamRegistry:
+    """One shared Upstream per provider so every agent trips the same breaker"""
+
+    def __init__(self):
+        self._upstreams = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Upstream:
+        with self._lock:
+            if name not in self._upstreams:
+                self._upstreams[name] = Upstream.from_env(name)
+            return self._upstreams[name]
+
+    def stats(self) -> dict:
+        return {name: upstream.stats() for name, upstream in self._upstreams.items()}
+
+
+# Process-wide registry
+upstreams = UpstreamRegistry()
@@ -0,0 +1,120 @@
+"""
+Single-flight request coalescing - concurrent callers with the same key share
+one upstream call instead of each making their own
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Flight:
+    """A shared upstream task and how many callers are still waiting on it"""
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Keys are namespaced "<namespace>:<cache key>" (e.g. "llm:ab12...") so the
+    collapsed-call counters can be broken down per upstream.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}        # key -> _Call (thread callers)
+        self._tasks = {}        # key -> _Flight (async callers)
+        self.calls = defaultdict(int)
+        self.collapsed = defaultdict(int)
+
+    def do(self, key: str, fn):
+        """Run fn() once for all threads that ask for key at the same time"""
+        namespace = key.split(":", 1)[0]
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls[namespace] += 1
+            else:
+                self.collapsed[namespace] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key: str, coro_fn):
+        """
+        Async variant: the upstream coroutine runs as its own task, so a caller
+        that is cancelled (client disconnect, timeout) does not cancel it for
+        the others. When the last waiting caller leaves, the task is cancelled:
+        nobody is left to read its result.
+        """
+        namespace = key.split(":", 1)[0]
+        with self._lock:
+            flight = self._tasks.get(key)
+            if flight is None:
+                flight = self._tasks[key] = _Flight(asyncio.ensure_future(coro_fn()))
+                self.calls[namespace] += 1
+                flight.task.add_done_callback(lambda _: self._finished(key, flight))
+            else:
+                self.collapsed[namespace] += 1
+            flight.waiters += 1
+
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            with self._lock:
+                flight.waiters -= 1
+                abandoned = flight.waiters == 0 and not flight.task.done()
+                if abandoned:
+                    # New callers start a fresh task instead of joining a cancelled one
+                    self._forget(key, flight)
+            if abandoned:
+                flight.task.cancel()
+
+    def _finished(self, key: str, flight: _Flight) -> None:
+        with self._lock:
+            self._forget(key, flight)
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        """Drop the flight if it is still the current one for key (caller holds the lock)"""
+        if self._tasks.get(key) is flight:
+            del self._tasks[key]
+
+    def stats(self) -> dict:
+        namespaces = set(self.calls) | set(self.collapsed)
+        return {
+            "in_flight": len(self._calls) + len(self._tasks),
+            "calls": sum(self.calls.values()),
+            "collapsed": sum(self.collapsed.values()),
+            "by_namespace": {
+                ns: {"calls": self.calls[ns], "collapsed": self.collapsed[ns]} for ns in sorted(namespaces)
+            }
+        }
+
+
+# Shared by every agent so identical in-flight work collapses across the app
+single_flight = SingleFlight()
@@ -0,0 +1,77 @@
+"""
+Test lazy agent construction, failure isolation and readiness
+"""
+import time
+
+from services.agent_registry import AgentRegistry, AgentUnavailable
+
+
+class FakeAgent:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self) -> str:
+        self.calls += 1
+        return "ok"
+
+
+def test_agent_registry():
+    print("🧩 Testing agent registry")
+    print("=" * 50)
+    registry = AgentRegistry(retry_after=0.2)
+    built = []
+    attempts = []
+
+    def build_fake():
+        built.append(1)
+        return FakeAgent()
+
+    def build_vision():
+        attempts.append(1)
+        raise ValueError("OPENAI_API_KEY not found in environment variables")
+
+    registry.register("bias", build_fake)
+    registry.register("vision", build_vision, required=False)
+    bias = registry.lazy("bias")
+    vision = registry.lazy("vision")
+
+    # Nothing is built until an attribute is used
+    assert not built and registry.stats()["bias"]["state"] == "not_built"
+    assert bias.analyze() == "ok" and bias.analyze() == "ok"
+    assert len(built) == 1 and registry.get("bias").calls == 2
+    print("✅ Agent built once, on first use")
+
+    # A broken optional agent fails its own calls, not the app or readiness
+    try:
+        vision.recognize
+        assert False, "vision should be unavailable"
+    except AgentUnavailable as e:
+        assert e.name == "vision" and e.retry_in > 0
+    try:
+        vision.recognize
+    except AgentUnavailable:
+        pass
+    assert len(attempts) == 1, "failed builds are not retried before retry_after"
+    assert registry.ready()
+    print("✅ Missing key disables only the vision agent; app stays ready")
+
+    time.sleep(0.25)
+    try:
+        vision.recognize
+    except AgentUnavailable:
+        pass
+    assert len(attempts) == 2
+    print("✅ Failed build retried after the back-off")
+
+    # Readiness waits for required agents
+    registry.register("knowledge", build_fake)
+    assert not registry.ready()
+    assert registry.warm() == {"bias": None, "knowledge": None}
+    assert registry.ready() and registry.stats()["vision"]["state"] == "failed"
+    print("✅ warm() builds required agents for /readyz")
+
+    print("\n🎉 Agent registry is working!")
+
+
+if __name__ == "__main__":
+    test_agent_registry()
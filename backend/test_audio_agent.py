@@ -0,0 +1,112 @@
+"""
+Test ElevenLabs billing and stream relaying against fake HTTP clients (no API keys needed)
+"""
+import os
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+os.environ["TRANSLATION_CACHE_BACKEND"] = "memory"
+os.environ["AUDIO_CACHE_DIR"] = tempfile.mkdtemp()
+os.environ["QUOTA_ELEVENLABS_PER_DAY"] = "100000"
+
+from agents.audio_agent import AudioAgent, AUDIO_STREAM_ERRORS
+from services.quota import quota
+
+TEXT = "Welcome to the Taj Mahal."
+
+
+class FakeHTTP:
+    """Sync client whose post() answers with `status` and records every request"""
+
+    def __init__(self, status: int, content: bytes = b""):
+        self.status = status
+        self.content = content
+        self.requests = []
+
+    def post(self, url, **kwargs):
+        self.requests.append(url)
+        return SimpleNamespace(status_code=self.status, content=self.content, text="unauthorized")
+
+
+def fake_agent(http) -> AudioAgent:
+    agent = AudioAgent(http=SimpleNamespace(client=http, async_client=None))
+    agent.client = object()  # as if ELEVENLABS_API_KEY were set
+    return agent
+
+
+def tts_usage() -> dict:
+    remaining = quota.budget("elevenlabs").stats()["remaining"]["day"]
+    endpoint = quota.stats()["elevenlabs"]["by_endpoint"].get("eleven_multilingual_v2:tts", {})
+    return {"remaining": remaining, "used": endpoint.get("used", 0)}
+
+
+def test_rejected_synthesis_is_free():
+    before = tts_usage()
+    agent = fake_agent(FakeHTTP(401))
+    assert agent.synthesize_to_file(TEXT) is None
+    assert len(agent.http_client.requests) == 1
+    after = tts_usage()
+    assert after["remaining"] == before["remaining"], (before, after)
+    assert after["used"] == before["used"]
+    print("✅ A 401 from ElevenLabs charges no characters")
+
+    agent = fake_agent(FakeHTTP(200, b"ID3 fake mp3"))
+    path = agent.synthesize_to_file(TEXT + " Again.")
+    assert path and path.read_bytes() == b"ID3 fake mp3"
+    assert tts_usage()["remaining"] == before["remaining"] - len(TEXT + " Again.")
+    print("✅ Successful synthesis is charged its characters")
+
+
+class FakeStream:
+    """Streaming response that yields `chunks`, then raises `error` if given"""
+
+    def __init__(self, chunks: list, error: Exception = None):
+        self.chunks = chunks
+        self.error = error
+        self.closed = False
+
+    async def aiter_bytes(self, chunk_size):
+        for chunk in self.chunks:
+            yield chunk
+        if self.error:
+            raise self.error
+
+    async def aclose(self):
+        self.closed = True
+
+
+async def relay(agent: AudioAgent, response: FakeStream, key: str) -> bytes:
+    body = b""
+    async for chunk in agent._relay_stream(response, agent.audio_cache.writer(key)):
+        body += chunk
+    return body
+
+
+def test_broken_stream_not_cached():
+    agent = fake_agent(FakeHTTP(200))
+    errors = AUDIO_STREAM_ERRORS._values.get((), 0)
+
+    response = FakeStream([b"ID3 first ", b"half"], ConnectionError("peer closed connection"))
+    try:
+        asyncio.run(relay(agent, response, "broken"))
+        assert False, "a cut stream must fail the response"
+    except ConnectionError:
+        pass
+    assert response.closed and agent.audio_cache.get("broken") is None
+    assert not list(agent.audio_cache.directory.glob("*.tmp"))
+    assert AUDIO_STREAM_ERRORS._values.get((), 0) == errors + 1
+    print("✅ A stream cut mid-body is counted, re-raised and never cached")
+
+    assert asyncio.run(relay(agent, FakeStream([b"ID3 whole ", b"stream"]), "whole")) == b"ID3 whole stream"
+    assert agent.audio_cache.get("whole").read_bytes() == b"ID3 whole stream"
+    assert AUDIO_STREAM_ERRORS._values.get((), 0) == errors + 1
+    print("✅ A complete stream is committed to the cache")
+
+
+if __name__ == "__main__":
+    print("🎧 Testing audio agent billing and relaying")
+    print("=" * 50)
+    test_rejected_synthesis_is_free()
+    test_broken_stream_not_cached()
+    print("\n🎉 Audio agent billing and relaying are working!")
@@ -0,0 +1,55 @@
+"""
+Test the on-disk MP3 cache: size accounting, LRU eviction and streamed writes
+"""
+import os
+import time
+import tempfile
+from pathlib import Path
+
+from services.audio_cache import AudioCache
+
+
+def test_audio_cache():
+    print("💾 Testing audio cache")
+    print("=" * 50)
+    cache = AudioCache(Path(tempfile.mkdtemp()), max_bytes=1000)
+
+    key = AudioCache.make_key("Welcome", "en", "voice", "model", {"stability": 0.5})
+    assert key == AudioCache.make_key("Welcome", "en", "voice", "model", {"stability": 0.5})
+    assert key != AudioCache.make_key("Welcome", "fr", "voice", "model", {"stability": 0.5})
+    assert cache.get(key) is None and cache.misses == 1
+
+    # Overwriting a key replaces its bytes instead of counting them twice
+    cache.put(key, b"a" * 300)
+    cache.put(key, b"b" * 200)
+    assert cache.stats()["bytes"] == 200, cache.stats()
+    assert cache.get(key).read_bytes() == b"b" * 200 and cache.hits == 1
+    print("✅ Overwrites keep the size accounting exact")
+
+    # Over budget: the least recently used file goes, the one just read stays
+    old = cache.put("old", b"o" * 400)
+    past = time.time() - 60
+    os.utime(old, (past, past))
+    cache.get(key)
+    cache.put("new", b"n" * 500)
+    assert not old.exists() and cache.get(key) and cache.get("new")
+    assert cache.stats()["bytes"] == 700 and cache.evictions == 1
+    print("✅ LRU eviction keeps the directory under budget")
+
+    # Streamed audio appears only on commit; an aborted stream leaves nothing behind
+    writer = cache.writer("streamed")
+    writer.write(b"s" * 100)
+    assert cache.get("streamed") is None
+    writer.commit()
+    assert cache.get("streamed").read_bytes() == b"s" * 100 and cache.stats()["bytes"] == 800
+    writer = cache.writer("aborted")
+    writer.write(b"x" * 100)
+    writer.abort()
+    assert cache.get("aborted") is None and not list(cache.directory.glob("*.tmp"))
+    print("✅ Streamed writes commit atomically and aborts clean up")
+
+    print("\n🎉 Audio cache is working!")
+
+
+if __name__ == "__main__":
+    test_audio_cache()
@@ -0,0 +1,63 @@
+"""
+Test the memory and SQLite cache backends: LRU bounds and stale-while-revalidate lookups
+"""
+import time
+import tempfile
+from pathlib import Path
+
+from services.cache import MemoryCache, SQLiteCache
+
+
+def check_backend(make):
+    cache = make(ttl=0.2, stale_ttl=0.3)
+    name = cache.backend_name
+    cache.set("taj_mahal:local", {"narrative": "The Taj Mahal endures."})
+    assert cache.lookup("taj_mahal:local") == ({"narrative": "The Taj Mahal endures."}, True)
+    assert cache.get("taj_mahal:local") == {"narrative": "The Taj Mahal endures."}
+
+    # Past ttl: lookup() still serves it, marked stale; get() treats it as a miss
+    time.sleep(0.25)
+    assert cache.lookup("taj_mahal:local") == ({"narrative": "The Taj Mahal endures."}, False)
+    assert cache.lookup("taj_mahal:local", allow_stale=False) is None
+    assert cache.get("taj_mahal:local") is None
+    assert cache.stale_hits == 1 and cache.hits == 2
+
+    # A refresh makes it fresh again; past ttl + stale_ttl it is gone for good
+    cache.set("taj_mahal:local", {"narrative": "Refreshed."})
+    assert cache.lookup("taj_mahal:local") == ({"narrative": "Refreshed."}, True)
+    time.sleep(0.55)
+    assert cache.lookup("taj_mahal:local") is None and len(cache) == 0
+    print(f"✅ {name}: fresh, stale and expired lookups")
+
+    # Least recently used entries go first once max_entries is exceeded
+    cache = make(max_entries=3)
+    for key in "abc":
+        cache.set(key, key)
+    cache.get("a")
+    cache.set("d", "d")
+    assert sorted(k for k, _ in cache.items()) == ["a", "c", "d"] and cache.evictions == 1
+    assert cache.stats()["entries"] == 3
+    print(f"✅ {name}: LRU eviction at max_entries")
+
+
+def test_memory_cache():
+    check_backend(lambda **kwargs: MemoryCache(**kwargs))
+
+
+def test_sqlite_cache():
+    directory = Path(tempfile.mkdtemp())
+    paths = iter(directory / f"cache{i}.db" for i in range(10))
+    check_backend(lambda **kwargs: SQLiteCache(next(paths), **kwargs))
+
+    # Entries survive a restart
+    SQLiteCache(directory / "persist.db").set("key", [1, 2, 3])
+    assert SQLiteCache(directory / "persist.db").get("key") == [1, 2, 3]
+    print("✅ sqlite: entries survive a restart")
+
+
+if __name__ == "__main__":
+    print("🗄️  Testing cache backends")
+    print("=" * 50)
+    test_memory_cache()
+    test_sqlite_cache()
+    print("\n🎉 Cache backends are working!")
@@ -0,0 +1,165 @@
+"""
+Test the catalogue store: JSON import, lazy lookups, bounded hot set,
+incremental re-import and hot reload while readers are running
+"""
+import json
+import time
+import asyncio
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from services.catalogue import Catalogue, DATA_DIR
+from agents.bias_agent import BiasAgent
+from agents.community_agent import CommunityAgent
+from agents.cultural_agent import CulturalAgent
+from agents.knowledge_agent import KnowledgeAgent
+
+
+def test_catalogue():
+    print("📚 Testing catalogue store")
+    print("=" * 50)
+    workdir = Path(tempfile.mkdtemp())
+    catalogue = Catalogue(workdir / "catalogue.db", hot_entries=4)
+
+    # First use imports every source file in data/
+    assert catalogue.get("landmark", "taj_mahal")["name"] == "Taj Mahal"
+    assert catalogue.count("landmark") == len(json.loads((DATA_DIR / "landmarks.json").read_text()))
+    print(f"✅ Imported {catalogue.count('landmark')} landmarks")
+
+    # The agents read the same store
+    assert BiasAgent(catalogue).analyze("taj_mahal", "local")["diversity_score"] > 0
+    assert CommunityAgent(catalogue).get_sentiment("taj_mahal")["reflections_count"] > 0
+    cultural = CulturalAgent(catalogue)
+    assert "Mughal" in cultural.interpret("taj_mahal", "local", {})["narrative"]
+    assert cultural.get_available_lenses("taj_mahal")[0] == "local"
+    assert cultural.get_available_lenses("unknown") == ["neutral"]
+    print("✅ Bias, community and cultural agents served from the catalogue")
+
+    # Facts carry their summary from the moment they are loaded; no per-request copy or formatting
+    knowledge = KnowledgeAgent(catalogue=catalogue)
+    facts = knowledge.get_facts("taj_mahal")
+    assert facts["summary"].startswith("The Taj Mahal is located in")
+    assert knowledge.get_facts("taj_mahal") is facts
+    print("✅ Knowledge agent serves facts with the summary computed once per load")
+
+    # The hot set never grows past its bound
+    for object_id in catalogue.ids("landmark"):
+        catalogue.get("landmark", object_id)
+    stats = catalogue.stats()
+    assert stats["hot_entries"] == 4 and stats["evictions"] > 0, stats
+    print(f"✅ Hot set bounded at {stats['hot_entries']} records ({stats['evictions']} evictions)")
+
+    # Re-importing touches only the records that changed
+    source = workdir / "landmarks.json"
+    records = json.loads((DATA_DIR / "landmarks.json").read_text())
+    assert catalogue.import_file("landmark", _write(source, records)) == []
+    records["taj_mahal"]["built"] = "1631-1653"
+    del records["colosseum"]
+    changed = catalogue.import_file("landmark", _write(source, records))
+    assert sorted(changed) == ["colosseum", "taj_mahal"], changed
+    assert catalogue.get("landmark", "taj_mahal")["built"] == "1631-1653"
+    assert "Built between 1631-1653" in knowledge.get_facts("taj_mahal")["summary"]
+    assert catalogue.get("landmark", "colosseum") is None
+    print(f"✅ Incremental import changed only {changed}")
+
+    catalogue.close()
+    print("\n🎉 Catalogue store is working!")
+
+
+def test_hot_reload():
+    print("\n🔄 Testing hot reload")
+    print("=" * 50)
+    data_dir = Path(tempfile.mkdtemp())
+    for filename in ("landmarks.json", "bias_data.json", "community_sentiment.json", "interpretations.json"):
+        shutil.copy(DATA_DIR / filename, data_dir / filename)
+    catalogue = Catalogue(data_dir / "catalogue.db", data_dir=data_dir)
+    taj = catalogue.get("bias", "taj_mahal")
+    colosseum = catalogue.get("bias", "colosseum")
+
+    # Readers hammer the store while the bias file is rewritten twice
+    seen = set()
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            seen.add(json.dumps(catalogue.get("bias", "taj_mahal")))
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    catalogue.watch(interval=0.05)
+
+    source = data_dir / "bias_data.json"
+    records = json.loads(source.read_text())
+    records["taj_mahal"]["power_imbalances"] = ["Revised after community review"]
+    _write(source, records)
+    revised = json.dumps(records["taj_mahal"])
+    deadline = time.monotonic() + 5
+    while json.dumps(catalogue.get("bias", "taj_mahal")) != revised:
+        assert time.monotonic() < deadline, "reload not picked up"
+        time.sleep(0.02)
+
+    # A torn write (editor caught mid-save) keeps the previous snapshot
+    source.write_text('{"taj_mahal": {"power_imb', encoding="utf-8")
+    time.sleep(0.3)
+    assert json.dumps(catalogue.get("bias", "taj_mahal")) == revised
+    stop.set()
+    for thread in threads:
+        thread.join()
+    catalogue.stop_watching()
+
+    assert seen <= {json.dumps(taj), revised}, seen
+    assert catalogue.get("bias", "colosseum") is colosseum, "unchanged records must stay hot"
+    assert catalogue.stats()["reloads"] >= 1
+    print(f"✅ Readers saw only whole snapshots ({len(seen)} versions), torn write ignored")
+    print("✅ Only the changed record was evicted from the hot set")
+    catalogue.close()
+
+
+def test_async_lookups():
+    workdir = Path(tempfile.mkdtemp())
+    catalogue = Catalogue(workdir / "catalogue.db")
+    loop_thread = threading.get_ident()
+    readers = []
+    get = catalogue.get
+
+    def recording_get(kind: str, id: str):
+        readers.append(threading.get_ident())
+        return get(kind, id)
+
+    catalogue.get = recording_get
+
+    async def scenario():
+        # First use: open + import + SQLite read all happen in a worker thread
+        first = await catalogue.get_async("landmark", "taj_mahal")
+        assert readers and loop_thread not in readers
+        readers.clear()
+        # Hot-set hits, including cached misses, are answered on the loop without a thread
+        assert await catalogue.get_async("landmark", "taj_mahal") is first
+        assert await catalogue.get_async("landmark", "unknown") is None
+        assert await catalogue.get_async("landmark", "unknown") is None
+        assert len(readers) == 1, "only the first miss of 'unknown' should need a thread"
+
+        # The async agent paths go through get_async
+        report = await BiasAgent(catalogue).analyze_async("taj_mahal", "local")
+        sentiment = await CommunityAgent(catalogue).get_sentiment_async("taj_mahal")
+        lenses = await CulturalAgent(catalogue).get_available_lenses_async("taj_mahal")
+        assert report["diversity_score"] > 0 and sentiment["reflections_count"] > 0 and lenses[0] == "local"
+        assert loop_thread not in readers
+
+    asyncio.run(scenario())
+    catalogue.close()
+    print("✅ Async lookups never touch SQLite on the event loop")
+
+
+def _write(path: Path, records: dict) -> Path:
+    path.write_text(json.dumps(records), encoding="utf-8")
+    return path
+
+
+if __name__ == "__main__":
+    test_catalogue()
+    test_async_lookups()
+    test_hot_reload()
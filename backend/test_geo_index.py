@@ -0,0 +1,74 @@
+"""
+Test the geospatial index against brute-force haversine over random points
+"""
+import random
+
+from services.geo_index import GeoIndex, haversine_km
+
+
+def brute_nearby(points, lat, lon, radius_km):
+    return sorted(p[0] for p in points if haversine_km(lat, lon, p[1], p[2]) <= radius_km)
+
+
+def test_radius_queries():
+    rng = random.Random(7)
+    points = [(f"p{i}", rng.uniform(-89, 89), rng.uniform(-180, 180)) for i in range(5000)]
+    index = GeoIndex()
+    for id, lat, lon in points:
+        index.add(id, lat, lon)
+
+    for lat, lon, radius in [(27.17, 78.04, 500), (0, 0, 50), (-33.9, 151.2, 2000),
+                             (85, 10, 800), (-88, -120, 300), (10, 179.9, 400)]:
+        found = sorted(point.id for _, point in index.nearby(lat, lon, radius))
+        assert found == brute_nearby(points, lat, lon, radius), (lat, lon, radius)
+    distances = [d for d, _ in index.nearby(27.17, 78.04, 2000)]
+    assert distances == sorted(distances)
+    print("✅ Radius queries match brute force, including near the poles")
+
+    nearest = index.nearest(27.17, 78.04, k=5)
+    expected = sorted(points, key=lambda p: haversine_km(27.17, 78.04, p[1], p[2]))[:5]
+    assert [point.id for _, point in nearest] == [p[0] for p in expected]
+    print("✅ k-nearest widens its radius until it has k points")
+
+
+def test_antimeridian():
+    index = GeoIndex()
+    index.add("fiji", -17.7, 178.0)
+    index.add("samoa", -13.8, -172.1)
+    index.add("sydney", -33.9, 151.2)
+
+    found = {point.id for _, point in index.nearby(-15.0, 179.9, 1500)}
+    assert found == {"fiji", "samoa"}, found
+    assert {point.id for _, point in index.nearby(-15.0, -179.9, 1500)} == {"fiji", "samoa"}
+    print("✅ Radius search wraps across the antimeridian")
+
+    box = {point.id for point in index.bbox(-20, 170, -10, -170)}
+    assert box == {"fiji", "samoa"}, box
+    assert {point.id for point in index.bbox(-40, 140, -10, 180)} == {"fiji", "sydney"}
+    assert index.bbox(-20, -10, -10, 10) == []
+    print("✅ Bounding boxes with min_lon > max_lon cross the antimeridian")
+
+
+def test_bbox():
+    rng = random.Random(11)
+    points = [(f"p{i}", rng.uniform(-60, 60), rng.uniform(-180, 180)) for i in range(3000)]
+    index = GeoIndex(cell_deg=1.0)
+    for id, lat, lon in points:
+        index.add(id, lat, lon)
+
+    for min_lat, min_lon, max_lat, max_lon in [(10, 20, 30, 45), (-5, -5, 5, 5), (-60, 160, 60, -160)]:
+        found = sorted(point.id for point in index.bbox(min_lat, min_lon, max_lat, max_lon))
+        expected = sorted(id for id, lat, lon in points if min_lat <= lat <= max_lat and (
+            min_lon <= lon <= max_lon if min_lon <= max_lon else lon >= min_lon or lon <= max_lon))
+        assert found == expected, (min_lat, min_lon, max_lat, max_lon)
+    assert len(index.bbox(-60, -180, 60, 180, limit=10)) == 10
+    print("✅ Bounding boxes match brute force and honour the limit")
+
+
+if __name__ == "__main__":
+    print("🌍 Testing geo index")
+    print("=" * 50)
+    test_radius_queries()
+    test_antimeridian()
+    test_bbox()
+    print("\n🎉 Geo index is working!")
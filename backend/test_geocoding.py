@@ -0,0 +1,105 @@
+"""
+Test the bulk geocoding pipeline against a local stub geocoder
+"""
+import json
+import tempfile
+import threading
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.cache import MemoryCache
+from get_coordinates import Geocoder, CoordinateStore, geocode_all, load_landmarks
+
+
+def start_stub_geocoder(fail_first: int = 1, reject: tuple = ()):
+    """PositionStack-shaped stub; every query fails `fail_first` times with 503 first,
+    queries in `reject` always answer 422"""
+    attempts = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)["query"][0]
+            with lock:
+                attempts[query] = attempts.get(query, 0) + 1
+                attempt = attempts[query]
+            if query in reject or attempt <= fail_first:
+                self.send_response(422 if query in reject else 503)
+                self.end_headers()
+                return
+            body = json.dumps({"data": [{"latitude": 1.0, "longitude": 2.0, "label": query}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, attempts
+
+
+def test_geocoding():
+    print("🗺️  Testing bulk geocoding")
+    print("=" * 50)
+
+    server, attempts = start_stub_geocoder(fail_first=1)
+    url = f"http://127.0.0.1:{server.server_port}/v1/forward"
+    landmarks = load_landmarks()
+    output = Path(tempfile.mkdtemp()) / "coords.json"
+    cache = MemoryCache(max_entries=1000)
+
+    # First run: every query is retried once, then succeeds
+    geocoder = Geocoder(base_url=url, api_key="stub", rps=200, cache=cache)
+    summary = geocode_all(landmarks, geocoder, CoordinateStore(output), workers=8)
+    assert summary["geocoded"] == len(landmarks), summary
+    assert all(count == 2 for count in attempts.values())
+    saved = json.loads(output.read_text())
+    assert {r["id"] for r in saved} == {lm["id"] for lm in landmarks}
+    assert not output.with_suffix(".partial.jsonl").exists()
+    print(f"✅ Geocoded {len(saved)} landmarks with one retry each, compacted into one JSON file")
+
+    # Second run resumes from the output file: nothing to do, no upstream calls
+    before = sum(attempts.values())
+    summary = geocode_all(landmarks, geocoder, CoordinateStore(output), workers=8)
+    assert summary["skipped"] == len(landmarks) and sum(attempts.values()) == before
+    print("✅ Resume skips completed landmarks")
+
+    # Refresh re-geocodes, but answers come from the disk cache
+    summary = geocode_all(landmarks, geocoder, CoordinateStore(output), workers=8, refresh=True)
+    assert summary["geocoded"] == len(landmarks) and sum(attempts.values()) == before
+    print("✅ Refresh served from the geocode cache")
+
+    server.shutdown()
+
+    # Permanent client errors fail at once; only 429/5xx and network errors are retried
+    server, attempts = start_stub_geocoder(fail_first=0, reject=("Nowhere",))
+    geocoder = Geocoder(base_url=f"http://127.0.0.1:{server.server_port}/v1/forward",
+                        api_key="stub", rps=200, cache=MemoryCache(max_entries=10))
+    assert geocoder.geocode("Nowhere") is None and attempts["Nowhere"] == 1
+    assert geocoder.cache.get("Nowhere") is None
+    print("✅ 4xx answers are not retried or cached")
+    server.shutdown()
+
+    # An interrupted run leaves its checkpoint; the next store resumes from it
+    output = Path(tempfile.mkdtemp()) / "coords.json"
+    store = CoordinateStore(output)
+    store.add({"id": "taj_mahal", "name": "Taj Mahal", "country": "India", "latitude": 27.1, "longitude": 78.0})
+    with open(store.checkpoint, "a") as f:
+        f.write('{"id": "torn')
+    resumed = CoordinateStore(output)
+    assert "taj_mahal" in resumed and not output.exists()
+    resumed.compact()
+    assert [r["id"] for r in json.loads(output.read_text())] == ["taj_mahal"]
+    assert not resumed.checkpoint.exists()
+    print("✅ Resume replays the JSONL checkpoint and skips a torn last line")
+
+    print("\n🎉 Geocoding pipeline is working!")
+
+
+if __name__ == "__main__":
+    test_geocoding()
@@ -0,0 +1,79 @@
+"""
+Test image preprocessing before the vision call: token estimates, resizing and EXIF stripping
+"""
+import io
+import random
+
+from services.image_preprocess import prepare_image, estimate_image_tokens, Image, DEFAULT_MAX_EDGE
+
+
+def test_token_estimates():
+    assert estimate_image_tokens(4000, 3000, "low") == 85
+    assert estimate_image_tokens(512, 512, "high") == 85 + 170
+    assert estimate_image_tokens(1024, 1024, "high") == 85 + 170 * 4     # shortest side to 768: 2x2 tiles
+    assert estimate_image_tokens(2048, 4096, "high") == 85 + 170 * 6     # 1024x2048 -> 768x1536: 2x3 tiles
+    assert estimate_image_tokens(4032, 3024, "high") == 85 + 170 * 4     # phone photo: 1024x768 -> 2x2 tiles
+    print("✅ Vision token estimates follow OpenAI's tiling rules")
+
+
+def test_prepare_image():
+    if Image is None:
+        prepared = prepare_image(b"raw upload bytes")
+        assert prepared.data == b"raw upload bytes" and prepared.detail == "high"
+        assert prepared.report["preprocessed"] is False
+        print("⚠️  Pillow not installed - uploads pass through unchanged")
+        return
+
+    photo = Image.linear_gradient("L").resize((4032, 3024)).convert("RGB")
+    exif = Image.Exif()
+    exif[0x0112] = 6  # orientation: rotate 90 degrees clockwise on display
+    exif[0x010F] = "PhoneMaker"
+    upload = io.BytesIO()
+    photo.save(upload, "JPEG", quality=95, exif=exif)
+
+    prepared = prepare_image(io.BytesIO(upload.getvalue()))
+    sent = Image.open(io.BytesIO(prepared.data))
+    assert sent.size == (768, 1024), sent.size  # orientation baked in, then resized
+    assert not sent.getexif() and prepared.mime == "image/jpeg" and prepared.detail == "high"
+    assert prepared.report["sent_bytes"] < prepared.report["original_bytes"]
+    assert prepared.report["image_tokens_saved"] == 0  # both sizes fit the same 768px grid
+    print(f"✅ 4032x3024 upload sent as {sent.size[0]}x{sent.size[1]}, "
+          f"{prepared.report['bytes_saved']} bytes saved, EXIF stripped")
+
+    small = prepare_image(upload.getvalue(), max_edge=512, fmt="WEBP")
+    assert small.detail == "low" and small.mime == "image/webp"
+    assert small.report["estimated_image_tokens"] == 85
+    print("✅ Images that fit 512px go out at low detail")
+
+
+def test_auto_detail():
+    # The default edge must stay above the low-detail grid or "auto" could only ever pick "low"
+    assert DEFAULT_MAX_EDGE > 512
+    if Image is None:
+        assert prepare_image(b"raw upload bytes").detail == "high"
+        print("⚠️  Pillow not installed - auto detail falls back to high")
+        return
+
+    # A large, detailed photo (noise everywhere) keeps "high" with the default settings
+    rng = random.Random(3)
+    detailed = Image.frombytes("RGB", (3000, 2000), rng.randbytes(3000 * 2000 * 3))
+    upload = io.BytesIO()
+    detailed.save(upload, "JPEG", quality=90)
+    prepared = prepare_image(upload.getvalue())
+    assert prepared.detail == "high" and max(prepared.report["sent_size"]) == DEFAULT_MAX_EDGE
+    assert prepared.report["estimated_image_tokens"] > 85
+
+    # A thumbnail-sized upload goes out at low detail
+    small = io.BytesIO()
+    detailed.resize((400, 300)).save(small, "JPEG")
+    assert prepare_image(small.getvalue()).detail == "low"
+    print("✅ Auto detail sends large photos at high detail and thumbnails at low")
+
+
+if __name__ == "__main__":
+    print("🗜️  Testing image preprocessing")
+    print("=" * 50)
+    test_token_estimates()
+    test_prepare_image()
+    test_auto_detail()
+    print("\n🎉 Image preprocessing is working!")
@@ -0,0 +1,145 @@
+"""
+Test LLMCulturalAgent against a fake provider client (no API key needed)
+"""
+import os
+import asyncio
+import threading
+from types import SimpleNamespace
+
+os.environ["QUOTA_OPENAI_PER_DAY"] = "100000"
+
+from agents.llm_cultural_agent import LLMCulturalAgent
+from services.cache import MemoryCache
+from services.quota import quota, estimate_request_tokens
+from services.resilience import Upstream
+
+FACTS = {"name": "Taj Mahal", "location": "Agra, India", "built": "1632-1653", "purpose": "Mausoleum"}
+
+
+class FakeStream:
+    """OpenAI-style async chunk stream that records whether it was closed"""
+
+    def __init__(self, words: list):
+        self.words = words
+        self.closed = False
+
+    async def __aiter__(self):
+        for word in self.words:
+            await asyncio.sleep(0)
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+
+    async def close(self):
+        self.closed = True
+
+
+def completion(text: str):
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=20, total_tokens=120)
+    return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def fake_agent(stream: FakeStream = None, replies: list = None, cache: MemoryCache = None) -> LLMCulturalAgent:
+    """Agent whose provider streams `stream` and answers plain requests with `replies` in turn"""
+    agent = LLMCulturalAgent.__new__(LLMCulturalAgent)
+    agent.provider, agent.model = "openai", "gpt-4o-mini"
+    agent.upstream = Upstream("fake-openai", attempts=1)
+    agent.cache = cache if cache is not None else MemoryCache()
+    agent._refreshing = set()
+    agent._refresh_lock = threading.Lock()
+    agent._background_tasks = set()
+    agent.requests = []
+    replies = list(replies or [])
+
+    async def create(**request):
+        agent.requests.append(request)
+        if request.get("stream"):
+            return stream
+        return completion(replies.pop(0))
+
+    agent.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return agent
+
+
+def test_stream_disconnect():
+    stream = FakeStream(["The ", "Taj ", "Mahal ", "endures ", "as ", "a ", "symbol."])
+    agent = fake_agent(stream)
+    request, _ = agent._request(agent._build_prompt("taj_mahal", "local", FACTS))
+    estimate = estimate_request_tokens(request)
+    key = ("openai", "gpt-4o-mini", "interpret_stream")
+
+    async def read_three_tokens():
+        events = agent.interpret_stream("taj_mahal", "local", FACTS)
+        tokens = [await events.__anext__() for _ in range(3)]
+        await events.aclose()  # the client went away
+        return tokens
+
+    tokens = asyncio.run(read_three_tokens())
+    assert [event for event, _ in tokens] == ["token"] * 3
+    assert stream.closed, "the provider stream must be closed so its connection returns to the pool"
+
+    # Charged the prompt plus the text generated so far, not refunded, not the full estimate
+    prompt_tokens = estimate - request["max_tokens"]
+    used = quota.usage[key]["used"]
+    assert used == prompt_tokens + len("The Taj Mahal ") // 4, used
+    remaining = quota.stats()["openai"]["remaining"]["day"]
+    assert abs(remaining - (100000 - used)) <= 1, remaining
+    print(f"✅ Disconnect mid-stream closes the provider stream and charges {used} of {estimate} tokens")
+
+    # A stream read to the end produces the cached interpretation and is closed too
+    stream = FakeStream(["The ", "Taj ", "Mahal ", "endures."])
+    agent = fake_agent(stream)
+
+    async def read_all():
+        return [event async for event in agent.interpret_stream("taj_mahal", "local", FACTS)]
+
+    events = asyncio.run(read_all())
+    assert events[-1][0] == "interpretation" and events[-1][1]["narrative"] == "The Taj Mahal endures."
+    assert stream.closed and len(agent.cache.items()) == 1
+    print("✅ Completed stream yields the full interpretation and caches it")
+
+
+def test_stale_while_revalidate():
+    cache = MemoryCache(ttl=0.1, stale_ttl=60)
+    agent = fake_agent(replies=["The first narrative.", "The refreshed narrative."], cache=cache)
+
+    async def scenario():
+        first = await agent.interpret_async("taj_mahal", "local", FACTS)
+        assert first["narrative"] == "The first narrative." and len(agent.requests) == 1
+        assert (await agent.interpret_async("taj_mahal", "local", FACTS))["narrative"] == "The first narrative."
+        assert len(agent.requests) == 1
+        print("✅ Fresh hits do not call the provider")
+
+        # Past ttl: the stale narrative is served at once and one background refresh runs
+        await asyncio.sleep(0.15)
+        stale = await asyncio.gather(*(agent.interpret_async("taj_mahal", "local", FACTS) for _ in range(5)))
+        assert all(result["narrative"] == "The first narrative." for result in stale)
+        await asyncio.gather(*agent._background_tasks)
+        assert len(agent.requests) == 2 and not agent._refreshing
+        assert (await agent.interpret_async("taj_mahal", "local", FACTS))["narrative"] == "The refreshed narrative."
+        print("✅ Stale hits are served immediately while a single refresh replaces them")
+
+    asyncio.run(scenario())
+
+
+def test_parse_batch():
+    agent = fake_agent()
+    lenses = ["local", "diaspora", "academic"]
+    reply = '{"local": "Agra remembers.", "diaspora": "A memory of home.", "academic": "Mughal synthesis."}'
+    assert agent._parse_batch(reply, lenses) == {
+        "local": "Agra remembers.", "diaspora": "A memory of home.", "academic": "Mughal synthesis."
+    }
+    # Prose or code fences around the object, missing, blank or non-string lenses, extra keys
+    reply = 'Here you go:\n```json\n{"local": "Agra remembers.", "diaspora": " ", "academic": 3, "tourist": "x"}\n```'
+    assert agent._parse_batch(reply, lenses) == {"local": "Agra remembers."}
+    assert agent._parse_batch("Sorry, I cannot help with that.", lenses) == {}
+    assert agent._parse_batch('{"local": "unterminated', lenses) == {}
+    assert agent._parse_batch('["local"]', lenses) == {}
+    print("✅ Batch replies keep only well-formed lenses")
+
+
+if __name__ == "__main__":
+    print("🧠 Testing LLM cultural agent")
+    print("=" * 50)
+    test_stream_disconnect()
+    test_stale_while_revalidate()
+    test_parse_batch()
+    print("\n🎉 LLM cultural agent is working!")
@@ -0,0 +1,104 @@
+"""
+Test the metrics registry, Prometheus text rendering and the stage timing helpers
+"""
+import asyncio
+from types import SimpleNamespace
+
+from services.metrics import (
+    Registry, registry, timed, export_stats, MetricsMiddleware, STAGE_SECONDS, STAGES_IN_FLIGHT, HTTP_SECONDS
+)
+
+
+def test_render():
+    metrics = Registry()
+    requests = metrics.counter("requests_total", "Requests", ("route",))
+    requests.inc(route="/interpret")
+    requests.inc(2, route="/interpret")
+    requests.inc(route='/weird"path')
+    assert metrics.counter("requests_total", "Requests", ("route",)) is requests
+
+    latency = metrics.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value)
+    metrics.gauge("queue_depth", "Depth").set(7)
+    collected = []
+    metrics.add_collector(lambda: collected.append(1))
+
+    text = metrics.render()
+    lines = text.splitlines()
+    assert collected == [1] and text.endswith("\n")
+    assert "# TYPE culturelens_requests_total counter" in lines
+    assert 'culturelens_requests_total{route="/interpret"} 3' in lines
+    assert 'culturelens_requests_total{route="/weird\\"path"} 1' in lines
+    assert 'culturelens_latency_seconds_bucket{le="0.1"} 2' in lines  # le is inclusive
+    assert 'culturelens_latency_seconds_bucket{le="1"} 3' in lines
+    assert 'culturelens_latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "culturelens_latency_seconds_sum 3.65" in lines and "culturelens_latency_seconds_count 4" in lines
+    assert "culturelens_queue_depth 7" in lines
+    print("✅ Counters, gauges and cumulative histogram buckets render in Prometheus format")
+
+
+def test_timed():
+    @timed("test.sync")
+    def recognize(fail=False):
+        assert STAGES_IN_FLIGHT._values[("test.sync",)] == 1
+        if fail:
+            raise ValueError("upstream down")
+        return "Taj Mahal"
+
+    @timed("test.async")
+    async def interpret():
+        await asyncio.sleep(0.01)
+        return "narrative"
+
+    assert recognize() == "Taj Mahal"
+    try:
+        recognize(fail=True)
+    except ValueError:
+        pass
+    assert asyncio.run(interpret()) == "narrative"
+
+    assert STAGE_SECONDS._values[("test.sync", "ok")][2] == 1
+    assert STAGE_SECONDS._values[("test.sync", "error")][2] == 1
+    count, total = STAGE_SECONDS._values[("test.async", "ok")][2], STAGE_SECONDS._values[("test.async", "ok")][1]
+    assert count == 1 and total >= 0.01
+    assert STAGES_IN_FLIGHT._values[("test.sync",)] == 0
+    assert recognize.__name__ == "recognize" and asyncio.iscoroutinefunction(interpret)
+    print("✅ timed() records ok/error outcomes for sync and async stages")
+
+
+def test_export_stats():
+    export_stats("cache", "vision", {"hits": 3, "backend": "memory", "nested": {"entries": 5}})
+    text = registry.render()
+    assert 'culturelens_cache_hits{name="vision"} 3.0' in text
+    assert 'culturelens_cache_nested_entries{name="vision"} 5.0' in text
+    assert "culturelens_cache_backend" not in text
+    print("✅ export_stats mirrors numeric stats as gauges")
+
+
+def test_middleware():
+    async def app(scope, receive, send):
+        scope["route"] = SimpleNamespace(path="/landmarks/{object_id}")
+        await send({"type": "http.response.start", "status": 404})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/landmarks/atlantis"}
+    asyncio.run(MetricsMiddleware(app)(scope, None, send))
+    assert len(sent) == 2
+    assert HTTP_SECONDS._values[("GET", "/landmarks/{object_id}", "404")][2] == 1
+    print("✅ Middleware labels requests by route template and status")
+
+
+if __name__ == "__main__":
+    print("📈 Testing metrics")
+    print("=" * 50)
+    test_render()
+    test_timed()
+    test_export_stats()
+    test_middleware()
+    print("\n🎉 Metrics are working!")
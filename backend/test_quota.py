@@ -0,0 +1,68 @@
+"""
+Test the quota manager's budgets, reconciliation and degradation signal
+"""
+import os
+
+os.environ["QUOTA_TESTPROVIDER_PER_MINUTE"] = "1000"
+os.environ["QUOTA_TESTPROVIDER_PER_DAY"] = "1500"
+
+from services.quota import QuotaManager, QuotaExceeded, estimate_request_tokens
+
+
+def test_quota():
+    print("💳 Testing quota manager")
+    print("=" * 50)
+    quota = QuotaManager(low_watermark=0.2)
+
+    # Estimates are reconciled with billed usage
+    with quota.metered("testprovider", "model", "interpret", 600) as meter:
+        meter.settle(300)
+    stats = quota.stats()["testprovider"]
+    assert stats["remaining"] == {"minute": 700, "day": 1200}, stats
+    print(f"✅ Over-estimate refunded: {stats['remaining']}")
+
+    # Failed calls cost nothing
+    try:
+        with quota.metered("testprovider", "model", "interpret", 500):
+            raise ConnectionError("upstream down")
+    except ConnectionError:
+        pass
+    assert quota.stats()["testprovider"]["remaining"]["minute"] == 700
+    print("✅ Failed call refunded")
+
+    # Over budget: rejected before reaching the provider, nothing is taken
+    try:
+        with quota.metered("testprovider", "model", "interpret", 800):
+            assert False, "should not run"
+    except QuotaExceeded as e:
+        assert e.window == "minute" and e.retry_in > 0
+        print(f"✅ Rejected: {e}")
+    assert quota.stats()["testprovider"]["by_endpoint"]["model:interpret"]["rejected"] == 1
+
+    # Headroom drives the switch to cheaper output
+    assert not quota.low("testprovider")
+    with quota.metered("testprovider", "model", "interpret", 600):
+        pass
+    assert quota.low("testprovider"), quota.headroom("testprovider")
+    print(f"✅ Low headroom detected ({quota.headroom('testprovider'):.2f})")
+
+    # Providers without limits are counted but never refused
+    with quota.metered("unlimited", "model", "tts", 10 ** 9) as meter:
+        meter.settle(None)
+    assert quota.stats()["unlimited"]["by_endpoint"]["model:tts"]["used"] == 10 ** 9
+
+    estimate = estimate_request_tokens({
+        "messages": [{"role": "user", "content": [
+            {"type": "text", "text": "x" * 400},
+            {"type": "image_url", "image_url": {"url": "data:", "detail": "low"}}
+        ]}],
+        "max_tokens": 300
+    })
+    assert estimate == 100 + 4 + 85 + 300, estimate
+    print(f"✅ Request estimate: {estimate} tokens")
+
+    print("\n🎉 Quota manager is working!")
+
+
+if __name__ == "__main__":
+    test_quota()
@@ -0,0 +1,180 @@
+"""
+Test the upstream resilience layer against the fault-injecting stub server
+"""
+import os
+import json
+import time
+import asyncio
+import http.client
+
+from benchmarks.stub_openai import start_stub_server, FaultPlan
+from services.resilience import Upstream, CircuitOpenError, UpstreamStatusError, RETRYABLE_STATUS
+
+
+def chat(port: int):
+    """One stub chat completion with a stdlib client; fn(timeout) for Upstream.call"""
+    def request(timeout):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+        try:
+            conn.request("POST", "/v1/chat/completions", body=b"{}",
+                         headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            body = response.read()
+        finally:
+            conn.close()
+        if response.status in RETRYABLE_STATUS:
+            raise UpstreamStatusError(response.status, dict(response.getheaders()))
+        return json.loads(body)["choices"][0]["message"]["content"]
+    return request
+
+
+def chat_async(port: int):
+    request = chat(port)
+    return lambda timeout: asyncio.to_thread(request, timeout)
+
+
+def test_retries():
+    faults = FaultPlan(script=["503", "429", "ok"])
+    server = start_stub_server(latency=0.0, faults=faults)
+    upstream = Upstream("stub", attempts=3, base_delay=0.01)
+
+    reply = upstream.call(chat(server.server_port))
+    assert reply.startswith("NAME:") and faults.requests == 3
+    assert upstream.counters["retries"] == 2 and upstream.breaker.state == "closed"
+    server.shutdown()
+    print("✅ 503 and 429 retried with backoff, third attempt succeeds")
+
+
+def test_deadline():
+    server = start_stub_server(latency=0.0, faults=FaultPlan(script=["slow"], slow_latency=3.0))
+    upstream = Upstream("stub", attempts=1)
+
+    started = time.monotonic()
+    try:
+        upstream.call(chat(server.server_port), deadline=0.3)
+        assert False, "slow upstream should have timed out"
+    except TimeoutError:
+        pass
+    elapsed = time.monotonic() - started
+    assert elapsed < 1.0, elapsed
+    server.shutdown()
+    print(f"✅ Slow upstream cut off at the deadline ({elapsed:.2f}s)")
+
+
+def test_circuit_breaker():
+    faults = FaultPlan(error_rate=1.0, status=500)
+    server = start_stub_server(latency=0.0, faults=faults)
+    upstream = Upstream("stub", attempts=1, failure_threshold=3, reset_timeout=0.5)
+
+    for _ in range(3):
+        try:
+            upstream.call(chat(server.server_port))
+        except UpstreamStatusError:
+            pass
+    assert upstream.breaker.state == "open"
+
+    sent = faults.requests
+    try:
+        upstream.call(chat(server.server_port))
+        assert False, "open circuit should fail fast"
+    except CircuitOpenError:
+        pass
+    assert faults.requests == sent, "open circuit must not reach upstream"
+    print("✅ Breaker opens after 3 failures and fails fast without calling upstream")
+
+    # After the reset timeout one probe goes through and closes the circuit
+    time.sleep(0.6)
+    faults.error_rate = 0.0
+    assert upstream.call(chat(server.server_port)).startswith("NAME:")
+    assert upstream.breaker.state == "closed"
+    server.shutdown()
+    print("✅ Half-open probe succeeds and closes the circuit")
+
+
+def test_cancelled_probe():
+    upstream = Upstream("stub", attempts=1, failure_threshold=1, reset_timeout=0.1)
+
+    async def refused(timeout):
+        raise ConnectionError("connection refused")
+
+    async def hangs(timeout):
+        await asyncio.sleep(timeout)
+
+    async def ok(timeout):
+        return "NAME: ok"
+
+    async def scenario():
+        try:
+            await upstream.call_async(refused)
+        except ConnectionError:
+            pass
+        assert upstream.breaker.state == "open"
+        await asyncio.sleep(0.15)
+
+        # The half-open probe is cancelled (client went away) before it answers
+        probe = asyncio.create_task(upstream.call_async(hangs, deadline=5))
+        await asyncio.sleep(0.05)
+        probe.cancel()
+        try:
+            await probe
+        except asyncio.CancelledError:
+            pass
+        return await upstream.call_async(ok)
+
+    assert asyncio.run(scenario()) == "NAME: ok"
+    assert upstream.breaker.state == "closed"
+    print("✅ Cancelled half-open probe frees the slot; the next call probes and closes the circuit")
+
+
+def test_hedging():
+    faults = FaultPlan(script=["slow"], slow_latency=2.0)
+    server = start_stub_server(latency=0.0, faults=faults)
+    upstream = Upstream("stub", attempts=1, hedge_after=0.1)
+
+    async def timed():
+        started = time.monotonic()
+        reply = await upstream.call_async(chat_async(server.server_port), deadline=5)
+        return reply, time.monotonic() - started
+
+    reply, elapsed = asyncio.run(timed())
+    assert reply.startswith("NAME:") and elapsed < 1.0, elapsed
+    assert upstream.counters["hedges"] == 1 and upstream.counters["hedge_wins"] == 1
+    server.shutdown()
+    print(f"✅ Hedged request answered in {elapsed:.2f}s despite a 2s straggler")
+
+
+def test_llm_fallback():
+    try:
+        import openai  # noqa: F401
+    except ImportError:
+        print("⏭️  openai not installed, skipping LLMCulturalAgent fallback test")
+        return
+
+    server = start_stub_server(latency=0.0, faults=FaultPlan(error_rate=1.0, status=503))
+    os.environ.update({
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-stub"),
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{server.server_port}/v1",
+        "OPENAI_RETRIES": "1",
+        "LLM_CACHE_BACKEND": "memory"
+    })
+    from agents.llm_cultural_agent import LLMCulturalAgent
+    agent = LLMCulturalAgent(provider="openai")
+    agent.upstream.base_delay = 0.01
+
+    result = agent.interpret("taj_mahal", "local", {"name": "Taj Mahal"})
+    assert result["generated_by"] == "curated/fallback", result
+    assert "Mughal" in result["narrative"]
+    server.shutdown()
+    print("✅ LLM outage falls back to the curated interpretation")
+
+
+if __name__ == "__main__":
+    print("🛡️  Testing upstream resilience")
+    print("=" * 50)
+    test_retries()
+    test_deadline()
+    test_circuit_breaker()
+    test_cancelled_probe()
+    test_hedging()
+    test_llm_fallback()
+    print("\n🎉 Resilience layer is working!")
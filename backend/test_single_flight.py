@@ -0,0 +1,98 @@
+"""
+Test single-flight coalescing and cancellation of abandoned upstream calls
+"""
+import time
+import asyncio
+import threading
+
+from services.single_flight import SingleFlight
+
+
+def test_thread_coalescing():
+    flights = SingleFlight()
+    started = []
+
+    def upstream():
+        started.append(1)
+        time.sleep(0.1)
+        return "NAME: Taj Mahal"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flights.do("llm:abc", upstream)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["NAME: Taj Mahal"] * 8 and len(started) == 1
+    assert flights.stats()["by_namespace"]["llm"] == {"calls": 1, "collapsed": 7}
+    print("✅ 8 concurrent threads share one upstream call")
+
+
+def test_async_coalescing():
+    flights = SingleFlight()
+    started = []
+
+    async def upstream():
+        started.append(1)
+        await asyncio.sleep(0.05)
+        return {"name": "Taj Mahal"}
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do_async("vision:abc", upstream) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == [{"name": "Taj Mahal"}] * 10 and len(started) == 1
+    assert flights.stats()["in_flight"] == 0
+    print("✅ 10 concurrent coroutines share one upstream task")
+
+
+def test_cancellation():
+    flights = SingleFlight()
+    state = {"started": 0, "cancelled": 0, "finished": 0}
+
+    async def upstream():
+        state["started"] += 1
+        try:
+            await asyncio.sleep(0.2)
+        except asyncio.CancelledError:
+            state["cancelled"] += 1
+            raise
+        state["finished"] += 1
+        return "ok"
+
+    async def scenario():
+        # One of two callers leaves: the other still gets the result
+        leaving = asyncio.create_task(flights.do_async("vision:a", upstream))
+        staying = asyncio.create_task(flights.do_async("vision:a", upstream))
+        await asyncio.sleep(0.05)
+        leaving.cancel()
+        assert await staying == "ok"
+        assert state == {"started": 1, "cancelled": 0, "finished": 1}
+
+        # Every caller leaves (disconnect, BATCH_ITEM_TIMEOUT): the upstream call is cancelled
+        callers = [asyncio.create_task(flights.do_async("vision:b", upstream)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        for caller in callers:
+            caller.cancel()
+        try:
+            await asyncio.wait_for(flights.do_async("vision:c", upstream), timeout=0.05)
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(0.01)
+        assert state["cancelled"] == 2 and state["finished"] == 1, state
+        assert flights.stats()["in_flight"] == 0
+
+        # A later caller starts a fresh call instead of joining the cancelled one
+        assert await flights.do_async("vision:b", upstream) == "ok"
+
+    asyncio.run(scenario())
+    print("✅ Abandoned upstream calls are cancelled; shared ones keep running for the rest")
+
+
+if __name__ == "__main__":
+    print("🪁 Testing single-flight coalescing")
+    print("=" * 50)
+    test_thread_coalescing()
+    test_async_coalescing()
+    test_cancellation()
+    print("\n🎉 Single-flight is working!")
@@ -0,0 +1,179 @@
+"""
+Test the streaming endpoints: agent failures surface as a 503 before the
+response starts, never as a broken stream
+"""
+import sys
+import json
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from services.agent_registry import agents
+
+
+def unavailable(reason: str):
+    def build():
+        raise ValueError(reason)
+    return build
+
+
+@pytest.fixture
+def swap_agents():
+    """
+    agents.register for the duration of one test. Every agent starts unbuilt,
+    and the original factories come back, unbuilt, on teardown.
+    """
+    saved = {name: (entry.factory, entry.required) for name, entry in agents._entries.items()}
+
+    def reset():
+        agents._entries.clear()
+        for name, (factory, required) in saved.items():
+            agents.register(name, factory, required)
+
+    reset()
+    yield agents.register
+    reset()
+
+
+def test_missing_key(monkeypatch, swap_agents):
+    print("🔑 Testing streaming endpoints without API keys")
+    print("=" * 50)
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)  # VisionAgent refuses to build
+    client = TestClient(main.app, raise_server_exceptions=True)
+
+    response = client.post("/analyze/images", files=[("files", ("a.jpg", b"not really a jpeg", "image/jpeg"))])
+    assert response.status_code == 503, response.status_code
+    assert response.json()["agent"] == "vision" and "Retry-After" in response.headers
+    print("✅ /analyze/images answers 503 when the vision agent cannot be built")
+
+    swap_agents("cultural", unavailable("LLM_PROVIDER misconfigured"))
+    response = client.post("/interpret/stream", json={"object_id": "taj_mahal", "cultural_lens": "local"})
+    assert response.status_code == 503 and response.json()["agent"] == "cultural"
+    print("✅ /interpret/stream answers 503 instead of opening a broken event stream")
+
+    swap_agents("audio", unavailable("elevenlabs SDK not installed"))
+    response = client.post("/audio/intro", json={"object_id": "taj_mahal", "stream": True})
+    assert response.status_code == 503 and response.json()["agent"] == "audio"
+    print("✅ Streaming audio answers 503 when the audio agent cannot be built")
+
+    print("\n🎉 Streaming endpoints fail cleanly!")
+
+
+def sse_events(body: str) -> list:
+    return [line[len("event: "):] for line in body.splitlines() if line.startswith("event: ")]
+
+
+def test_event_order(swap_agents):
+    print("\n📡 Testing /interpret/stream event order")
+    print("=" * 50)
+    first_token = asyncio.Event()
+
+    async def get_facts_async(object_id, detected_name=None, location=None):
+        if object_id == "atlantis":
+            raise LookupError("no such landmark")
+        await asyncio.sleep(0.02)
+        return {"name": "Taj Mahal"}
+
+    async def analyze_async(object_id, lens):
+        return {"lens": lens, "biases": []}
+
+    async def get_sentiment_async(object_id):
+        await first_token.wait()  # finishes while the narrative is streaming
+        return {"overall": "positive"}
+
+    async def interpret_stream(object_id, lens, facts):
+        yield "token", "The Taj "
+        first_token.set()
+        await asyncio.sleep(0.01)
+        yield "token", "Mahal endures."
+        yield "interpretation", {"narrative": "The Taj Mahal endures."}
+
+    async def get_available_lenses_async(object_id):
+        return ["local", "neutral"]
+
+    swap_agents("knowledge", lambda: SimpleNamespace(get_facts_async=get_facts_async))
+    swap_agents("bias", lambda: SimpleNamespace(analyze_async=analyze_async))
+    swap_agents("community", lambda: SimpleNamespace(get_sentiment_async=get_sentiment_async))
+    swap_agents("cultural", lambda: SimpleNamespace(
+        interpret_stream=interpret_stream, get_available_lenses_async=get_available_lenses_async
+    ))
+    client = TestClient(main.app)
+
+    response = client.post("/interpret/stream", json={"object_id": "taj_mahal", "cultural_lens": "local"})
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+    assert events == ["bias_report", "facts", "token", "community_sentiment", "token", "interpretation", "done"], events
+    assert 'data: {"text": "The Taj "}' in response.text
+    assert 'data: {"available_lenses": ["local", "neutral"]}' in response.text
+    print(f"✅ Events: {', '.join(events)}")
+
+    first_token.set()
+    response = client.post("/interpret/stream", json={"object_id": "atlantis", "cultural_lens": "local"})
+    events = sse_events(response.text)
+    assert "error" in events and "done" not in events and "token" not in events, events
+    assert '"stage": "facts"' in response.text
+    print("✅ A failed facts lookup ends the stream with an error event and no narrative")
+
+
+def test_upload_limit(monkeypatch):
+    monkeypatch.setattr(main, "IMAGE_MAX_BYTES", 1024)
+    client = TestClient(main.app)
+    response = client.post("/analyze/image", files={"file": ("big.jpg", b"x" * 1025, "image/jpeg")})
+    assert response.status_code == 413, response.status_code
+    print("✅ /analyze/image refuses uploads over IMAGE_MAX_MB before reading them")
+
+
+def test_batch_item_timeout(swap_agents):
+    print("\n⏱️  Testing the per-image batch deadline")
+    print("=" * 50)
+
+    async def lookup_cached(data):
+        return data, None
+
+    async def recognize_async(data, fp=None):
+        return {"name": "Taj Mahal", "confidence": 0.9}
+
+    class SlowLocalVision:
+        available = True
+
+        def recognize(self, data):
+            time.sleep(0.3)  # a local model stuck on this image
+            return {"name": "Qutub Minar", "confidence": 0.8}
+
+    swap_agents("vision", lambda: SimpleNamespace(lookup_cached=lookup_cached, recognize_async=recognize_async))
+
+    async def collect():
+        start = time.monotonic()
+        lines = [json.loads(line) async for line in main.recognize_batch(
+            [("slow.jpg", b"slow")], concurrency=1, item_timeout=0.05, local_vision=SlowLocalVision()
+        )]
+        return lines, time.monotonic() - start
+
+    lines, elapsed = asyncio.run(collect())
+    assert elapsed < 0.3, elapsed
+    assert lines[0]["file"] == "slow.jpg" and "timed out" in lines[0]["error"], lines
+    print("✅ A slow local model counts against the same per-image timeout as the cloud call")
+
+
+def test_byte_ranges():
+    print("\n📼 Testing Range header parsing")
+    print("=" * 50)
+    assert main.parse_byte_range(None, 1000) is None
+    assert main.parse_byte_range("bytes=0-99", 1000) == (0, 99)
+    assert main.parse_byte_range("bytes=900-", 1000) == (900, 999)
+    assert main.parse_byte_range("bytes=-100", 1000) == (900, 999)
+    assert main.parse_byte_range("bytes=-5000", 1000) == (0, 999)
+    assert main.parse_byte_range("bytes=500-5000", 1000) == (500, 999)
+    assert main.parse_byte_range("bytes=1000-", 1000) == "unsatisfiable"
+    assert main.parse_byte_range("bytes=0-1,5-9", 1000) is None  # multipart: serve it all
+    assert main.parse_byte_range("bytes=a-b", 1000) is None
+    assert main.parse_byte_range("items=0-9", 1000) is None
+    print("✅ Open, suffix, clamped, unsatisfiable and unsupported ranges")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,91 @@
+"""
+Test translation memoization and batch translation against a fake OpenAI client (no API keys needed)
+"""
+import os
+import json
+import tempfile
+import threading
+from types import SimpleNamespace
+
+os.environ["TRANSLATION_CACHE_BACKEND"] = "memory"
+os.environ["AUDIO_CACHE_DIR"] = tempfile.mkdtemp()
+os.environ["QUOTA_OPENAI_PER_DAY"] = "100000"
+
+from agents.audio_agent import AudioAgent
+
+TEXT = "Welcome to the Taj Mahal."
+
+
+class FakeOpenAI:
+    """chat.completions.create that answers from `reply(request)` and records every request"""
+
+    def __init__(self, reply):
+        self.requests = []
+        self._lock = threading.Lock()
+
+        def create(**request):
+            with self._lock:
+                self.requests.append(request)
+            usage = SimpleNamespace(total_tokens=50)
+            return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=SimpleNamespace(content=reply(request)))])
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+def fake_agent(reply) -> AudioAgent:
+    agent = AudioAgent(http=SimpleNamespace(client=None, async_client=None))
+    agent.openai_client = FakeOpenAI(reply)
+    return agent
+
+
+def single(request):
+    language = request["messages"][0]["content"].split(" to ")[1].split(".")[0]
+    return f"[{language}] {request['messages'][1]['content']}"
+
+
+def test_memoization():
+    agent = fake_agent(single)
+    assert agent.translate_text(TEXT, "es") == "[Spanish] Welcome to the Taj Mahal."
+    assert agent.translate_text(TEXT, "es") == "[Spanish] Welcome to the Taj Mahal."
+    assert agent.translate_text(TEXT, "en") == TEXT
+    assert len(agent.openai_client.requests) == 1
+    assert agent.translate_text(TEXT + " ", "es") and len(agent.openai_client.requests) == 2
+    print("✅ Repeated translations are served from the cache; English is never sent")
+
+
+def test_batch():
+    def batch(request):
+        # Answers every language but Arabic, which falls back to a single-language call
+        if "response_format" not in request:
+            return single(request)
+        return json.dumps({"fr": "Bienvenue au Taj Mahal.", "hi": "ताज महल में आपका स्वागत है।", "ar": " "})
+
+    agent = fake_agent(batch)
+    agent.translate_text(TEXT, "es")
+    translations = agent.translate_batch(TEXT, ["en", "es", "fr", "hi", "ar", "fr"])
+    assert translations == {
+        "en": TEXT,
+        "es": "[Spanish] Welcome to the Taj Mahal.",
+        "fr": "Bienvenue au Taj Mahal.",
+        "hi": "ताज महल में आपका स्वागत है।",
+        "ar": "[Arabic] Welcome to the Taj Mahal."
+    }, translations
+    batch_request = agent.openai_client.requests[1]
+    assert "fr (French)" in batch_request["messages"][0]["content"] and "es (" not in batch_request["messages"][0]["content"]
+    assert len(agent.openai_client.requests) == 3
+    print("✅ One batch request for uncached languages; blanks fall back to single calls")
+
+    # Everything is cached now, including through pretranslate's language names
+    assert agent.pretranslate(TEXT, ["French", "hindi"]) == {
+        "French": "Bienvenue au Taj Mahal.", "hindi": "ताज महल में आपका स्वागत है।"
+    }
+    assert len(agent.openai_client.requests) == 3
+    print("✅ Pretranslated languages are served without another request")
+
+
+if __name__ == "__main__":
+    print("🌐 Testing translation memoization")
+    print("=" * 50)
+    test_memoization()
+    test_batch()
+    print("\n🎉 Translation caching is working!")
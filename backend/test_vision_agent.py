@@ -0,0 +1,69 @@
+"""
+Test VisionAgent's device-location shortcut against fake tiers (no API key needed)
+"""
+import asyncio
+
+from agents.vision_agent import VisionAgent
+from services.cache import MemoryCache
+from services.geo_index import GeoIndex
+from services.image_cache import VisionCache
+
+TAJ = b"photo of the taj mahal"
+
+
+class FakeLocalVision:
+    def score_for(self, image_bytes: bytes, object_id: str) -> float:
+        return 0.95
+
+
+def fake_agent() -> VisionAgent:
+    agent = VisionAgent.__new__(VisionAgent)
+    agent.cache = VisionCache(MemoryCache())
+    agent.geo_index = GeoIndex()
+    agent.geo_index.add("taj_mahal", 27.1751, 78.0421, {"name": "Taj Mahal", "country": "India"})
+    agent.local_vision = FakeLocalVision()
+    agent.gps_radius_km, agent.gps_consistency, agent.gps_match_confidence = 1.0, 0.75, 0.9
+    agent.landmarks = {}
+    agent.cloud_calls = 0
+
+    async def recognize_uncached_async(image):
+        agent.cloud_calls += 1
+        await asyncio.sleep(0.01)
+        return {"object_id": "unknown_tower", "detected_name": "Unknown Tower", "confidence": 0.7}
+
+    agent._recognize_uncached_async = recognize_uncached_async
+    return agent
+
+
+def test_location_results_not_shared():
+    agent = fake_agent()
+
+    async def scenario():
+        at_taj = await agent.recognize_async(TAJ, location=(27.1751, 78.0421))
+        assert at_taj["processing"] == "gps_match" and at_taj["confidence"] == 0.9
+        assert agent.cloud_calls == 0
+        print("✅ GPS match answers with a numeric confidence")
+
+        # The same photo from nowhere near the Taj is not given the GPS-derived answer
+        elsewhere = await agent.recognize_async(TAJ)
+        assert elsewhere["object_id"] == "unknown_tower" and agent.cloud_calls == 1
+        assert (await agent.recognize_async(TAJ))["cache"]["match"] == "exact"
+        print("✅ Location-derived results are not cached; image-only results are")
+
+        # Concurrent callers in different places do not share one in-flight answer
+        agent.cache = VisionCache(MemoryCache())
+        near, far = await asyncio.gather(
+            agent.recognize_async(TAJ, location=(27.1751, 78.0421)),
+            agent.recognize_async(TAJ, location=(48.8584, 2.2945))
+        )
+        assert near["object_id"] == "taj_mahal" and far["object_id"] == "unknown_tower"
+        print("✅ Single-flight keys include the location cell")
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    print("📍 Testing vision location shortcut")
+    print("=" * 50)
+    test_location_results_not_shared()
+    print("\n🎉 Vision location shortcut is working!")
@@ -0,0 +1,86 @@
+"""
+Test the vision result cache: exact and perceptual-hash (near-duplicate) matches
+"""
+import io
+import tempfile
+
+from services.cache import MemoryCache
+from services.image_cache import VisionCache, ImageFingerprint, fingerprint, hamming_distance, Image
+
+TAJ = {"detected_name": "Taj Mahal", "object_id": "taj_mahal", "confidence": 0.93}
+COLOSSEUM = {"detected_name": "Colosseum", "object_id": "colosseum", "confidence": 0.9}
+
+
+def test_near_match():
+    print("🖼️  Testing vision cache")
+    print("=" * 50)
+    backend = MemoryCache(max_entries=100)
+    cache = VisionCache(backend, max_distance=6)
+    taj = ImageFingerprint("digest-taj", 0b1011_0110 << 40)
+    cache.store(taj, TAJ)
+    cache.store(ImageFingerprint("digest-colosseum", 0xFFFF_0000_FFFF_0000), COLOSSEUM)
+
+    hit = cache.lookup(taj)
+    assert hit["cache"] == {"match": "exact", "distance": 0} and hit["object_id"] == "taj_mahal"
+    assert "cache" not in backend.get("digest-taj")["result"], "tagging must not mutate the cached result"
+    print("✅ Identical upload: exact digest hit")
+
+    # Re-encoded copy: different bytes, a few pixels' worth of hash bits flipped
+    near = ImageFingerprint("digest-taj-recompressed", taj.phash ^ 0b1011)
+    hit = cache.lookup(near)
+    assert hit["cache"] == {"match": "perceptual", "distance": 3} and hit["object_id"] == "taj_mahal"
+    assert cache.lookup(ImageFingerprint("digest-other", taj.phash ^ 0b1111111)) is None
+    print("✅ Near-duplicate within max_distance bits hits; a different photo misses")
+
+    # The closest hash wins; errors are never cached; evicted entries leave the index
+    cache.store(ImageFingerprint("digest-taj-2", taj.phash ^ 0b11), TAJ)
+    assert cache.lookup(ImageFingerprint("x", taj.phash ^ 0b111))["cache"]["distance"] == 1
+    cache.store(ImageFingerprint("digest-error", 12345), {"error": "timeout"})
+    assert backend.get("digest-error") is None
+    backend.delete("digest-taj")
+    backend.delete("digest-taj-2")
+    assert cache.lookup(near) is None and "digest-taj-2" not in cache._phashes
+    assert cache.stats()["exact_hits"] == 1 and cache.stats()["near_hits"] == 2
+
+    # Exact-only when perceptual matching is turned off
+    assert VisionCache(MemoryCache(), max_distance=0).lookup(near) is None
+    assert hamming_distance(0b1010, 0b0101) == 4
+    print("✅ Nearest hash wins, errors are not cached, evictions drop out of the index")
+
+
+def test_file_fingerprint():
+    # Uploads are fingerprinted straight from their spooled file, wherever it is positioned
+    data = bytes(range(256)) * 10000
+    upload = tempfile.SpooledTemporaryFile(max_size=1024)
+    upload.write(data)
+    assert fingerprint(upload) == fingerprint(data)
+    assert fingerprint(io.BytesIO(data)).digest == fingerprint(data).digest
+    print("✅ A spooled upload fingerprints the same as its bytes")
+
+
+def test_perceptual_hash():
+    if Image is None:
+        print("⚠️  Pillow not installed - skipping perceptual hash test")
+        return
+
+    def jpeg(image, quality):
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=quality)
+        return buffer.getvalue()
+
+    gradient = Image.linear_gradient("L").resize((640, 480)).convert("RGB")
+    original = fingerprint(jpeg(gradient, 95))
+    recompressed = fingerprint(jpeg(gradient.resize((320, 240)), 60))
+    different = fingerprint(jpeg(gradient.rotate(90), 95))
+    assert original.digest != recompressed.digest
+    assert hamming_distance(original.phash, recompressed.phash) <= 6
+    assert hamming_distance(original.phash, different.phash) > 6
+    assert fingerprint(b"not an image").phash is None
+    print("✅ dHash survives resizing and recompression, not rotation")
+
+
+if __name__ == "__main__":
+    test_near_match()
+    test_file_fingerprint()
+    test_perceptual_hash()
+    print("\n🎉 Vision cache is working!")
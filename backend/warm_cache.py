@@ -0,0 +1,192 @@
+"""
+Precompute facts, interpretations, translations and narration audio for the
+whole catalogue so deployments start with warm caches.
+
+Walks every (object_id, lens, language) combination from the landmark catalogue,
+the cultural lenses and AudioAgent.supported_languages. Progress is
+checkpointed, so an interrupted run resumes where it stopped.
+
+Usage:
+    python warm_cache.py                       # everything
+    python warm_cache.py --landmarks taj_mahal --languages hindi spanish
+    python warm_cache.py --no-audio --workers 8 --rps 2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from agents.knowledge_agent import KnowledgeAgent
+from agents.cultural_agent import CulturalAgent
+from agents.audio_agent import AudioAgent
+from services.cache import CACHE_DIR, cache_stats
+from services.catalogue import catalogue
+from services.rate_limit import TokenBucket
+
+PROGRESS_FILE = CACHE_DIR / "warmup_progress.json"
+
+
+class Progress:
+    """Set of completed job keys, flushed to disk after every job"""
+
+    def __init__(self, path, reset: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+        self.done = set()
+        if path.exists() and not reset:
+            self.done = set(json.loads(path.read_text()))
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.done
+
+    def mark(self, key: str) -> None:
+        with self._lock:
+            self.done.add(key)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(sorted(self.done)))
+            os.replace(tmp, self.path)
+
+
+def build_cultural_agent():
+    """Same selection as main.py: LLM agent when USE_LLM=true, else hardcoded"""
+    if os.getenv("USE_LLM", "false").lower() == "true":
+        from agents.llm_cultural_agent import LLMCulturalAgent
+        try:
+            return LLMCulturalAgent(provider=os.getenv("LLM_PROVIDER", "openai"))
+        except Exception as e:
+            print(f"⚠️  LLM initialization failed: {e}, using hardcoded cultural agent")
+    return CulturalAgent()
+
+
+def run_job(bucket: Optional[TokenBucket], job, retries: int = 3) -> bool:
+    """Run one job with rate limiting and exponential backoff on failure"""
+    for attempt in range(retries):
+        if bucket is not None:
+            bucket.acquire()
+        if job():
+            return True
+        delay = 2 ** attempt
+        if bucket is not None:
+            bucket.consume(delay * bucket.rate)  # back off for every worker, not just this one
+        time.sleep(delay)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm CultureLens caches for the full catalogue")
+    parser.add_argument("--landmarks", nargs="*", help="object ids (default: every catalogued landmark)")
+    parser.add_argument("--lenses", nargs="*", help="cultural lenses (default: all available)")
+    parser.add_argument("--languages", nargs="*", help="audio languages (default: all supported)")
+    parser.add_argument("--workers", type=int, default=4, help="parallel upstream jobs")
+    parser.add_argument("--rps", type=float, default=1.0, help="max job starts per second")
+    parser.add_argument("--no-audio", action="store_true", help="skip TTS synthesis")
+    parser.add_argument("--reset", action="store_true", help="ignore saved progress")
+    args = parser.parse_args()
+
+    knowledge_agent = KnowledgeAgent()
+    cultural_agent = build_cultural_agent()
+    audio_agent = AudioAgent()
+
+    object_ids = args.landmarks or list(catalogue.ids("landmark"))
+    languages = args.languages or audio_agent.get_available_languages()
+    progress = Progress(PROGRESS_FILE, reset=args.reset)
+    # Capacity 1: job starts are spaced out evenly instead of bursting; --rps 0 disables the limit
+    bucket = TokenBucket(rate=args.rps, capacity=1.0) if args.rps > 0 else None
+    summary = {"done": 0, "skipped": 0, "failed": 0}
+    failures = []
+    start = time.time()
+
+    print("🔥 Warming CultureLens caches")
+    print("=" * 60)
+    print(f"   {len(object_ids)} landmarks × lenses × {len(languages)} languages, "
+          f"{args.workers} workers, {args.rps} jobs/s")
+
+    # Phase 1: facts, interpretations and batch translations (per landmark)
+    texts = {}  # (object_id, lens) -> narration text; lens "intro" for the intro
+
+    def text_job(object_id: str):
+        def job():
+            facts = knowledge_agent.get_facts(object_id)
+            if facts.get("error"):
+                return False
+            lenses = args.lenses or ["neutral"] + cultural_agent.get_available_lenses(object_id)
+            result = {("intro", object_id): audio_agent.generate_landmark_intro(
+                facts.get("name", "this landmark"), facts.get("location", "an amazing place")
+            )}
+            for lens in dict.fromkeys(lenses):
+                interpretation = cultural_agent.interpret(object_id=object_id, lens=lens, facts=facts)
+                if interpretation.get("fallback_reason"):
+                    # LLM failed and the curated text was served: do not synthesize or checkpoint it
+                    print(f"   ⚠️  {object_id}/{lens}: {interpretation['fallback_reason']}")
+                    return False
+                result[(lens, object_id)] = audio_agent.generate_narration(
+                    {"facts": facts, "interpretation": interpretation}
+                )
+            for text in result.values():
+                audio_agent.pretranslate(text, languages)
+            for (lens, oid), text in result.items():
+                texts[(oid, lens)] = text
+            return True
+        return job
+
+    # Phase 2: narration audio per (object_id, lens, language)
+    def audio_job(text: str, language: str):
+        return lambda: audio_agent.create_audio_file(text, language) is not None
+
+    def run_phase(jobs: dict, checkpoint: bool = True) -> None:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = {}
+            for key, job in jobs.items():
+                if checkpoint and key in progress:
+                    summary["skipped"] += 1
+                    continue
+                futures[pool.submit(run_job, bucket, job)] = key
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"   ❌ {key}: {e}")
+                    ok = False
+                if ok:
+                    if checkpoint:
+                        progress.mark(key)
+                    summary["done"] += 1
+                    print(f"   ✅ {key}")
+                else:
+                    summary["failed"] += 1
+                    failures.append(key)
+                    print(f"   ❌ {key}")
+
+    # Text work is always re-derived (cache hits after the first run) because phase 2 needs the texts
+    run_phase({f"text:{object_id}": text_job(object_id) for object_id in object_ids}, checkpoint=False)
+
+    if not args.no_audio:
+        run_phase({
+            f"audio:{object_id}:{lens}:{language}": audio_job(text, language)
+            for (object_id, lens), text in texts.items()
+            for language in languages
+        })
+
+    print("\n" + "=" * 60)
+    print(f"✅ Done: {summary['done']}  ⏭️  Skipped: {summary['skipped']}  ❌ Failed: {summary['failed']}")
+    print(f"⏱️  {time.time() - start:.1f}s")
+    if failures:
+        print("Failed jobs (re-run to retry):")
+        for key in failures:
+            print(f"   - {key}")
+    print("\nCache stats:")
+    print(json.dumps({**cache_stats(), "audio": audio_agent.audio_cache.stats()}, indent=2))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())